@@ -1,28 +1,22 @@
-import json
-import re
 import sys
-from dataclasses import dataclass
-from enum import StrEnum
-import requests
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QIcon, QDesktopServices, QFont
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QEvent, QRect, QSize
+from PyQt6.QtGui import QIcon, QDesktopServices, QFont, QFontMetrics, QKeySequence, QPainter, QPalette, QShortcut
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLineEdit, QListWidget, QTextEdit, QWidget, QMessageBox, QCheckBox, QStatusBar, QComboBox, QLabel, QFileDialog,
-    QListWidgetItem
+    QLineEdit, QListView, QWidget, QMessageBox, QCheckBox, QStatusBar, QComboBox, QLabel, QFileDialog,
+    QAbstractItemView, QStyle, QStyledItemDelegate
 )
 from PyQt6.QtCore import QUrl
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import NoTranscriptFound, TranscriptsDisabled, VideoUnavailable
 
-@dataclass
-class TranscriptSegment:
-    start: float = 0.0
-    text: str = ""
-
-class FileType(StrEnum):
-    JSON = "json"
-    TXT = "txt"
+import core
+import formatters
+import metrics
+import transcript_probe
+from background import TaskPool
+from core import FileType
+from search_index import SearchIndex
+from titles import TitleResolver
+from transcript_cache import TranscriptCache, language_key
 
 def set_widget_style(widget, font_family='Segoe UI', font_size=10, padding=0, margin=0, border='none', height=None):
     style = f"font-family: '{font_family}'; font-size: {font_size}pt; padding: {padding}px; margin: {margin}px; border: {border}"
@@ -36,35 +30,104 @@ def create_standard_layout():
     layout.setSpacing(0)  # Zmniejszenie odstępu do minimum
     return layout
 
-def create_video_widget(title, url):
-    widget = QWidget()
-    layout = QHBoxLayout()
-    layout.setContentsMargins(0, 0, 0, 0)  # Zmniejszenie marginesów do minimum
-    layout.setSpacing(0)  # Zmniejszenie odstępu do minimum
-    layout.setAlignment(Qt.AlignmentFlag.AlignVCenter)  # Ustawienie wyrównania układu w pionie na środek
+class VideoQueueModel(QAbstractListModel):
+    """
+    Kolejka filmów: ID, tytuł i link. Wiersze rysuje VideoItemDelegate, więc kolejka nie
+    tworzy widżetów dla poszczególnych filmów.
+    """
+    URL_ROLE = Qt.ItemDataRole.UserRole + 1
 
-    title_label = QLabel(title)
-    title_font = QFont()
-    title_font.setBold(True)
-    title_label.setFont(title_font)
-    set_widget_style(title_label, font_size=10, height=30, margin='3px 0')  # Ujednolicenie wysokości, stylu i paddingu
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
 
-    url_label = QLabel(f"<a href=\"{url}\" style=\"text-decoration: none;\">{url}</a>")
-    url_font = QFont()
-    url_font.setPointSize(10)
-    url_label.setFont(url_font)
+    def add_videos(self, videos):
+        # videos: lista krotek (video_id, tytuł, link), wstawianych jedną operacją
+        if not videos:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.items), len(self.items) + len(videos) - 1)
+        self.items.extend(list(video) for video in videos)
+        self.endInsertRows()
 
-    url_label.setTextFormat(Qt.TextFormat.RichText)
-    url_label.setAlignment(Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft)
-    url_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextBrowserInteraction)
-    url_label.setOpenExternalLinks(True)
-    set_widget_style(url_label, font_size=10, height=30, margin='3px 0')  # Ujednolicenie wysokości, stylu i paddingu
+    def set_title(self, video_id, title):
+        for row, item in enumerate(self.items):
+            if item[0] == video_id:
+                item[1] = title
+                self.dataChanged.emit(self.index(row), self.index(row))
 
-    layout.addWidget(title_label)
-    layout.addWidget(url_label, alignment=Qt.AlignmentFlag.AlignLeft)
-    widget.setLayout(layout)
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
 
-    return widget
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        video_id, title, url = self.items[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return title
+        if role == Qt.ItemDataRole.UserRole:
+            return video_id
+        if role == self.URL_ROLE:
+            return url
+        return None
+
+
+class VideoItemDelegate(QStyledItemDelegate):
+    # Pogrubiony tytuł i link do filmu w jednym wierszu; kliknięcie linku otwiera film w przeglądarce
+    ROW_HEIGHT = 30
+    SPACING = 8
+
+    def _url_rect(self, option, index):
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        title_width = QFontMetrics(title_font).horizontalAdvance(index.data() or "")
+        left = option.rect.left() + 3 + title_width + self.SPACING
+        url_width = QFontMetrics(option.font).horizontalAdvance(index.data(VideoQueueModel.URL_ROLE) or "")
+        return QRect(left, option.rect.top(), min(url_width, max(0, option.rect.right() - left)), option.rect.height())
+
+    def paint(self, painter, option, index):
+        # Tło i zaznaczenie rysuje styl, tekst - delegat
+        self.initStyleOption(option, index)
+        option.text = ""
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, option, painter, option.widget)
+
+        painter.save()
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        text_rect = option.rect.adjusted(3, 0, -3, 0)
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, index.data() or "")
+        url_rect = self._url_rect(option, index)
+        painter.setFont(option.font)
+        painter.setPen(option.palette.color(QPalette.ColorRole.Link))
+        url = painter.fontMetrics().elidedText(index.data(VideoQueueModel.URL_ROLE) or "",
+                                               Qt.TextElideMode.ElideRight, url_rect.width())
+        painter.drawText(url_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, url)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton
+                and self._url_rect(option, index).contains(event.position().toPoint())):
+            QDesktopServices.openUrl(QUrl(index.data(VideoQueueModel.URL_ROLE)))
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
+class PlaceholderListView(QListView):
+    # Lista z tekstem zastępczym, gdy model jest pusty
+    def __init__(self, placeholder, parent=None):
+        super().__init__(parent)
+        self.placeholder = placeholder
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.model() is not None and self.model().rowCount() == 0:
+            painter = QPainter(self.viewport())
+            painter.drawText(self.viewport().rect().adjusted(3, 3, -3, -3),
+                             Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft, self.placeholder)
 
 class StyledButton(QPushButton):
     def __init__(self, text, parent=None):
@@ -117,6 +180,57 @@ class StyledButton(QPushButton):
         """
         self.setStyleSheet(style)
 
+class TranscriptLinesModel(QAbstractListModel):
+    """
+    Linie transkrypcji dla QListView. Obie wersje (ze znacznikami czasu i bez) są budowane raz
+    po pobraniu, a widok dostaje wiersze partiami, w miarę przewijania.
+    """
+    BATCH_SIZE = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.segments = []
+        self.timestamped_lines = []
+        self.plain_lines = []
+        self.remove_timestamps = False
+        self.loaded = 0
+
+    def set_segments(self, segments):
+        self.beginResetModel()
+        self.segments = segments
+        self.timestamped_lines, self.plain_lines = core.render_segments(segments)
+        self.loaded = min(self.BATCH_SIZE, len(self.timestamped_lines))
+        self.endResetModel()
+
+    def set_remove_timestamps(self, remove_timestamps):
+        # Przełączenie podmienia tylko listę źródłową - widok odświeża widoczne wiersze
+        self.remove_timestamps = remove_timestamps
+        if self.loaded:
+            self.dataChanged.emit(self.index(0), self.index(self.loaded - 1))
+
+    def lines(self):
+        return self.plain_lines if self.remove_timestamps else self.timestamped_lines
+
+    def text(self):
+        return "\n".join(self.lines())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.lines()[index.row()]
+        return None
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loaded < len(self.timestamped_lines)
+
+    def fetchMore(self, parent):
+        count = min(self.BATCH_SIZE, len(self.timestamped_lines) - self.loaded)
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
 class YouTubeTranscriptApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -144,9 +258,19 @@ class YouTubeTranscriptApp(QMainWindow):
 
     def initialize_data(self):
         self.current_transcript = None
-        self.modified_transcript_text = ""
         self.video_queue = []
-        self.video_titles = {}
+        # Tytuły znane z poprzednich sesji są od razu dostępne
+        self.title_resolver = TitleResolver()
+        self.video_titles = dict(self.title_resolver.titles)
+        self.transcript_cache = TranscriptCache()
+        self.search_index = SearchIndex()
+        # Pobieranie tytułów i transkrypcji odbywa się w tle, w ograniczonej puli zadań
+        self.tasks = TaskPool(4)
+        # Wstępne pobieranie po dodaniu do kolejki ma własny, mniejszy limit równoległości
+        self.prefetch_tasks = TaskPool(2)
+        self.prefetched_transcripts = {}
+        self.transcripts_request = 0
+        self.segments_request = 0
 
     def setup_input_ui(self):
         input_layout = create_standard_layout()
@@ -167,7 +291,11 @@ class YouTubeTranscriptApp(QMainWindow):
         self.layout.addLayout(input_layout)
 
     def setup_queue_ui(self):
-        self.video_queue_list = QListWidget()
+        self.video_queue_model = VideoQueueModel(self)
+        self.video_queue_list = PlaceholderListView("Brak filmów w kolejce")
+        self.video_queue_list.setModel(self.video_queue_model)
+        self.video_queue_list.setItemDelegate(VideoItemDelegate(self.video_queue_list))
+        self.video_queue_list.setUniformItemSizes(True)
         self.video_queue_list.setFixedHeight(150)
         set_widget_style(self.video_queue_list, font_size=10)
 
@@ -195,8 +323,7 @@ class YouTubeTranscriptApp(QMainWindow):
         """
         self.video_queue_list.verticalScrollBar().setStyleSheet(scrollbar_style)
 
-        self.video_queue_list.addItem("Brak filmów w kolejce")
-        self.video_queue_list.itemClicked.connect(self.handle_item_click)
+        self.video_queue_list.clicked.connect(self.handle_item_click)
         self.layout.addWidget(self.video_queue_list)
 
     def setup_transcript_ui(self):
@@ -264,11 +391,16 @@ class YouTubeTranscriptApp(QMainWindow):
         self.transcripts_list.currentIndexChanged.connect(self.display_transcript)
         self.layout.addWidget(self.transcripts_list)
 
-        self.transcript_viewer = QTextEdit()
+        # Widok wirtualizowany: rysowane są tylko widoczne wiersze, więc długość transkrypcji nie ma znaczenia
+        self.transcript_model = TranscriptLinesModel(self)
+        self.transcript_viewer = QListView()
+        self.transcript_viewer.setModel(self.transcript_model)
+        self.transcript_viewer.setUniformItemSizes(True)
+        self.transcript_viewer.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.transcript_viewer.setFixedHeight(300)
-        self.transcript_viewer.setPlaceholderText("Brak treści transkrypcji")
-        self.transcript_viewer.setReadOnly(True)
         set_widget_style(self.transcript_viewer, font_size=10, border='none')
+        copy_shortcut = QShortcut(QKeySequence.StandardKey.Copy, self.transcript_viewer)
+        copy_shortcut.activated.connect(self.copy_selected_lines)
 
         scrollbar_style = """
             QScrollBar:vertical {
@@ -335,11 +467,19 @@ class YouTubeTranscriptApp(QMainWindow):
         self.save_json_button.clicked.connect(lambda: self.save_transcript(FileType.JSON))
         self.save_txt_button = StyledButton("Zapisz jako TXT")
         self.save_txt_button.clicked.connect(lambda: self.save_transcript(FileType.TXT))
+        self.save_srt_button = StyledButton("Zapisz jako SRT")
+        self.save_srt_button.clicked.connect(lambda: self.save_transcript(FileType.SRT))
+        self.save_vtt_button = StyledButton("Zapisz jako VTT")
+        self.save_vtt_button.clicked.connect(lambda: self.save_transcript(FileType.VTT))
 
         # Dodaj przyciski do layoutu i ustaw rozciąganie, aby wypełnić szerokość
         save_buttons_layout.addWidget(self.save_json_button)
         save_buttons_layout.addSpacing(5)  # Ustaw odstęp między przyciskami
         save_buttons_layout.addWidget(self.save_txt_button)
+        save_buttons_layout.addSpacing(5)
+        save_buttons_layout.addWidget(self.save_srt_button)
+        save_buttons_layout.addSpacing(5)
+        save_buttons_layout.addWidget(self.save_vtt_button)
 
         self.layout.addLayout(save_buttons_layout)
 
@@ -365,49 +505,97 @@ class YouTubeTranscriptApp(QMainWindow):
             self.display_message("Nieprawidłowy link do filmu. Podaj link do filmu YouTube.", error=True)
             return
 
-        video_title = self.video_titles.get(video_id) or self.get_video_title(video_url) or "Nieznany tytuł"
-        self.video_titles[video_id] = video_title
-
-        if self.video_queue_list.count() == 1 and self.video_queue_list.item(0).text() == "Brak filmów w kolejce":
-            self.video_queue_list.clear()
-
-        widget = create_video_widget(video_title, video_url)
-        item = QListWidgetItem()
-        item.setSizeHint(widget.sizeHint())
-        self.video_queue_list.addItem(item)
-        self.video_queue_list.setItemWidget(item, widget)
+        # Element trafia do kolejki od razu, a tytuł i transkrypcje są pobierane wstępnie w tle
+        video_title = self.video_titles.get(video_id)
+        self.video_queue_model.add_videos([(video_id, video_title or "Pobieranie tytułu...", video_url)])
+        if video_id not in self.prefetched_transcripts:
+            self.prefetch_tasks.start(self.prefetch_video, video_id, video_url, not video_title,
+                                      on_progress=lambda title: self.on_title_resolved(video_id, video_url, title),
+                                      on_result=lambda transcripts: self.on_video_prefetched(video_id, transcripts))
 
-        item.setData(Qt.ItemDataRole.UserRole, video_id)
         self.video_queue.append(video_id)
         self.url_input.clear()
         self.display_message("Film dodany do kolejki")
 
-    def handle_item_click(self, item):
-        video_id = item.data(Qt.ItemDataRole.UserRole)
+    def prefetch_video(self, worker, video_id, video_url, resolve_title):
+        # Wątek w tle: tytuł, lista transkrypcji i treść najbardziej prawdopodobnej transkrypcji
+        title = self.get_video_title(video_url)
+        if resolve_title:
+            worker.report(title)
+        if title:
+            # Tytuł trafia do indeksu wyszukiwania razem z segmentami transkrypcji
+            self.search_index.set_titles({video_id: title})
+        try:
+            transcripts = transcript_probe.list_transcripts(video_id)
+        except Exception:
+            return None
+        transcript = core.preferred_transcript(transcripts)
+        if transcript is not None and not worker.cancelled:
+            try:
+                core.fetch_segments(transcript, self.transcript_cache, self.search_index)
+            except Exception:
+                pass
+        return transcripts
+
+    def on_video_prefetched(self, video_id, transcripts):
+        if transcripts is not None:
+            self.prefetched_transcripts[video_id] = transcripts
+
+    def on_title_resolved(self, video_id, video_url, title):
+        video_title = title or "Nieznany tytuł"
+        self.video_titles[video_id] = video_title
+        self.video_queue_model.set_title(video_id, video_title)
+
+    def handle_item_click(self, index):
+        video_id = index.data(Qt.ItemDataRole.UserRole)
         if video_id:
             self.fetch_transcripts_from_queue(video_id)
 
     def fetch_transcripts_from_queue(self, video_id):
         if not video_id:
             return
-        try:
-            self.status_bar.showMessage("Pobieranie transkrypcji...", 2000)
-            transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
-            self.populate_transcripts_list(transcripts)
-            self.status_bar.showMessage("Transkrypcje pobrane", 5000)
-        except (VideoUnavailable, NoTranscriptFound, TranscriptsDisabled) as e:
+        # Wyniki wcześniejszych, nieaktualnych już zapytań są ignorowane
+        self.transcripts_request += 1
+        request = self.transcripts_request
+        if video_id in self.prefetched_transcripts:
+            self.on_transcripts_listed(request, self.prefetched_transcripts[video_id])
+            return
+        self.status_bar.showMessage("Pobieranie transkrypcji...", 2000)
+        self.tasks.start(lambda worker: transcript_probe.list_transcripts(video_id),
+                         on_result=lambda transcripts: self.on_transcripts_listed(request, transcripts),
+                         on_error=lambda e: self.on_transcripts_error(request, e))
+
+    def on_transcripts_listed(self, request, transcripts):
+        if request != self.transcripts_request:
+            return
+        self.populate_transcripts_list(transcripts)
+        self.status_bar.showMessage("Transkrypcje pobrane", 5000)
+
+    def on_transcripts_error(self, request, e):
+        if request != self.transcripts_request:
+            return
+        from youtube_transcript_api._errors import NoTranscriptFound, TranscriptsDisabled, VideoUnavailable
+
+        if isinstance(e, (VideoUnavailable, NoTranscriptFound, TranscriptsDisabled)):
             self.display_message(f"Błąd: {str(e)}", error=True)
-        except Exception as e:
+        else:
             self.display_message(f"Nieoczekiwany błąd: {str(e)}", error=True)
 
     def populate_transcripts_list(self, transcripts):
+        # Sygnały są blokowane, aby wyświetlić tylko wybraną transkrypcję, a nie każdą dodawaną pozycję
+        preferred = core.preferred_transcript(transcripts)
+        self.transcripts_list.blockSignals(True)
         self.transcripts_list.clear()
         for transcript in transcripts:
             lang = transcript.language
             lang_code = transcript.language_code
             self.transcripts_list.addItem(f"{lang} ({lang_code})", userData=transcript)
+            if transcript is preferred:
+                self.transcripts_list.setCurrentIndex(self.transcripts_list.count() - 1)
         if self.transcripts_list.count() == 0:
             self.transcripts_list.addItem("Brak dostępnych transkrypcji")
+        self.transcripts_list.blockSignals(False)
+        self.display_transcript()
 
     def display_message(self, message, error=False):
         if error:
@@ -416,38 +604,23 @@ class YouTubeTranscriptApp(QMainWindow):
 
     @staticmethod
     def extract_video_id(url):
-        match = re.search(r'(?:v=|youtu\.be/|embed/|v/|watch\?v=|&v=)([\w-]{11})', url)
-        return match.group(1) if match else None
+        return core.extract_video_id(url)
 
     def get_video_title(self, url):
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                title_match = re.search(r'<title>(.*?)</title>', response.text, re.IGNORECASE)
-                return title_match.group(1).replace(" - YouTube", "").strip() if title_match else None
-        except requests.RequestException:
-            return None
+        # oEmbed lub strumieniowo czytany początek strony, z trwałą pamięcią podręczną tytułów
+        return self.title_resolver.resolve(self.extract_video_id(url), url)
 
     def update_transcript_viewer(self):
         if not self.current_transcript:
             return
 
-        transcript_lines = [
-            f"[{segment['start']:.2f}] {segment['text']}"
-            for segment in self.current_transcript
-        ]
-
-        if self.remove_timestamps_checkbox.isChecked():
-            cleaned_lines = [
-                re.sub(r'\[\d+\.\d{2}\]', '', line).strip()
-                for line in transcript_lines
-            ]
-            self.modified_transcript_text = "\n".join(cleaned_lines)
-        else:
-            self.modified_transcript_text = "\n".join(transcript_lines)
+        self.transcript_model.set_remove_timestamps(self.remove_timestamps_checkbox.isChecked())
+        self.status_bar.showMessage(f"Transkrypcja wyświetlona. {metrics.summary()}", 5000)
 
-        self.transcript_viewer.setText(self.modified_transcript_text)
-        self.status_bar.showMessage("Transkrypcja wyświetlona", 3000)
+    def copy_selected_lines(self):
+        rows = sorted(index.row() for index in self.transcript_viewer.selectionModel().selectedIndexes())
+        lines = self.transcript_model.lines()
+        QApplication.clipboard().setText("\n".join(lines[row] for row in rows))
 
     def display_transcript(self):
         if self.transcripts_list.currentText() == "Brak dostępnych transkrypcji":
@@ -457,42 +630,64 @@ class YouTubeTranscriptApp(QMainWindow):
         if not transcript:
             return
 
-        try:
-            segments = transcript.fetch()
-            self.current_transcript = segments
-            self.update_transcript_viewer()
-            self.status_bar.showMessage("Transkrypcja wyświetlona", 3000)
-        except Exception as e:
+        # Najpierw sprawdź trwałą pamięć podręczną (np. wypełnioną przez pobieranie wstępne),
+        # dopiero potem pobieraj z sieci w tle
+        self.segments_request += 1
+        request = self.segments_request
+        cached = self.transcript_cache.get(transcript.video_id,
+                                           language_key(transcript.language_code, transcript.is_generated))
+        if cached is not None:
+            self.on_segments_fetched(request, cached[0])
+            return
+        self.tasks.start(lambda worker: core.fetch_segments(transcript, self.transcript_cache, self.search_index),
+                         on_result=lambda segments: self.on_segments_fetched(request, segments),
+                         on_error=lambda e: self.on_segments_error(request, e))
+
+    def on_segments_fetched(self, request, segments):
+        if request != self.segments_request:
+            return
+        self.current_transcript = segments
+        self.transcript_model.set_segments(segments)
+        self.update_transcript_viewer()
+        self.status_bar.showMessage(f"Transkrypcja wyświetlona. {metrics.summary()}", 5000)
+
+    def on_segments_error(self, request, e):
+        if request == self.segments_request:
             self.display_message(f"Nie udało się pobrać transkrypcji: {str(e)}", error=True)
 
+    def closeEvent(self, event):
+        self.tasks.cancel_all()
+        self.prefetch_tasks.cancel_all()
+        self.title_resolver.flush()
+        super().closeEvent(event)
+
     def save_transcript(self, file_type: FileType | None) -> None:
-        if not self.modified_transcript_text:
+        if not self.current_transcript:
             self.display_message("Brak transkrypcji do zapisania.", error=True)
             return
 
         try:
             if file_type == FileType.JSON:
-                file_path, _ = QFileDialog.getSaveFileName(self, "Zapisz jako JSON", re.sub(r'[\\/:*?"<>|]', '',
-                                                                                            self.video_titles.get(
-                                                                                                self.video_queue[-1],
-                                                                                                'transcript')) + ".json",
-                                                           "Pliki JSON (*.json)")
-                if not file_path:
-                    return
-
-                with open(file_path, "w", encoding="utf-8") as file:
-                    json.dump(self.modified_transcript_text.split("\n"), file, indent=4, ensure_ascii=False)
-            elif file_type == FileType.TXT:
-                file_path, _ = QFileDialog.getSaveFileName(self, "Zapisz jako TXT", re.sub(r'[\\/:*?"<>|]', '',
-                                                                                           self.video_titles.get(
-                                                                                               self.video_queue[-1],
-                                                                                               'transcript')) + ".txt",
-                                                           "Pliki tekstowe (*.txt)")
-                if not file_path:
-                    return
-
-                with open(file_path, "w", encoding="utf-8") as file:
-                    file.write(self.modified_transcript_text)
+                caption, file_filter = "Zapisz jako JSON", "Pliki JSON (*.json)"
+            elif file_type == FileType.SRT:
+                caption, file_filter = "Zapisz jako SRT", "Napisy SRT (*.srt)"
+            elif file_type == FileType.VTT:
+                caption, file_filter = "Zapisz jako VTT", "Napisy WebVTT (*.vtt)"
+            else:
+                caption, file_filter = "Zapisz jako TXT", "Pliki tekstowe (*.txt)"
+            suggested_name = core.sanitize_filename(self.video_titles.get(self.video_queue[-1], 'transcript'))
+            file_path, _ = QFileDialog.getSaveFileName(self, caption, f"{suggested_name}.{file_type.value}",
+                                                       file_filter)
+            if not file_path:
+                return
+
+            if file_type in (FileType.SRT, FileType.VTT):
+                # Napisy powstają wprost z segmentów, z czasem startu i długością każdego z nich
+                with open(file_path, "w", encoding="utf-8", newline="\n") as file:
+                    formatters.write_segments(self.transcript_model.segments, {file_type.value: file})
+            else:
+                # Tekst do zapisu jest składany dopiero przy zapisie, z bieżącej wersji linii
+                core.write_transcript(file_path, self.transcript_model.text(), file_type)
 
             self.display_message(f"Transkrypcja zapisana jako {file_type.value.upper()}.")
         except Exception as e:
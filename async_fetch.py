@@ -0,0 +1,504 @@
+"""
+Asynchroniczne pobieranie transkrypcji dla dużych zadań (dziesiątki tysięcy filmów): strona filmu
+z listą ścieżek napisów i treść transkrypcji (XML timedtext) są pobierane na nieblokujących
+połączeniach asyncio w jednym wątku, zamiast jednego blokującego wywołania youtube_transcript_api
+na film w puli wątków.
+
+- globalny limit filmów w toku (concurrency) i limit połączeń do jednego hosta (per_host),
+- połączenia keep-alive wielokrotnego użytku, odpowiedzi gzip i chunked,
+- strona filmu jest przeglądana strumieniowo: zatrzymywany jest tylko fragment z JSON-em "captions",
+- XML transkrypcji jest parsowany przyrostowo (XMLPullParser) w trakcie odbierania.
+
+Wybór ścieżki (najpierw ręczna, potem automatyczna w kolejności języków) i segmenty
+({"text", "start", "duration"}) są takie same jak w core.download_transcript.
+Ścieżka zapasowa przez pytube jest dostępna tylko w pobieraniu synchronicznym.
+"""
+import asyncio
+import codecs
+import html
+import json
+import re
+import ssl
+import time
+import zlib
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import XMLPullParser
+
+import metrics
+from core import DEFAULT_LANGUAGES
+from titles import WATCH_URL
+from transcript_cache import language_key, preferred_keys, select_language
+
+# Filmy przetwarzane jednocześnie
+DEFAULT_CONCURRENCY = 200
+# Otwarte połączenia do jednego hosta
+DEFAULT_PER_HOST = 32
+# Limit czasu jednego zapytania w sekundach
+DEFAULT_TIMEOUT = 20
+DEFAULT_RETRIES = 2
+MAX_REDIRECTS = 5
+CHUNK_SIZE = 64 * 1024
+# Liczba transkrypcji zapisywanych do pamięci podręcznej w jednej transakcji
+CACHE_BATCH = 200
+
+CAPTIONS_MARKER = '"captions":'
+CAPTIONS_END = ',"videoDetails'
+CONSENT_MARKER = 'action="https://consent.youtube.com/s"'
+RECAPTCHA_MARKER = 'class="g-recaptcha"'
+PLAYABILITY_MARKER = '"playabilityStatus":'
+# Znaczniki mogą być podzielone między kolejne porcje strony
+MARKER_OVERLAP = max(len(CAPTIONS_MARKER), len(CONSENT_MARKER), len(RECAPTCHA_MARKER), len(PLAYABILITY_MARKER))
+HTML_TAG = re.compile(r"<[^>]*>", re.IGNORECASE)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    # Film nie ma transkrypcji w wybranych językach albo YouTube odmówił odpowiedzi
+    def __init__(self, video_id, reason):
+        super().__init__(f"{video_id}: {reason}")
+        self.video_id = video_id
+        self.reason = reason
+
+
+class _RetryableError(Exception):
+    pass
+
+
+class _Response:
+    # Odpowiedź HTTP/1.1 czytana porcjami: Content-Length, chunked albo do zamknięcia połączenia
+    def __init__(self, reader, status, headers):
+        self.status = status
+        self.headers = headers
+        self._reader = reader
+        self.complete = False
+        self.keep_alive = headers.get("connection", "").lower() != "close"
+        self._chunked = "chunked" in headers.get("transfer-encoding", "").lower()
+        length = headers.get("content-length")
+        self._remaining = int(length) if length is not None and not self._chunked else None
+        if self._remaining is None and not self._chunked:
+            self.keep_alive = False
+
+    async def raw_chunks(self):
+        reader = self._reader
+        if self._chunked:
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # Opcjonalne nagłówki końcowe aż do pustego wiersza
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                yield await reader.readexactly(size)
+                await reader.readexactly(2)
+        elif self._remaining is not None:
+            while self._remaining:
+                data = await reader.read(min(CHUNK_SIZE, self._remaining))
+                if not data:
+                    raise asyncio.IncompleteReadError(b"", self._remaining)
+                self._remaining -= len(data)
+                yield data
+        else:
+            while data := await reader.read(CHUNK_SIZE):
+                yield data
+        self.complete = True
+
+    async def chunks(self):
+        # Treść po rozpakowaniu gzip/deflate
+        encoding = self.headers.get("content-encoding", "").lower()
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS) \
+            if encoding in ("gzip", "deflate") else None
+        async for data in self.raw_chunks():
+            if decompressor is not None:
+                data = decompressor.decompress(data)
+            if data:
+                yield data
+        if decompressor is not None and (tail := decompressor.flush()):
+            yield tail
+
+    async def text_chunks(self):
+        decoder = codecs.getincrementaldecoder(_charset(self.headers))(errors="replace")
+        async for data in self.chunks():
+            if text := decoder.decode(data):
+                yield text
+        if tail := decoder.decode(b"", final=True):
+            yield tail
+
+    async def drain(self):
+        # Dokończ odczyt, aby połączenie mogło obsłużyć kolejne zapytanie
+        if not self.complete:
+            async for _ in self.raw_chunks():
+                pass
+
+
+def _charset(headers):
+    match = re.search(r"charset=([\w-]+)", headers.get("content-type", ""), re.IGNORECASE)
+    try:
+        return codecs.lookup(match.group(1)).name if match else "utf-8"
+    except LookupError:
+        return "utf-8"
+
+
+class _HostPool:
+    # Połączenia keep-alive do jednego hosta; semafor ogranicza liczbę jednocześnie używanych połączeń
+    def __init__(self, limit):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.idle = []
+
+
+class _CaptionsScanner:
+    """
+    Przegląda stronę filmu porcjami i zatrzymuje tylko tekst od '"captions":' do ',"videoDetails'
+    (ten sam fragment, który wycina youtube_transcript_api z całej strony). Dla pozostałej części
+    strony zapamiętywane są tylko znaczniki potrzebne do rozpoznania przyczyny braku napisów.
+    """
+
+    def __init__(self):
+        self.markers = set()
+        self.consent_page = []
+        self.done = False
+        self._captions = None
+        self._tail = ""
+
+    @property
+    def found(self):
+        return self._captions is not None
+
+    def feed(self, text):
+        if self._captions is not None:
+            self._captions.append(text)
+            self._check_end(len(text) + len(CAPTIONS_END))
+            return
+        buffer = self._tail + text
+        for marker in (CONSENT_MARKER, RECAPTCHA_MARKER, PLAYABILITY_MARKER):
+            if marker not in self.markers and marker in buffer:
+                self.markers.add(marker)
+        if CONSENT_MARKER in self.markers:
+            self.consent_page.append(text)
+        index = buffer.find(CAPTIONS_MARKER)
+        if index >= 0:
+            self._captions = [buffer[index + len(CAPTIONS_MARKER):]]
+            self._check_end(len(self._captions[0]))
+        else:
+            self._tail = buffer[-MARKER_OVERLAP:]
+
+    def _check_end(self, window):
+        # Szukaj końca fragmentu tylko w ostatniej porcji (z zakładką na znacznik podzielony między porcje)
+        if len(self._captions) > 1:
+            self._captions = ["".join(self._captions)]
+        if CAPTIONS_END in self._captions[0][-window:]:
+            self.done = True
+
+    def captions_json(self, video_id):
+        # Odpowiednik TranscriptListFetcher._extract_captions_json
+        if self._captions is None:
+            if RECAPTCHA_MARKER in self.markers:
+                raise FetchError(video_id, "YouTube wymaga rozwiązania captcha (zbyt wiele zapytań)")
+            if PLAYABILITY_MARKER not in self.markers:
+                raise FetchError(video_id, "film jest niedostępny")
+            raise FetchError(video_id, "napisy są wyłączone")
+        text = html.unescape("".join(self._captions))
+        captions = json.loads(text.split(CAPTIONS_END)[0].replace("\n", "")).get("playerCaptionsTracklistRenderer")
+        if captions is None:
+            raise FetchError(video_id, "napisy są wyłączone")
+        if "captionTracks" not in captions:
+            raise FetchError(video_id, "brak dostępnych transkrypcji")
+        return captions
+
+
+def select_track(captions, languages):
+    # (klucz języka, adres) wybrane tak samo jak w core.select_transcript
+    tracks = {language_key(track["languageCode"], track.get("kind", "") == "asr"): track
+              for track in captions["captionTracks"]}
+    key = select_language(tracks, languages)
+    return (key, tracks[key]["baseUrl"]) if key is not None else None
+
+
+def _parse_segments(parser, state, segments):
+    # Zdarzenia XMLPullParser: segmenty to bezpośrednie dzieci elementu głównego (<transcript><text ...>)
+    for event, element in parser.read_events():
+        if event == "start":
+            if state["depth"] == 0:
+                state["root"] = element
+            state["depth"] += 1
+            continue
+        state["depth"] -= 1
+        if state["depth"] != 1:
+            continue
+        if element.text is not None:
+            segments.append({
+                "text": HTML_TAG.sub("", html.unescape(element.text)),
+                "start": float(element.attrib["start"]),
+                "duration": float(element.attrib.get("dur", "0.0")),
+            })
+        # Przetworzone elementy nie są trzymane w drzewie
+        state["root"].remove(element)
+
+
+class AsyncTranscriptFetcher:
+    """
+    Pobieranie transkrypcji na asyncio. `resolve` przekierowuje hosty, np. do serwera testowego:
+    {"www.youtube.com": ("127.0.0.1", 8080, False)} - (adres, port, TLS).
+    `on_request(sekundy)` jest wywoływane po każdym zapytaniu HTTP.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, resolve=None, on_request=None):
+        self.concurrency = max(1, int(concurrency))
+        self.per_host = max(1, int(per_host))
+        self.timeout = timeout
+        self.retries = retries
+        self.resolve = resolve or {}
+        self.on_request = on_request
+        self.cookies = {}
+        self._pools = {}
+        self._ssl_context = None
+
+    def _pool(self, key):
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _HostPool(self.per_host)
+        return pool
+
+    async def _connect(self, host, port, tls):
+        if tls and self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        metrics.count("async_connections", host=host)
+        return await asyncio.open_connection(host, port, ssl=self._ssl_context if tls else None,
+                                             server_hostname=host if tls else None, limit=CHUNK_SIZE)
+
+    @asynccontextmanager
+    async def _get(self, url):
+        # Odpowiedź na GET z obsługą przekierowań; połączenie wraca do puli po odczytaniu całej treści
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            host = parts.hostname
+            tls = parts.scheme == "https"
+            address, port, tls = self.resolve.get(host, (host, parts.port or (443 if tls else 80), tls))
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            headers = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Accept-Language: en-US",
+                       "Accept-Encoding: gzip, deflate", "Connection: keep-alive"]
+            if self.cookies and host.endswith("youtube.com"):
+                headers.append("Cookie: " + "; ".join(f"{name}={value}" for name, value in self.cookies.items()))
+            request = ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1")
+
+            pool = self._pool((address, port, tls))
+            # Limit czasu liczony od uzyskania połączenia, nie od wejścia do kolejki
+            async with pool.semaphore, asyncio.timeout(self.timeout):
+                started = time.perf_counter()
+                connection, response = await self._send(pool, address, port, tls, request)
+                reader, writer = connection
+                try:
+                    if response.status in (301, 302, 303, 307, 308) and "location" in response.headers:
+                        await response.drain()
+                        url = response.headers["location"]
+                        if url.startswith("/"):
+                            url = f"{parts.scheme}://{parts.netloc}{url}"
+                        continue
+                    try:
+                        yield response
+                        await response.drain()
+                    finally:
+                        self._record(host, response, time.perf_counter() - started)
+                    return
+                finally:
+                    if response.complete and response.keep_alive and not writer.is_closing():
+                        pool.idle.append(connection)
+                    else:
+                        writer.close()
+        raise FetchError(url, "zbyt wiele przekierowań")
+
+    async def _send(self, pool, address, port, tls, request):
+        # Najpierw połączenie z puli; zamknięte przez serwer połączenie keep-alive jest zastępowane nowym
+        while True:
+            reused = bool(pool.idle)
+            reader, writer = pool.idle.pop() if reused else await self._connect(address, port, tls)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status_line = await reader.readline()
+                if not status_line:
+                    raise ConnectionResetError("połączenie zamknięte przez serwer")
+                status = int(status_line.split()[1])
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                return (reader, writer), _Response(reader, status, headers)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if not reused:
+                    raise
+
+    def _record(self, host, response, seconds):
+        metrics.count("async_requests", host=host, status=response.status)
+        metrics.observe("async_request", seconds, host=host)
+        if self.on_request:
+            self.on_request(seconds)
+
+    async def _retrying(self, operation, *args):
+        # Ponawianie przy błędach połączenia, przekroczonym czasie i odpowiedziach 429/5xx
+        delay = 0.5
+        for attempt in range(self.retries + 1):
+            try:
+                return await operation(*args)
+            except (_RetryableError, ConnectionError, asyncio.IncompleteReadError, TimeoutError, OSError):
+                if attempt == self.retries:
+                    raise
+                metrics.count("async_retries")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _captions_json(self, video_id):
+        scanner = _CaptionsScanner()
+        # Ciasteczko wysłane z tym zapytaniem - inne zadanie mogło je ustawić w międzyczasie
+        sent_consent = self.cookies.get("CONSENT")
+        async with self._get(WATCH_URL.format(video_id=video_id)) as response:
+            self._check_status(response, video_id)
+            async for text in response.text_chunks():
+                if not scanner.done:
+                    scanner.feed(text)
+        if CONSENT_MARKER in scanner.markers and not scanner.found:
+            # Strona zgody na cookies - ustaw ciasteczko CONSENT i pobierz stronę ponownie. Błąd tylko wtedy,
+            # gdy strona zgody wróciła mimo wysłanego ciasteczka
+            if sent_consent is not None:
+                raise FetchError(video_id, "nie udało się zaakceptować zgody na cookies")
+            if "CONSENT" not in self.cookies:
+                match = re.search('name="v" value="(.*?)"', "".join(scanner.consent_page))
+                if match is None:
+                    raise FetchError(video_id, "nie udało się zaakceptować zgody na cookies")
+                self.cookies["CONSENT"] = "YES+" + match.group(1)
+            return await self._captions_json(video_id)
+        return scanner.captions_json(video_id)
+
+    async def _segments(self, video_id, url):
+        parser = XMLPullParser(events=("start", "end"))
+        state = {"depth": 0, "root": None}
+        segments = []
+        async with self._get(url) as response:
+            self._check_status(response, video_id)
+            async for data in response.chunks():
+                parser.feed(data)
+                _parse_segments(parser, state, segments)
+        parser.close()
+        _parse_segments(parser, state, segments)
+        return segments
+
+    @staticmethod
+    def _check_status(response, video_id):
+        if response.status in RETRY_STATUSES:
+            raise _RetryableError(f"{video_id}: HTTP {response.status}")
+        if response.status >= 400:
+            raise FetchError(video_id, f"HTTP {response.status}")
+
+    async def fetch(self, video_id, languages=DEFAULT_LANGUAGES):
+        # (język, segmenty) transkrypcji filmu; FetchError, jeśli nie ma jej w żadnym z języków
+        with metrics.timer("async_fetch"):
+            captions = await self._retrying(self._captions_json, video_id)
+            track = select_track(captions, languages)
+            if track is None:
+                raise FetchError(video_id, f"brak transkrypcji w językach: {', '.join(languages)}")
+            language, url = track
+            return language, await self._retrying(self._segments, video_id, url)
+
+    async def fetch_many(self, video_ids, languages=DEFAULT_LANGUAGES, on_result=None):
+        """
+        Pobierz transkrypcje wielu filmów; najwyżej `concurrency` filmów jest w toku naraz.
+        on_result(video_id, wynik, błąd) jest wywoływane po każdym filmie w pętli zdarzeń.
+        Zwraca słownik {video_id: (język, segmenty)} dla udanych pobrań, chyba że podano on_result.
+        """
+        results = {}
+        video_ids = iter(video_ids)
+
+        async def worker():
+            for video_id in video_ids:
+                try:
+                    result, error = await self.fetch(video_id, languages), None
+                except Exception as e:
+                    result, error = None, e
+                    metrics.count("async_failures")
+                if on_result:
+                    await on_result(video_id, result, error)
+                elif result is not None:
+                    results[video_id] = result
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return results
+
+    async def close(self):
+        for pool in self._pools.values():
+            for _, writer in pool.idle:
+                writer.close()
+            pool.idle.clear()
+
+
+def prefetch(video_ids, cache, languages=DEFAULT_LANGUAGES, settings=None, index=None, on_progress=None,
+             resolve=None, on_request=None):
+    """
+    Pobierz brakujące transkrypcje do pamięci podręcznej (i indeksu) silnikiem asynchronicznym.
+    Dalszy eksport korzysta już z pamięci podręcznej; filmy, których tu nie udało się pobrać,
+    zostaną ponowione zwykłą ścieżką (z pytube). Zwraca listę ID filmów bez transkrypcji.
+    """
+    settings = settings or {}
+    keys = preferred_keys(languages)
+    missing = [video_id for video_id in video_ids if cache.find(video_id, keys) is None]
+    fetcher = AsyncTranscriptFetcher(concurrency=settings.get("async_concurrency", DEFAULT_CONCURRENCY),
+                                     per_host=settings.get("async_per_host", DEFAULT_PER_HOST),
+                                     timeout=settings.get("http_timeout", DEFAULT_TIMEOUT),
+                                     retries=settings.get("http_retries", DEFAULT_RETRIES),
+                                     resolve=resolve, on_request=on_request)
+    failed = []
+    done = 0
+
+    def store(batch):
+        # Zapis do SQLite w osobnym wątku, aby nie wstrzymywać pętli zdarzeń
+        cache.put_many((video_id, language, segments, "\n".join(segment["text"] for segment in segments))
+                       for video_id, language, segments in batch)
+        if index is not None:
+            with metrics.timer("index_add"):
+                for video_id, language, segments in batch:
+                    if segments:
+                        index.add(video_id, language, segments)
+
+    async def run():
+        from concurrent.futures import ThreadPoolExecutor
+
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache") as writer:
+            pending = set()
+            batch = []
+
+            def flush():
+                future = asyncio.ensure_future(loop.run_in_executor(writer, store, batch.copy()))
+                pending.add(future)
+                future.add_done_callback(pending.discard)
+                batch.clear()
+
+            async def on_result(video_id, result, error):
+                nonlocal done
+                done += 1
+                if error is not None:
+                    failed.append(video_id)
+                    if on_progress:
+                        on_progress(f"Nie udało się pobrać transkrypcji dla wideo {video_id}: {error}")
+                else:
+                    batch.append((video_id, *result))
+                    if len(batch) >= CACHE_BATCH:
+                        flush()
+                if on_progress and done % 100 == 0:
+                    on_progress(f"Pobrano {done} z {len(missing)} transkrypcji")
+
+            try:
+                await fetcher.fetch_many(missing, languages, on_result=on_result)
+            finally:
+                await fetcher.close()
+                if batch:
+                    flush()
+                if pending:
+                    await asyncio.gather(*pending)
+
+    if missing:
+        asyncio.run(run())
+    return failed
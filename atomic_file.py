@@ -0,0 +1,27 @@
+"""
+Atomowy zapis plików: dane trafiają do pliku tymczasowego obok docelowego, a plik docelowy jest
+podmieniany (os.replace) dopiero po pełnym zapisie. Przerwany zapis nie uszkadza poprzedniej wersji
+pliku i nie zostawia pod docelową nazwą pliku uciętego.
+"""
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_open(path, mode="w"):
+    # Plik do zapisu strumieniowego; tryb tekstowy zapisuje w UTF-8
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, mode, encoding=None if "b" in mode else "utf-8") as file:
+            yield file
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+def atomic_write(path, data):
+    # Zapisz cały tekst albo bajty naraz
+    with atomic_open(path, "wb" if isinstance(data, (bytes, bytearray)) else "w") as file:
+        file.write(data)
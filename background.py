@@ -0,0 +1,80 @@
+"""
+Zadania w tle dla obu interfejsów (PyQt5 w main.py, PyQt6 w YTScript.py) oparte na QThreadPool.
+Moduł używa tego wiązania Qt, które zostało już zaimportowane przez aplikację.
+"""
+import sys
+import threading
+
+if "PyQt6" in sys.modules:
+    from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+else:
+    from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class WorkerSignals(QObject):
+    progress = pyqtSignal(object)
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """
+    Uruchamia fn(worker, *args, **kwargs) w puli wątków. Funkcja raportuje postęp przez
+    worker.report(...) i powinna regularnie sprawdzać worker.cancelled.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report(self, value):
+        self.signals.progress.emit(value)
+
+    def run(self):
+        try:
+            result = self.fn(self, *self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.error.emit(e)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class TaskPool:
+    # Ograniczona pula zadań w tle; przechowuje referencje do aktywnych zadań, aby można je było anulować
+    def __init__(self, max_jobs=4):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max(1, int(max_jobs)))
+        self.active = set()
+
+    def start(self, fn, *args, on_result=None, on_progress=None, on_error=None, on_finished=None, **kwargs):
+        worker = Worker(fn, *args, **kwargs)
+        if on_result:
+            worker.signals.result.connect(on_result)
+        if on_progress:
+            worker.signals.progress.connect(on_progress)
+        if on_error:
+            worker.signals.error.connect(on_error)
+        if on_finished:
+            worker.signals.finished.connect(on_finished)
+        worker.signals.finished.connect(lambda: self.active.discard(worker))
+        self.active.add(worker)
+        self.pool.start(worker)
+        return worker
+
+    def cancel_all(self):
+        for worker in list(self.active):
+            worker.cancel()
@@ -0,0 +1,335 @@
+"""
+Testy wydajności YouTubeText na lokalnym zamienniku YouTube (benchmarks/stub_server.py).
+
+Dla każdej skali (liczby filmów na kanale) uruchamiane są scenariusze odpowiadające ścieżkom aplikacji:
+    scan            skanowanie kanału (main.py: fetch_videos -> core.create_scanner / ChannelScanner.scan)
+    download        pobieranie transkrypcji film po filmie (main.py: download_transcription_synchronously)
+    download-hit    to samo przy wypełnionej pamięci podręcznej
+    export-txt      core.export_to_txt (pusta pamięć podręczna)
+    export-json     core.export_to_json (pusta pamięć podręczna)
+    download-async  pobieranie silnikiem asynchronicznym (async_fetch.prefetch) do pustej pamięci podręcznej
+    display         lista transkrypcji, segmenty i renderowanie linii (YTScript.py: display_transcript)
+    service         lokalna usługa (service.py): każdy film zamawia naraz kilku klientów, pobranie jest jedno
+
+Raportowane są: przepustowość (elementy/s), percentyle czasu na element i na zapytanie HTTP
+oraz szczytowe zużycie pamięci (tracemalloc). Serwer działa w osobnym procesie, więc jego
+pamięć i czas procesora nie są wliczane do wyników.
+
+Przykład:
+    python benchmarks/run.py --scales 100 1000 10000 --latency-ms 20 --jitter-ms 10 --error-rate 0.01
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlsplit, urlunsplit
+
+from requests.adapters import HTTPAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import core  # noqa: E402
+import http_client  # noqa: E402
+import metrics  # noqa: E402
+import transcript_probe  # noqa: E402
+from transcript_cache import TranscriptCache  # noqa: E402
+
+SCENARIOS = ["scan", "download", "download-hit", "download-async", "export-txt", "export-json", "display", "service"]
+# Liczba klientów usługi zamawiających ten sam film jednocześnie
+SERVICE_CLIENTS = 4
+# Hosty YouTube przekierowywane do lokalnego serwera
+STUB_HOSTS = ["https://www.youtube.com/", "https://youtube.googleapis.com/"]
+
+
+class RewriteAdapter(HTTPAdapter):
+    # Adapter wspólnej sesji, który wysyła zapytania do serwera testowego i mierzy czas każdego z nich
+    def __init__(self, target, **kwargs):
+        super().__init__(**kwargs)
+        self.target = target
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = urlunsplit(("http", self.target, parts.path, parts.query, ""))
+        started = time.perf_counter()
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            with self._lock:
+                self.latencies.append(time.perf_counter() - started)
+
+    def record(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def take_latencies(self):
+        with self._lock:
+            latencies, self.latencies = self.latencies, []
+        return latencies
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    if len(samples) == 1:
+        return {"p50": samples[0] * 1000, "p90": samples[0] * 1000, "p99": samples[0] * 1000}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49] * 1000, "p90": cuts[89] * 1000, "p99": cuts[98] * 1000}
+
+
+def start_stub(args, videos):
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_server.py"),
+               "--videos", str(videos), "--segments", str(args.segments), "--page-kb", str(args.page_kb),
+               "--no-captions-rate", str(args.no_captions_rate), "--latency-ms", str(args.latency_ms),
+               "--jitter-ms", str(args.jitter_ms), "--error-rate", str(args.error_rate)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    port = int(process.stdout.readline().split()[1])
+    return process, f"127.0.0.1:{port}"
+
+
+def install_adapter(target, pool_size):
+    http_client.configure({"http_pool_size": pool_size})
+    session = http_client.get_session()
+    # Każda skala zaczyna bez zapamiętanych sprawdzeń filmów
+    transcript_probe.configure({})
+    adapter = RewriteAdapter(target, pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    for prefix in STUB_HOSTS:
+        session.mount(prefix, adapter)
+    return adapter
+
+
+class Bench:
+    def __init__(self, args, adapter, settings):
+        self.args = args
+        self.adapter = adapter
+        self.settings = settings
+        # Bez limitu dziennego; ponawianie 429/5xx działa jak w aplikacji
+        self.client = core.build_client("benchmark", core.create_scheduler(
+            {"quota_daily_budget": 10 ** 9, "quota_max_rps": 0}))
+        self.channel = core.fetch_channel_statistics(self.client, "UCbenchmark0000000000000")
+        self.videos = []
+
+    def fresh_cache(self, name):
+        return TranscriptCache(os.path.join(os.getcwd(), f"{name}.sqlite"))
+
+    def measure(self, name, run):
+        # run() zwraca (liczba elementów, lista czasów na element w sekundach)
+        self.adapter.take_latencies()
+        if self.args.tracemalloc:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            count, item_latencies = run()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if self.args.tracemalloc else None
+        if self.args.tracemalloc:
+            tracemalloc.stop()
+        requests = self.adapter.take_latencies()
+        return {
+            "scenario": name,
+            "items": count,
+            "seconds": elapsed,
+            "items_per_second": count / elapsed if elapsed else 0.0,
+            "item_ms": percentiles(item_latencies),
+            "requests": len(requests),
+            "request_ms": percentiles(requests),
+            "peak_mb": peak / (1024 * 1024) if peak is not None else None,
+        }
+
+    def scan(self):
+        scanner = core.create_scanner(self.client, self.channel, self.settings)
+        started = time.perf_counter()
+        arrivals = []
+        self.videos = []
+        for video in scanner.scan():
+            self.videos.append(video)
+            arrivals.append(time.perf_counter() - started)
+        scanner.clear_checkpoint()
+        if scanner.error:
+            raise RuntimeError(f"Skanowanie przerwane: {scanner.error}")
+        # Odstępy między kolejnymi wynikami - tak odczuwa to lista filmów w interfejsie
+        gaps = [later - earlier for earlier, later in zip([0.0] + arrivals, arrivals)]
+        return len(self.videos), gaps
+
+    def available(self):
+        return [(video.video_id, video.publish_date, video.title) for video in self.videos
+                if video.transcript_available]
+
+    def download(self, cache):
+        latencies = []
+        for video_id, _, _ in self.available():
+            started = time.perf_counter()
+            core.download_transcript(video_id, cache)
+            latencies.append(time.perf_counter() - started)
+        return len(latencies), latencies
+
+    def download_async(self):
+        import async_fetch
+
+        # Zapytania silnika asynchronicznego omijają wspólną sesję, więc host jest przekierowany bezpośrednio
+        host, port = self.adapter.target.split(":")
+        video_ids = [video_id for video_id, _, _ in self.available()]
+        started = time.perf_counter()
+        failed = async_fetch.prefetch(video_ids, self.fresh_cache("download-async"), settings=self.settings,
+                                      resolve={"www.youtube.com": (host, int(port), False)},
+                                      on_request=self.adapter.record)
+        elapsed = time.perf_counter() - started
+        count = len(video_ids) - len(failed)
+        # Filmy są pobierane jednocześnie, więc podawany jest średni czas na film
+        return count, [elapsed / count] * count if count else []
+
+    def export(self, export, name):
+        cache = self.fresh_cache(name)
+        output_dir = os.path.join(os.getcwd(), name)
+        latencies = []
+
+        def fetch(video_id):
+            started = time.perf_counter()
+            try:
+                return core.download_transcript(video_id, cache)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        videos = self.available()
+        if export is core.export_to_txt:
+            export(videos, output_dir, fetch, workers=self.settings.get("export_workers", 4))
+        else:
+            export(videos, output_dir, fetch)
+        return len(videos), latencies
+
+    def display(self):
+        cache = self.fresh_cache("display")
+        latencies = []
+        for video_id, _, _ in self.available():
+            started = time.perf_counter()
+            transcripts = transcript_probe.list_transcripts(video_id)
+            transcript = core.preferred_transcript(transcripts)
+            segments = core.fetch_segments(transcript, cache)
+            core.render_segments(segments)
+            latencies.append(time.perf_counter() - started)
+        return len(latencies), latencies
+
+    def service(self):
+        import asyncio
+        import urllib.request
+        from concurrent.futures import ThreadPoolExecutor
+
+        import service
+
+        # Serwer działa we własnej pętli asyncio w wątku w tle, klienci łączą się z nim przez localhost
+        loop = asyncio.new_event_loop()
+        transcript_service = service.TranscriptService(self.fresh_cache("service"),
+                                                       concurrency=self.settings.get("export_workers", 4))
+        server = loop.run_until_complete(service.TranscriptServer(transcript_service, port=0).start())
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        latencies = []
+
+        def request(video_id):
+            started = time.perf_counter()
+            url = f"http://127.0.0.1:{server.port}/transcript/{video_id}?format=srt"
+            with urllib.request.urlopen(url, timeout=60) as response:
+                response.read()
+            latencies.append(time.perf_counter() - started)
+
+        video_ids = [video_id for video_id, _, _ in self.available() for _ in range(SERVICE_CLIENTS)]
+        try:
+            with ThreadPoolExecutor(max_workers=self.settings.get("export_workers", 4) * SERVICE_CLIENTS) as executor:
+                list(executor.map(request, video_ids))
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.run_until_complete(server.close())
+            loop.close()
+        return len(latencies), latencies
+
+    def run(self, scenarios):
+        download_cache = self.fresh_cache("download")
+        runs = {
+            "scan": self.scan,
+            "download": lambda: self.download(download_cache),
+            "download-hit": lambda: self.download(download_cache),
+            "download-async": self.download_async,
+            "export-txt": lambda: self.export(core.export_to_txt, "export-txt"),
+            "export-json": lambda: self.export(core.export_to_json, "export-json"),
+            "display": self.display,
+            "service": self.service,
+        }
+        # Pozostałe scenariusze korzystają z listy filmów zebranej przez skanowanie
+        results = [self.measure("scan", self.scan)]
+        for name in scenarios:
+            if name != "scan":
+                results.append(self.measure(name, runs[name]))
+        return [result for result in results if result["scenario"] in scenarios]
+
+
+def print_table(scale, results):
+    print(f"\n== {scale} filmów ==")
+    print(f"{'scenariusz':<16}{'elem.':>7}{'czas s':>9}{'elem./s':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}"
+          f"{'zapyt.':>8}{'zap. p50':>10}{'zap. p99':>10}{'pamięć MB':>11}")
+    for result in results:
+        item, request = result["item_ms"], result["request_ms"]
+        peak = f"{result['peak_mb']:.1f}" if result["peak_mb"] is not None else "-"
+        print(f"{result['scenario']:<16}{result['items']:>7}{result['seconds']:>9.2f}"
+              f"{result['items_per_second']:>10.1f}"
+              f"{item.get('p50', 0):>9.1f}{item.get('p90', 0):>9.1f}{item.get('p99', 0):>9.1f}"
+              f"{result['requests']:>8}{request.get('p50', 0):>10.1f}{request.get('p99', 0):>10.1f}{peak:>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[100, 1000, 10000], help="liczby filmów na kanale")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--segments", type=int, default=300, help="segmentów na transkrypcję")
+    parser.add_argument("--page-kb", type=int, default=256, help="rozmiar strony filmu w KB")
+    parser.add_argument("--no-captions-rate", type=float, default=0.1)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=8, help="scan_workers i export_workers")
+    parser.add_argument("--mode", choices=["uploads", "search"], default="uploads")
+    parser.add_argument("--no-tracemalloc", dest="tracemalloc", action="store_false",
+                        help="nie mierz pamięci (tracemalloc spowalnia przebieg)")
+    parser.add_argument("--json", help="zapisz wyniki do pliku JSON")
+    args = parser.parse_args(argv)
+
+    # Ścieżka zapasowa przez pytube ma własny transport, którego nie da się skierować do serwera testowego
+    sys.modules["pytube"] = None
+    settings = {"scan_workers": args.workers, "export_workers": args.workers, "scan_mode": args.mode}
+    report = []
+    for scale in args.scales:
+        process, target = start_stub(args, scale)
+        metrics.reset()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                previous = os.getcwd()
+                os.chdir(directory)
+                try:
+                    adapter = install_adapter(target, pool_size=max(4, args.workers))
+                    results = Bench(args, adapter, settings).run(args.scenarios)
+                finally:
+                    os.chdir(previous)
+        finally:
+            process.terminate()
+            process.wait()
+        print_table(scale, results)
+        print(metrics.summary())
+        report.append({"videos": scale, "results": results, "metrics": metrics.snapshot()})
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"settings": vars(args), "report": report}, file, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
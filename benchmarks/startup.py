@@ -0,0 +1,131 @@
+"""
+Test czasu uruchomienia: od startu procesu do pierwszego narysowania okna (main.py i YTScript.py)
+oraz budowa klienta YouTube Data API (core.build_client), z liczbą połączeń sieciowych w trakcie.
+
+Każdy pomiar to nowy proces Pythona (zimny start modułów, pliki .pyc już skompilowane) uruchomiony
+w pustym katalogu tymczasowym, z platformą Qt "offscreen", więc test nie potrzebuje ekranu.
+
+Przykład:
+    python benchmarks/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ["main", "YTScript", "client"]
+
+# Kod uruchamiany w procesie potomnym; wypisuje jeden wiersz JSON z czasami etapów w sekundach
+WINDOW_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+{qt_import}
+app = QApplication(sys.argv)
+import {module} as module
+imported = time.perf_counter()
+window = module.YouTubeTranscriptApp()
+created = time.perf_counter()
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            painted = time.perf_counter()
+            print(json.dumps({{"import": imported - started, "construct": created - imported,
+                              "paint": painted - created, "modules": len(sys.modules)}}), flush=True)
+            app.quit()
+        return False
+
+first_paint = FirstPaint()
+window.installEventFilter(first_paint)
+window.show()
+app.exec{exec_suffix}()
+"""
+
+CLIENT_PROBE = """
+import json, socket, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+connections = []
+original_connect = socket.socket.connect
+def counting_connect(self, address):
+    connections.append(address)
+    return original_connect(self, address)
+socket.socket.connect = counting_connect
+import core
+imported = time.perf_counter()
+first = core.build_client("startup-benchmark")
+built = time.perf_counter()
+second = core.build_client("startup-benchmark")
+reused = time.perf_counter()
+print(json.dumps({{"import": imported - started, "build": built - imported, "rebuild": reused - built,
+                  "same_client": first is second, "connections": len(connections)}}), flush=True)
+"""
+
+QT_IMPORTS = {
+    "main": ("from PyQt5.QtWidgets import QApplication\nfrom PyQt5.QtCore import QObject, QEvent", "_"),
+    "YTScript": ("from PyQt6.QtWidgets import QApplication\nfrom PyQt6.QtCore import QObject, QEvent", ""),
+}
+
+
+def probe_code(target):
+    if target == "client":
+        return CLIENT_PROBE.format(root=ROOT)
+    qt_import, exec_suffix = QT_IMPORTS[target]
+    return WINDOW_PROBE.format(root=ROOT, qt_import=qt_import, module=target, exec_suffix=exec_suffix)
+
+
+def run_once(target, directory):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", probe_code(target)], cwd=directory, env=env,
+                            capture_output=True, text=True, timeout=120)
+    elapsed = time.perf_counter() - started
+    lines = [line for line in output.stdout.splitlines() if line.startswith("{")]
+    if output.returncode != 0 or not lines:
+        raise RuntimeError(f"{target}: {output.stderr.strip()[-500:]}")
+    result = json.loads(lines[-1])
+    result["total"] = elapsed
+    return result
+
+
+def summarize(samples):
+    summary = {}
+    for key, value in samples[0].items():
+        if isinstance(value, bool):
+            summary[key] = all(sample[key] for sample in samples)
+        elif isinstance(value, (int, float)):
+            summary[key] = statistics.median(sample[key] for sample in samples)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="liczba uruchomień każdego wariantu (mediana)")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS)
+    parser.add_argument("--json", help="zapisz wyniki do pliku JSON")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for target in args.targets:
+        samples = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as directory:
+                samples.append(run_once(target, directory))
+        report[target] = summarize(samples)
+        values = ", ".join(f"{key} {value * 1000:.0f} ms" if isinstance(value, float) else f"{key} {value}"
+                           for key, value in report[target].items())
+        print(f"{target:<10}{values}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"runs": args.runs, "report": report}, file, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
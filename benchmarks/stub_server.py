@@ -0,0 +1,218 @@
+"""
+Lokalny zamiennik punktów końcowych YouTube do testów wydajności bez sieci i bez limitu API.
+
+Obsługuje:
+    /youtube/v3/channels, /youtube/v3/search, /youtube/v3/playlistItems, /youtube/v3/videos
+    /watch?v=ID        strona filmu z osadzonym JSON-em "captions" (jak czyta youtube_transcript_api)
+    /api/timedtext     treść transkrypcji w XML
+    /oembed            tytuł filmu w JSON
+
+Kanał ma --videos filmów o ID b0000000000, b0000000001, ...; część filmów (--no-captions-rate)
+nie ma napisów. --latency-ms i --jitter-ms opóźniają każdą odpowiedź, a --error-rate zwraca
+losowo 429/503, aby sprawdzić ponawianie i zachowanie przy błędach.
+
+Uruchomienie: python benchmarks/stub_server.py --videos 1000 --latency-ms 20
+Po starcie serwer wypisuje na standardowe wyjście wiersz "PORT <numer>".
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+CHANNEL_ID = "UCbenchmark0000000000000"
+UPLOADS_PLAYLIST_ID = "UUbenchmark0000000000000"
+PAGE_SIZE = 50
+WORDS = "ala ma kota a kot ma ale żółw biegnie szybko przez las nad rzeką w górach".split()
+
+
+def video_id(number):
+    return f"b{number:010d}"
+
+
+def video_number(video_id):
+    return int(video_id[1:])
+
+
+class StubState:
+    def __init__(self, videos, segments, page_kb, no_captions_rate, latency_ms, jitter_ms, error_rate, seed):
+        self.videos = videos
+        self.segments = segments
+        self.no_captions_rate = no_captions_rate
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.seed = seed
+        self.random = random.Random(seed)
+        # Wypełnienie imitujące rozmiar prawdziwej strony filmu (skrypty, style, dane odtwarzacza)
+        self.page_filler = "<!-- " + "x" * (page_kb * 1024) + " -->"
+        self.epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def has_captions(self, number):
+        return random.Random(self.seed * 1_000_003 + number).random() >= self.no_captions_rate
+
+    def published_at(self, number):
+        # Filmy od najnowszego: numer 0 jest najnowszy
+        return (self.epoch - timedelta(hours=number)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        state = self.state
+        delay = state.latency + state.jitter * state.random.random()
+        if delay:
+            time.sleep(delay)
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if state.error_rate and state.random.random() < state.error_rate:
+            status = state.random.choice([429, 503])
+            reason = "rateLimitExceeded" if status == 429 else "backendError"
+            return self.send_json({"error": {"code": status, "errors": [{"reason": reason}]}}, status)
+
+        routes = {
+            "/youtube/v3/channels": self.channels,
+            "/youtube/v3/search": self.search,
+            "/youtube/v3/playlistItems": self.playlist_items,
+            "/youtube/v3/videos": self.videos,
+            "/watch": self.watch_page,
+            "/api/timedtext": self.timedtext,
+            "/oembed": self.oembed,
+        }
+        route = routes.get(url.path)
+        if route is None:
+            return self.send_body(b"Not Found", "text/plain", 404)
+        route(query)
+
+    def send_body(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data, status=200):
+        self.send_body(json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json; charset=UTF-8", status)
+
+    def page(self, query):
+        start = int(query.get("pageToken") or 0)
+        end = min(self.state.videos, start + int(query.get("maxResults", PAGE_SIZE)))
+        next_page = {"nextPageToken": str(end)} if end < self.state.videos else {}
+        return range(start, end), next_page
+
+    def channels(self, query):
+        self.send_json({"items": [{
+            "id": CHANNEL_ID,
+            "snippet": {"title": "Kanał testowy",
+                        "thumbnails": {"default": {"url": "https://www.youtube.com/thumb.jpg"}}},
+            "statistics": {"subscriberCount": "1000", "videoCount": str(self.state.videos)},
+            "contentDetails": {"relatedPlaylists": {"uploads": UPLOADS_PLAYLIST_ID}},
+        }]})
+
+    def search(self, query):
+        if query.get("type") == "channel":
+            return self.send_json({"items": [{"snippet": {"channelId": CHANNEL_ID}}]})
+        numbers, next_page = self.page(query)
+        self.send_json({"items": [{
+            "id": {"videoId": video_id(number)},
+            "snippet": {"title": f"Film {number}", "publishedAt": self.state.published_at(number)},
+        } for number in numbers], **next_page})
+
+    def playlist_items(self, query):
+        numbers, next_page = self.page(query)
+        self.send_json({"items": [{
+            "snippet": {"title": f"Film {number}"},
+            "contentDetails": {"videoId": video_id(number), "videoPublishedAt": self.state.published_at(number)},
+        } for number in numbers], **next_page})
+
+    def videos(self, query):
+        items = []
+        for requested_id in query.get("id", "").split(","):
+            number = video_number(requested_id)
+            items.append({
+                "id": requested_id,
+                "contentDetails": {"duration": f"PT{number % 60 + 1}M{number % 50}S",
+                                   "caption": "true" if self.state.has_captions(number) else "false"},
+                "statistics": {"viewCount": str(number * 7)},
+            })
+        self.send_json({"items": items})
+
+    def watch_page(self, query):
+        requested_id = query.get("v", "")
+        number = video_number(requested_id)
+        if self.state.has_captions(number):
+            base_url = f"https://www.youtube.com/api/timedtext?v={requested_id}"
+            captions = {"playerCaptionsTracklistRenderer": {
+                "captionTracks": [
+                    {"baseUrl": base_url + "&lang=pl", "name": {"simpleText": "polski"},
+                     "languageCode": "pl", "isTranslatable": False},
+                    {"baseUrl": base_url + "&lang=en&kind=asr",
+                     "name": {"simpleText": "angielski (wygenerowane automatycznie)"},
+                     "languageCode": "en", "kind": "asr", "isTranslatable": False},
+                ],
+                "translationLanguages": [],
+            }}
+            player = f'"captions":{json.dumps(captions)},"videoDetails":{{"videoId":"{requested_id}"}}'
+        else:
+            player = f'"playabilityStatus":{{"status":"OK"}},"videoDetails":{{"videoId":"{requested_id}"}}'
+        html = (f"<html><head><title>Film {number} - YouTube</title></head><body>{self.state.page_filler}"
+                f"<script>var ytInitialPlayerResponse = {{{player}}};</script></body></html>")
+        self.send_body(html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def timedtext(self, query):
+        number = video_number(query.get("v", "b0"))
+        generator = random.Random(number)
+        lines = ['<?xml version="1.0" encoding="utf-8" ?><transcript>']
+        for index in range(self.state.segments):
+            text = " ".join(generator.choice(WORDS) for _ in range(8))
+            lines.append(f'<text start="{index * 2.5:.2f}" dur="2.5">{escape(text)}</text>')
+        lines.append("</transcript>")
+        self.send_body("".join(lines).encode("utf-8"), "text/xml; charset=UTF-8")
+
+    def oembed(self, query):
+        requested_id = query.get("url", "").rsplit("v=", 1)[-1]
+        self.send_json({"title": f"Film {video_number(requested_id)}", "author_name": "Kanał testowy"})
+
+
+def start_server(state, port=0):
+    handler = type("Handler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--videos", type=int, default=1000, help="liczba filmów na kanale")
+    parser.add_argument("--segments", type=int, default=300, help="liczba segmentów w transkrypcji")
+    parser.add_argument("--page-kb", type=int, default=256, help="rozmiar strony filmu w KB")
+    parser.add_argument("--no-captions-rate", type=float, default=0.1, help="odsetek filmów bez napisów")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="opóźnienie każdej odpowiedzi")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="losowy dodatek do opóźnienia")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="odsetek odpowiedzi 429/503")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    state = StubState(args.videos, args.segments, args.page_kb, args.no_captions_rate,
+                      args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    server = start_server(state, args.port)
+    print(f"PORT {server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import json
+import os
+from dataclasses import asdict
+
+from atomic_file import atomic_write
+from scanner import VideoInfo
+
+MANIFEST_DIR = "manifests"
+
+
+class ChannelManifest:
+    """
+    Manifest kanału zapisywany obok settings.json: znane filmy, data ostatniej publikacji
+    i stan transkrypcji. Pozwala synchronizować tylko filmy dodane od poprzedniego uruchomienia.
+    """
+
+    def __init__(self, channel_id, directory=MANIFEST_DIR):
+        self.channel_id = channel_id
+        self.path = os.path.join(directory, f"{channel_id}.json")
+        self.videos = {}
+        self.last_published_at = None
+        # Czy choć jedno skanowanie przeszło cały kanał; do tego czasu synchronizacja nie zatrzymuje się
+        # na znanych filmach, aby uzupełnić starsze filmy pominięte przez przerwane skanowanie
+        self.complete = False
+        # Adresy, pod którymi kanał był skanowany - pozwalają znaleźć manifest bez zapytań do API
+        self.channel_urls = []
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        self.videos = data.get("videos", {})
+        self.last_published_at = data.get("last_published_at")
+        self.complete = data.get("complete", False)
+        self.channel_urls = data.get("channel_urls", [])
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write(self.path, json.dumps({
+            "channel_id": self.channel_id,
+            "last_published_at": self.last_published_at,
+            "complete": self.complete,
+            "channel_urls": self.channel_urls,
+            "videos": self.videos
+        }, indent=4, ensure_ascii=False))
+
+    @classmethod
+    def for_url(cls, channel_url, directory=MANIFEST_DIR):
+        # Manifest kanału dla URL bez użycia API: ID z adresu /channel/UC... albo adres zapisany przy skanowaniu
+        if "channel/" in channel_url:
+            channel_id = channel_url.split("channel/")[1].split("/")[0].split("?")[0]
+            return cls(channel_id, directory)
+        if not os.path.isdir(directory):
+            return None
+        for name in os.listdir(directory):
+            if not name.endswith(".json"):
+                continue
+            manifest = cls(name[:-len(".json")], directory)
+            if channel_url in manifest.channel_urls:
+                return manifest
+        return None
+
+    def add_url(self, channel_url):
+        if channel_url not in self.channel_urls:
+            self.channel_urls.append(channel_url)
+
+    @property
+    def known_ids(self):
+        return set(self.videos)
+
+    def merge(self, videos):
+        for video in videos:
+            entry = self.videos.get(video.video_id, {})
+            status = entry.get("transcript_status")
+            if status != "downloaded":
+                status = "available" if video.transcript_available else "unavailable"
+            entry.update(asdict(video))
+            entry["transcript_status"] = status
+            self.videos[video.video_id] = entry
+            if video.published_at and (not self.last_published_at or video.published_at > self.last_published_at):
+                self.last_published_at = video.published_at
+
+    def scan_finished(self, scanner):
+        # Wywoływane po merge: skanowanie bez błędu, które doszło do końca listy, kończy uzupełnianie kanału
+        if scanner.completed and not scanner.error and not scanner.cancelled:
+            self.complete = True
+
+    def set_status(self, video_id, status):
+        if video_id in self.videos:
+            self.videos[video_id]["transcript_status"] = status
+
+    def video_infos(self):
+        # Filmy od najnowszego, w tej samej kolejności co lista z API
+        fields = VideoInfo.__dataclass_fields__
+        entries = sorted(self.videos.values(), key=lambda entry: entry.get("published_at") or "", reverse=True)
+        return [VideoInfo(**{key: value for key, value in entry.items() if key in fields}) for entry in entries]
@@ -0,0 +1,270 @@
+"""
+Wiersz poleceń YouTubeText - uruchamianie skanowania kanału i eksportu transkrypcji bez Qt i bez ekranu.
+
+Przykłady:
+    python cli.py scan https://www.youtube.com/@kanal --sync
+    python cli.py export https://www.youtube.com/@kanal --format txt --output transcriptions
+    python cli.py transcript https://www.youtube.com/watch?v=XXXXXXXXXXX
+    python cli.py serve --port 8765
+"""
+import argparse
+import sys
+
+import core
+import formatters
+import http_client
+import metrics
+import transcript_probe
+from quota import QuotaExceeded
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def load_channel(args, settings):
+    api_key = args.api_key or settings.get("api_key")
+    if not api_key:
+        raise SystemExit("Brak klucza API: podaj --api-key lub zapisz go w settings.json.")
+    youtube_client = core.build_client(api_key, args.quota)
+    channel_id = core.get_channel_id_from_url(youtube_client, args.channel_url)
+    return youtube_client, core.fetch_channel_statistics(youtube_client, channel_id)
+
+
+def error_code(error):
+    # Kod wyjścia dla przerwanego skanowania: 2 - wyczerpany limit API, 1 - inny błąd
+    if error is None:
+        return None
+    return 2 if isinstance(error, QuotaExceeded) else 1
+
+
+def scan(args, settings):
+    # Zwraca (manifest, błąd skanowania albo None)
+    from channel_manifest import ChannelManifest
+
+    if getattr(args, "from_manifest", False):
+        # Bez klucza API i bez zużywania limitu - kanał jest rozpoznawany po adresie zapisanym w manifeście
+        manifest = ChannelManifest.for_url(args.channel_url)
+        if manifest is None or not manifest.videos:
+            raise SystemExit(f"Brak manifestu dla kanału {args.channel_url} - uruchom najpierw skanowanie.")
+        return manifest, None
+
+    youtube_client, channel = load_channel(args, settings)
+    manifest = ChannelManifest(channel.channel_id)
+    manifest.add_url(args.channel_url)
+
+    scanner = core.create_scanner(youtube_client, channel, settings, manifest=manifest if args.sync else None)
+    if scanner.resumed:
+        log(f"Wznawianie przerwanego skanowania: {len(scanner.resumed)} filmów z punktu kontrolnego")
+    new_videos = []
+    for video in scanner.scan():
+        new_videos.append(video)
+        mark = "📄" if video.transcript_available else "📒"
+        print(f"{video.video_id}\t{video.publish_date}\t{video.duration}\t{mark}\t{video.title}")
+    manifest.merge(new_videos)
+    manifest.scan_finished(scanner)
+    manifest.save()
+    scanner.clear_checkpoint()
+    core.create_index(settings).set_titles({video.video_id: video.title for video in new_videos})
+    if scanner.error:
+        log(f"Błąd pobierania filmów: {scanner.error}")
+    log(f"{channel.title}: nowe filmy {len(new_videos)}, znane filmy {len(manifest.videos)}")
+    log(f"Pozostały limit API: {args.quota.remaining}/{args.quota.daily_budget} jednostek")
+    return manifest, scanner.error
+
+
+def command_scan(args, settings):
+    _, error = scan(args, settings)
+    return error_code(error)
+
+
+def command_export(args, settings):
+    # Po niepełnym skanowaniu eksportowane są znane filmy, ale kod wyjścia zgłasza błąd skanowania
+    manifest, error = scan(args, settings)
+    videos = [
+        (video.video_id, video.publish_date, video.title)
+        for video in manifest.video_infos()
+        if video.transcript_available
+    ]
+    cache = core.create_cache(settings)
+    index = core.create_index(settings)
+    if (args.engine or settings.get("fetch_engine")) == "async":
+        # Transkrypcje trafiają najpierw do pamięci podręcznej; eksport poniżej tylko z niej czyta,
+        # a filmy nieudane w silniku asynchronicznym są ponawiane zwykłą ścieżką
+        import async_fetch
+        failed = async_fetch.prefetch([video_id for video_id, _, _ in videos], cache, settings=settings,
+                                      index=index, on_progress=log)
+        log(f"Silnik asynchroniczny: nie pobrano {len(failed)} transkrypcji (brak napisów lub błąd) - "
+            f"zostaną ponowione zwykłą ścieżką")
+
+    def fetch(video_id):
+        return core.download_transcript(video_id, cache, index=index)
+
+    def fetch_segments(video_id):
+        return core.download_segments(video_id, cache, index=index)
+
+    formats = args.formats or ([args.format] if args.format in (core.FileType.SRT, core.FileType.VTT) else None)
+    if formats:
+        # Jedno przejście po segmentach filmu zapisuje wszystkie wybrane formaty
+        entries = core.export_to_formats(videos, args.output, fetch_segments, formats, on_progress=log,
+                                         manifest=manifest, workers=settings.get("export_workers", 4))
+        log(f"Zapisano {sum(entry['status'] == 'ok' for entry in entries.values())} transkrypcji "
+            f"w formatach: {', '.join(formats)}.")
+    elif args.format == core.FileType.JSON:
+        path = core.export_to_json(videos, args.output, fetch, on_progress=log, manifest=manifest)
+        log(f"Transkrypcje zapisane do pliku JSON: {path}")
+    elif args.format == core.FileType.ARCHIVE:
+        path = core.export_to_archive(videos, args.output, fetch_segments, on_progress=log, manifest=manifest)
+        log(f"Segmenty transkrypcji zapisane do archiwum: {path}")
+    elif args.format == core.FileType.JSONL:
+        # Strumieniowo i z punktem kontrolnym - ponowne uruchomienie wznawia przerwany eksport
+        path = core.export_to_jsonl(videos, args.output, fetch, on_progress=log, manifest=manifest)
+        log(f"Transkrypcje zapisane do pliku JSONL: {path}")
+    else:
+        core.export_to_txt(videos, args.output, fetch, on_progress=log, manifest=manifest,
+                           workers=settings.get("export_workers", 4), retry_failed=args.retry_failed)
+        log("Eksport transkrypcji do plików TXT zakończony.")
+    return error_code(error)
+
+
+def command_transcript(args, settings):
+    video_id = core.extract_video_id(args.video_url) or args.video_url
+    if args.archive:
+        return print_from_archive(args, video_id)
+    text = core.download_transcript(video_id, core.create_cache(settings), languages=args.lang,
+                                    index=core.create_index(settings))
+    if text is None:
+        log(f"Nie udało się pobrać transkrypcji dla wideo: {video_id}")
+        return 1
+    print(text)
+
+
+def print_from_archive(args, video_id):
+    # Odczyt z archiwum .ytsa bez sieci: tylko segmenty z przedziału --start/--end
+    from segment_store import SegmentArchive
+    from transcript_cache import preferred_keys
+
+    with SegmentArchive(args.archive) as archive:
+        store = archive.slice(video_id, args.start, args.end, languages=preferred_keys(args.lang))
+        if store is None:
+            store = archive.slice(video_id, args.start, args.end)
+        if store is None:
+            log(f"Brak transkrypcji wideo {video_id} w archiwum {args.archive}")
+            return 1
+        for segment in store:
+            print(f"[{segment.start:.2f}] {segment.text}")
+
+
+def command_search(args, settings):
+    hits = core.create_index(settings).search(" ".join(args.query), limit=args.limit,
+                                              video_id=args.video, raw=args.raw)
+    for hit in hits:
+        minutes, seconds = divmod(int(hit.start), 60)
+        print(f"{hit.video_id}\t{minutes:02}:{seconds:02}\t{hit.url}\t{hit.title}\t{hit.text}")
+    if not hits:
+        log("Brak wyników.")
+        return 1
+
+
+def command_serve(args, settings):
+    import asyncio
+    import service
+
+    def on_ready(server):
+        log(f"Usługa transkrypcji: http://{server.host}:{server.port}/transcript/<id>?lang=pl,en&format=txt")
+
+    try:
+        asyncio.run(service.serve(settings, args.host, args.port, args.concurrency, on_ready=on_ready))
+    except KeyboardInterrupt:
+        log("Usługa zatrzymana.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="YouTubeText - pobieranie transkrypcji z YouTube")
+    parser.add_argument("--settings", default=core.SETTINGS_PATH, help="ścieżka do pliku settings.json")
+    parser.add_argument("--metrics", help="zapisz pomiary do pliku (.prom - format Prometheus, inne - JSON)")
+    parser.add_argument("--trace", help="zapisz oś czasu operacji w formacie Chrome trace (chrome://tracing)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_channel_arguments(subparser):
+        subparser.add_argument("channel_url", help="URL kanału YouTube")
+        subparser.add_argument("--api-key", help="klucz API YouTube Data v3 (domyślnie z settings.json)")
+        subparser.add_argument("--sync", action="store_true",
+                               help="pobierz tylko filmy nowe od ostatniego uruchomienia")
+        subparser.add_argument("--workers", type=int, help="liczba równoległych zadań skanowania")
+        subparser.add_argument("--mode", choices=["uploads", "search"], help="sposób listowania filmów kanału")
+
+    scan_parser = subparsers.add_parser("scan", help="pobierz listę filmów kanału")
+    add_channel_arguments(scan_parser)
+    scan_parser.set_defaults(handler=command_scan)
+
+    export_parser = subparsers.add_parser("export", help="zrzuć transkrypcje kanału do plików")
+    add_channel_arguments(export_parser)
+    export_parser.add_argument("--format", choices=[file_type.value for file_type in core.FileType],
+                               default=core.FileType.TXT)
+    export_parser.add_argument("--formats", nargs="+", choices=formatters.FORMATS,
+                               help="zapisz każdy film w kilku formatach naraz (zamiast --format)")
+    export_parser.add_argument("--output", default="transcriptions", help="katalog do zapisu transkrypcji")
+    export_parser.add_argument("--from-manifest", action="store_true",
+                               help="nie skanuj kanału, eksportuj filmy zapisane w manifeście")
+    export_parser.add_argument("--export-workers", type=int, help="liczba równoległych zapisów plików TXT")
+    export_parser.add_argument("--engine", choices=["sync", "async"],
+                               help="async - pobieraj transkrypcje asynchronicznie (duże kanały)")
+    export_parser.add_argument("--retry-failed", action="store_true",
+                               help="ponów tylko filmy, których eksport TXT zakończył się błędem")
+    export_parser.set_defaults(handler=command_export)
+
+    transcript_parser = subparsers.add_parser("transcript", help="wypisz transkrypcję jednego filmu")
+    transcript_parser.add_argument("video_url", help="link lub ID filmu YouTube")
+    transcript_parser.add_argument("--lang", nargs="+", default=core.DEFAULT_LANGUAGES,
+                                   help="preferowane języki w kolejności")
+    transcript_parser.add_argument("--archive", help="czytaj z archiwum .ytsa zamiast z sieci")
+    transcript_parser.add_argument("--start", type=float, default=0.0, help="początek przedziału w sekundach")
+    transcript_parser.add_argument("--end", type=float, help="koniec przedziału w sekundach")
+    transcript_parser.set_defaults(handler=command_transcript)
+
+    search_parser = subparsers.add_parser("search", help="szukaj frazy w pobranych transkrypcjach")
+    search_parser.add_argument("query", nargs="+", help="szukana fraza")
+    search_parser.add_argument("--limit", type=int, default=50, help="maksymalna liczba wyników")
+    search_parser.add_argument("--video", help="szukaj tylko w transkrypcji tego filmu (ID)")
+    search_parser.add_argument("--raw", action="store_true",
+                               help="zapytanie w składni FTS5 (AND, OR, NEAR, prefiks*) zamiast dokładnej frazy")
+    search_parser.set_defaults(handler=command_search)
+
+    serve_parser = subparsers.add_parser("serve", help="udostępniaj transkrypcje przez lokalny serwer HTTP")
+    serve_parser.add_argument("--host", help="adres nasłuchiwania (domyślnie 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, help="port (domyślnie 8765, 0 - dowolny wolny)")
+    serve_parser.add_argument("--concurrency", type=int, help="maksymalna liczba jednoczesnych pobrań z YouTube")
+    serve_parser.set_defaults(handler=command_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        metrics.enable_trace()
+    settings = core.load_settings(args.settings)
+    http_client.configure(settings)
+    transcript_probe.configure(settings)
+    args.quota = core.create_scheduler(settings)
+    if getattr(args, "workers", None):
+        settings["scan_workers"] = args.workers
+    if getattr(args, "export_workers", None):
+        settings["export_workers"] = args.export_workers
+    if getattr(args, "mode", None):
+        settings["scan_mode"] = args.mode
+    try:
+        return args.handler(args, settings)
+    except QuotaExceeded as e:
+        log(str(e))
+        return 2
+    finally:
+        log(metrics.summary())
+        if args.metrics:
+            metrics.write(args.metrics)
+        if args.trace:
+            metrics.write_trace(args.trace)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
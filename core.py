@@ -0,0 +1,646 @@
+"""
+Rdzeń aplikacji niezależny od Qt: skanowanie kanału, pobieranie i czyszczenie transkrypcji
+oraz eksport do TXT/JSON. Z tego modułu korzystają oba interfejsy graficzne i CLI.
+Ciężkie biblioteki są importowane dopiero przy pierwszym użyciu.
+"""
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from enum import StrEnum
+
+import metrics
+from atomic_file import atomic_write
+from transcript_cache import TranscriptCache, language_key, preferred_keys, select_language
+
+SETTINGS_PATH = "settings.json"
+DEFAULT_LANGUAGES = ['pl', 'en']
+EXPORT_MANIFEST = "export_manifest.json"
+# Manifest eksportu jest zapisywany co tyle wyników albo sekund, aby przerwany eksport nie tracił postępu
+MANIFEST_SAVE_EVERY = 50
+MANIFEST_SAVE_SECONDS = 5
+
+# Klienci Data API według (klucz API, harmonogram) - jeden klient na całą sesję
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class FileType(StrEnum):
+    JSON = "json"
+    TXT = "txt"
+    JSONL = "jsonl"
+    ARCHIVE = "ytsa"
+    SRT = "srt"
+    VTT = "vtt"
+
+
+@dataclass
+class ChannelInfo:
+    channel_id: str
+    title: str = ""
+    subscribers: str = "0"
+    video_count: str = "0"
+    thumbnail_url: str = ""
+    uploads_playlist_id: str | None = None
+
+
+def load_settings(path=SETTINGS_PATH):
+    # Wczytaj ustawienia z pliku settings.json
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    return {}
+
+
+def save_settings(settings, path=SETTINGS_PATH):
+    # Zapisz ustawienia do pliku settings.json
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(settings, file, indent=4, ensure_ascii=False)
+
+
+def create_cache(settings):
+    # Transkrypcje przechowywane na dysku między uruchomieniami
+    return TranscriptCache(
+        max_bytes=settings.get("cache_max_mb", 512) * 1024 * 1024,
+        ttl=settings.get("cache_ttl_days", 30) * 24 * 3600
+    )
+
+
+def create_scheduler(settings):
+    # Dzienny budżet jednostek limitu API i limit zapytań na sekundę
+    from quota import DEFAULT_DAILY_BUDGET, DEFAULT_MAX_RPS, QuotaScheduler
+    return QuotaScheduler(
+        daily_budget=settings.get("quota_daily_budget", DEFAULT_DAILY_BUDGET),
+        max_rps=settings.get("quota_max_rps", DEFAULT_MAX_RPS)
+    )
+
+
+@functools.cache
+def discovery_document():
+    # Dokument discovery YouTube Data API dołączony do googleapiclient - bez pobierania z sieci
+    from googleapiclient.discovery_cache import get_static_doc
+    document = get_static_doc("youtube", "v3")
+    if document is None:
+        raise RuntimeError("Brak dokumentu discovery youtube v3 w pakiecie googleapiclient.")
+    return document
+
+
+def build_client(api_key, scheduler=None):
+    """
+    Klient YouTube Data API zbudowany z lokalnego dokumentu discovery, bez zapytań sieciowych.
+    Klient jest tworzony raz dla danego klucza i harmonogramu i współdzielony przez całą sesję.
+    """
+    key = (api_key, id(scheduler))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            from googleapiclient.discovery import build_from_document
+            from http_client import GoogleHttp
+            # Zapytania Data API idą przez wspólną pulę połączeń
+            # (bezpieczną wątkowo, w przeciwieństwie do httplib2)
+            client = build_from_document(discovery_document(), developerKey=api_key,
+                                         http=GoogleHttp(scheduler=scheduler))
+            _clients[key] = client
+        return client
+
+
+def get_channel_id_from_url(youtube_client, channel_url):
+    # Wyodrębnij ID kanału z URL
+    if "channel/" in channel_url:
+        return channel_url.split("channel/")[1]
+    elif "@" in channel_url:
+        username = channel_url.split("@")[1]
+        request = youtube_client.search().list(
+            part="snippet",
+            q=username,
+            type="channel",
+            maxResults=1
+        )
+        response = request.execute()
+        if "items" in response and len(response["items"]) > 0:
+            return response["items"][0]["snippet"]["channelId"]
+    else:
+        request = youtube_client.channels().list(
+            part="id",
+            forUsername=channel_url.split("/")[-1]
+        )
+        response = request.execute()
+        if "items" in response and len(response["items"]) > 0:
+            return response["items"][0]["id"]
+    raise ValueError("Nie udało się znaleźć ID kanału dla podanego URL.")
+
+
+def fetch_channel_statistics(youtube_client, channel_id):
+    # Pobierz statystyki kanału, w tym liczbę subskrybentów i ID playlisty "uploads"
+    request = youtube_client.channels().list(
+        part="snippet,statistics,contentDetails",
+        id=channel_id
+    )
+    response = request.execute()
+    channel = ChannelInfo(channel_id)
+    if "items" in response and len(response["items"]) > 0:
+        channel_info = response["items"][0]
+        channel.title = channel_info["snippet"]["title"]
+        channel.subscribers = channel_info["statistics"].get("subscriberCount", "N/A")
+        channel.video_count = channel_info["statistics"].get("videoCount", "0")
+        channel.thumbnail_url = channel_info["snippet"]["thumbnails"]["default"]["url"]
+        channel.uploads_playlist_id = channel_info.get("contentDetails", {}).get(
+            "relatedPlaylists", {}).get("uploads")
+    return channel
+
+
+def create_scanner(youtube_client, channel, settings, manifest=None, cancel_event=None):
+    from scanner import ChannelScanner
+
+    # Tryb "uploads" czyta playlistę przesłanych filmów (1 jednostka limitu za stronę),
+    # tryb "search" korzysta z search().list (100 jednostek za stronę)
+    uploads_playlist_id = None
+    if settings.get("scan_mode", "uploads") == "uploads":
+        uploads_playlist_id = channel.uploads_playlist_id
+
+    # Przy synchronizacji pomijane są filmy znane z manifestu kanału
+    known_ids = manifest.known_ids if manifest else None
+    # Dopóki żadne skanowanie nie przeszło całego kanału, znane filmy są pomijane bez zatrzymywania listowania
+    stop_at_known = bool(manifest and manifest.complete)
+    published_after = manifest.last_published_at if stop_at_known else None
+    # Przerwane skanowanie (awaria, anulowanie, wyczerpany limit) jest wznawiane z punktu kontrolnego
+    checkpoint = None
+    if settings.get("scan_checkpoints", True):
+        from scan_checkpoint import ScanCheckpoint
+        checkpoint = ScanCheckpoint(channel.channel_id)
+    return ChannelScanner(youtube_client, channel.channel_id, is_transcript_available,
+                          workers=settings.get("scan_workers", 8),
+                          uploads_playlist_id=uploads_playlist_id,
+                          known_ids=known_ids, published_after=published_after,
+                          cancel_event=cancel_event, checkpoint=checkpoint, stop_at_known=stop_at_known)
+
+
+def is_transcript_available(video_id):
+    # Wynik sprawdzenia (lista transkrypcji lub napisy z pytube) jest zapamiętywany i użyty przy pobieraniu
+    import transcript_probe
+    return transcript_probe.probe(video_id).available
+
+
+def create_index(settings):
+    # Indeks pełnotekstowy transkrypcji uzupełniany przy każdym pobraniu
+    from search_index import DEFAULT_INDEX_PATH, SearchIndex
+    return SearchIndex(settings.get("search_index_path", DEFAULT_INDEX_PATH))
+
+
+def index_segments(index, video_id, language, segments):
+    if index is not None and segments:
+        with metrics.timer("index_add"):
+            index.add(video_id, language, segments)
+
+
+def download_transcript(video_id, cache, languages=DEFAULT_LANGUAGES, index=None):
+    # Tekst transkrypcji albo None
+    downloaded = _download(video_id, cache, languages, index)
+    return downloaded[2] if downloaded is not None else None
+
+
+def download_segments(video_id, cache, languages=DEFAULT_LANGUAGES, index=None):
+    # (język, segmenty) transkrypcji z zachowanymi czasami
+    downloaded = _download(video_id, cache, languages, index)
+    if downloaded is None or not downloaded[1]:
+        return None
+    return downloaded[0], downloaded[1]
+
+
+def _download(video_id, cache, languages, index):
+    # (język, segmenty, tekst) albo None
+    # Najpierw sprawdź trwałą pamięć podręczną - ponowny eksport nie wymaga sieci
+    cached = cache.find(video_id, preferred_keys(languages))
+    if cached is not None:
+        # Transkrypcje pobrane przed utworzeniem indeksu są do niego dopisywane przy okazji
+        if index is not None and not index.contains(video_id):
+            index_segments(index, video_id, cached[0], cached[1])
+        return cached
+
+    # Pobierz transkrypcję za pomocą YouTubeTranscriptApi lub pytube; lista transkrypcji pochodzi
+    # z zapamiętanego sprawdzenia ze skanowania, więc film nie jest odpytywany drugi raz
+    import transcript_probe
+
+    transcript_text = None
+    transcript_data = []
+    language = None
+    probe = transcript_probe.probe(video_id)
+    if probe.transcript_list is not None:
+        # Najpierw transkrypcja ręcznie dodana, potem automatycznie wygenerowana
+        transcript = select_transcript(probe.transcript_list, languages)
+        if transcript is None:
+            # Film nie ma napisów w wybranych językach - zapamiętane sprawdzenie pozostaje aktualne
+            print(f"Brak transkrypcji w językach: {', '.join(languages)}", file=sys.stderr)
+        else:
+            try:
+                with metrics.timer("transcript_fetch"):
+                    transcript_data = transcript.fetch()
+                transcript_text = '\n'.join([entry['text'] for entry in transcript_data])
+                language = language_key(transcript.language_code, transcript.is_generated)
+            except Exception as e:
+                print(f"YouTubeTranscriptApi nie może pobrać transkrypcji: {e}", file=sys.stderr)
+                # Adresy napisów mogły wygasnąć - następne wywołanie sprawdzi film od nowa
+                transcript_probe.forget(video_id)
+
+    captions = probe.captions
+    if not transcript_text and captions is None and set(probe.languages) & set(preferred_keys(languages)):
+        # Transkrypcja w preferowanym języku istnieje, ale nie udało się jej pobrać - spróbuj pytube
+        try:
+            captions = transcript_probe.pytube_captions(video_id, "download")
+        except Exception as e:
+            print(f"pytube nie może pobrać transkrypcji: {e}", file=sys.stderr)
+    if not transcript_text and captions:
+        # Wybierz napisy w preferowanym języku
+        caption = None
+        for code in languages:
+            caption = caption or captions.get_by_language_code(code)
+        if caption:
+            try:
+                # Napisy SRT z pytube są od razu zamieniane na segmenty z czasami
+                from formatters import parse_captions
+                transcript_data = list(parse_captions(caption.generate_srt_captions()))
+                transcript_text = '\n'.join(segment['text'] for segment in transcript_data)
+                language = transcript_probe.caption_language(caption)
+            except Exception as e:
+                print(f"pytube nie może pobrać transkrypcji: {e}", file=sys.stderr)
+        else:
+            print("Napisy w wybranym języku nie są dostępne.", file=sys.stderr)
+    elif not transcript_text and not probe.available:
+        print("Brak dostępnych napisów.", file=sys.stderr)
+
+    if not transcript_text:
+        return None
+    # Zapisz surowe segmenty i tekst w pamięci podręcznej na dysku
+    cache.put(video_id, language, transcript_data, transcript_text)
+    index_segments(index, video_id, language, transcript_data)
+    return language, transcript_data, transcript_text
+
+
+def fetch_segments(transcript, cache, index=None):
+    # Segmenty wybranej transkrypcji (obiekt Transcript z youtube_transcript_api), najpierw z pamięci podręcznej
+    language = language_key(transcript.language_code, transcript.is_generated)
+    cached = cache.get(transcript.video_id, language)
+    if cached is not None:
+        return cached[0]
+    with metrics.timer("transcript_fetch"):
+        segments = transcript.fetch()
+    cache.put(transcript.video_id, language, segments, "\n".join(segment['text'] for segment in segments))
+    index_segments(index, transcript.video_id, language, segments)
+    return segments
+
+
+def select_transcript(transcript_list, languages=DEFAULT_LANGUAGES):
+    # Transkrypcja, którą pobiera eksport: ręczna w dowolnym z języków przed automatyczną (select_language)
+    transcripts = {language_key(transcript.language_code, transcript.is_generated): transcript
+                   for transcript in transcript_list}
+    key = select_language(transcripts, languages)
+    return transcripts[key] if key is not None else None
+
+
+def preferred_transcript(transcript_list, languages=DEFAULT_LANGUAGES):
+    # Najbardziej prawdopodobna transkrypcja: ta sama co przy eksporcie, inaczej pierwsza na liście
+    return select_transcript(transcript_list, languages) or next(iter(transcript_list), None)
+
+
+def render_segments(segments):
+    # Jedno przejście po segmentach: linie "[start] tekst" i linie bez znaczników czasu
+    timestamped_lines = []
+    plain_lines = []
+    for segment in segments:
+        text = segment['text']
+        timestamped_lines.append(f"[{segment['start']:.2f}] {text}")
+        plain_lines.append(text.strip())
+    return timestamped_lines, plain_lines
+
+
+def sanitize_filename(name):
+    return re.sub(r'[\\/:*?"<>|]', '', name)
+
+
+def transcript_filename(publish_date, title, extension=FileType.TXT):
+    return f"{publish_date} - {sanitize_filename(title)}.{extension}"
+
+
+def export_basenames(videos):
+    # Nazwy plików (bez rozszerzenia) dla krotek (video_id, data, tytuł); filmy o tej samej dacie
+    # i tytule dostają ID filmu w nazwie, aby nie nadpisywały nawzajem swoich plików
+    names = {video_id: f"{publish_date} - {sanitize_filename(title)}" for video_id, publish_date, title in videos}
+    counts = {}
+    for name in names.values():
+        counts[name] = counts.get(name, 0) + 1
+    return {video_id: f"{name} [{video_id}]" if counts[name] > 1 else name for video_id, name in names.items()}
+
+
+def extract_video_id(url):
+    match = re.search(r'(?:v=|youtu\.be/|embed/|v/|watch\?v=|&v=)([\w-]{11})', url)
+    return match.group(1) if match else None
+
+
+def write_transcript(file_path, text, file_type):
+    with metrics.timer("file_write"), open(file_path, "w", encoding="utf-8") as file:
+        if file_type == FileType.JSON:
+            json.dump(text.split("\n"), file, indent=4, ensure_ascii=False)
+        else:
+            file.write(text)
+        metrics.count("bytes_written", file.tell())
+
+
+def load_export_manifest(output_dir):
+    path = os.path.join(output_dir, EXPORT_MANIFEST)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    return {}
+
+
+def save_export_manifest(output_dir, entries):
+    atomic_write(os.path.join(output_dir, EXPORT_MANIFEST), json.dumps(entries, indent=4, ensure_ascii=False))
+
+
+def _is_exported(output_dir, entry):
+    # Plik uznajemy za gotowy, jeśli poprzedni zapis się udał, a plik na dysku ma zapisany rozmiar
+    if not entry or entry.get("status") != "ok":
+        return False
+    file_path = os.path.join(output_dir, entry["file"])
+    return os.path.exists(file_path) and os.path.getsize(file_path) == entry["bytes"]
+
+
+def _export_txt_file(output_dir, fetch, video_id, filename):
+    entry = {"video_id": video_id, "file": filename, "bytes": 0, "status": "error", "error": None}
+    try:
+        transcript = fetch(video_id)
+        if transcript is None:
+            entry["error"] = "Brak transkrypcji"
+            return entry
+        data = transcript.encode("utf-8")
+        # Zapis atomowy - pod docelową nazwą nigdy nie ma uciętego pliku, który wznowienie uznałoby za gotowy
+        with metrics.timer("file_write"):
+            atomic_write(os.path.join(output_dir, filename), data)
+        metrics.count("bytes_written", len(data))
+        entry.update(bytes=len(data), status="ok")
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+
+def export_to_txt(videos, output_dir, fetch, on_progress=None, manifest=None, cancel_event=None,
+                  workers=4, retry_failed=False):
+    """
+    Zapisz transkrypcje filmów (krotki: video_id, data publikacji, tytuł) do osobnych plików TXT.
+    `fetch` zwraca tekst transkrypcji dla ID filmu lub None; ustawienie `cancel_event` przerywa eksport.
+    Pliki zapisywane są równolegle przez `workers` wątków, a wynik każdego filmu trafia do
+    export_manifest.json w katalogu wyjściowym. Filmy już wyeksportowane (zgodny rozmiar pliku)
+    są pomijane; `retry_failed` ponawia tylko filmy zakończone błędem.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    entries = load_export_manifest(output_dir)
+    filenames = {video_id: f"{name}.{FileType.TXT}" for video_id, name in export_basenames(videos).items()}
+
+    pending = []
+    skipped = 0
+    for video_id, publish_date, title in videos:
+        entry = entries.get(video_id)
+        if (retry_failed and (not entry or entry.get("status") != "error")) or _is_exported(output_dir, entry):
+            skipped += 1
+            continue
+        pending.append((video_id, title))
+    if on_progress:
+        on_progress(f"Do zapisania: {len(pending)} transkrypcji, pominięto: {skipped}.")
+
+    unsaved = 0
+    saved_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        futures = {
+            executor.submit(_export_txt_file, output_dir, fetch, video_id, filenames[video_id]): title
+            for video_id, title in pending
+        }
+        processed = set()
+
+        def record(future):
+            nonlocal unsaved, saved_at
+            processed.add(future)
+            entry = future.result()
+            entries[entry["video_id"]] = entry
+            if entry["status"] == "ok":
+                if manifest:
+                    manifest.set_status(entry["video_id"], "downloaded")
+                if on_progress:
+                    on_progress(f"Transkrypcja zapisana do pliku: {os.path.join(output_dir, entry['file'])}")
+            elif on_progress:
+                on_progress(f"Błąd eksportu wideo {futures[future]}: {entry['error']}")
+            unsaved += 1
+            if unsaved >= MANIFEST_SAVE_EVERY or time.monotonic() - saved_at >= MANIFEST_SAVE_SECONDS:
+                save_export_manifest(output_dir, entries)
+                unsaved, saved_at = 0, time.monotonic()
+
+        for future in as_completed(futures):
+            record(future)
+            if cancel_event and cancel_event.is_set():
+                # Anulowane zadania nie budzą as_completed - poczekaj na zadania w toku i zapisz ich wyniki
+                executor.shutdown(cancel_futures=True)
+                for remaining in futures:
+                    if remaining not in processed and not remaining.cancelled():
+                        record(remaining)
+                break
+
+    save_export_manifest(output_dir, entries)
+    if manifest:
+        manifest.save()
+    return entries
+
+
+def export_to_json(videos, output_dir, fetch, on_progress=None, manifest=None, cancel_event=None):
+    # Zapisz transkrypcje wszystkich filmów do jednego pliku transcripts.json
+    os.makedirs(output_dir, exist_ok=True)
+    json_data = {}
+    for video_id, publish_date, title in videos:
+        if cancel_event and cancel_event.is_set():
+            break
+        if on_progress:
+            on_progress(f"Pobieranie transkrypcji dla wideo: {title}")
+        transcript = fetch(video_id)
+        if transcript is None:
+            continue
+        json_data[title] = {
+            "video_id": video_id,
+            "publish_date": publish_date,
+            "transcript": transcript
+        }
+        if manifest:
+            manifest.set_status(video_id, "downloaded")
+        if on_progress:
+            on_progress(f"Transkrypcja dla wideo {title} dodana do JSON.")
+    json_file_path = os.path.join(output_dir, "transcripts.json")
+    with metrics.timer("file_write"), open(json_file_path, "w", encoding="utf-8") as json_file:
+        json.dump(json_data, json_file, indent=4, ensure_ascii=False)
+        metrics.count("bytes_written", json_file.tell())
+    if manifest:
+        manifest.save()
+    return json_file_path
+
+
+def export_to_archive(videos, output_dir, fetch, on_progress=None, manifest=None, cancel_event=None):
+    """
+    Eksport segmentów z czasami do binarnego archiwum transcripts.ytsa (segment_store), które można
+    otworzyć przez mmap i czytać po ID filmu i przedziale czasu bez wczytywania całego korpusu.
+    fetch(video_id) zwraca (język, segmenty) albo None.
+    """
+    from segment_store import SegmentStore, write_archive
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    def transcripts():
+        for video_id, publish_date, title in videos:
+            if cancel_event and cancel_event.is_set():
+                break
+            if on_progress:
+                on_progress(f"Pobieranie transkrypcji dla wideo: {title}")
+            fetched = fetch(video_id)
+            if fetched is None:
+                continue
+            language, segments = fetched
+            if manifest:
+                manifest.set_status(video_id, "downloaded")
+            yield video_id, language, SegmentStore.from_segments(segments)
+
+    archive_path = write_archive(os.path.join(output_dir, f"transcripts.{FileType.ARCHIVE}"), transcripts())
+    if manifest:
+        manifest.save()
+    return archive_path
+
+
+def _export_formats_file(output_dir, fetch, formats, video_id, basename):
+    from formatters import write_files
+
+    entry = {"video_id": video_id, "files": {}, "status": "error", "error": None}
+    try:
+        fetched = fetch(video_id)
+        if fetched is None:
+            entry["error"] = "Brak transkrypcji"
+            return entry
+        base_path = os.path.join(output_dir, basename)
+        with metrics.timer("file_write"):
+            written = write_files(fetched[1], base_path, formats)
+        metrics.count("bytes_written", sum(size for _, size in written.values()))
+        entry.update(files={file_format: os.path.basename(path) for file_format, (path, _) in written.items()},
+                     status="ok")
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+
+def export_to_formats(videos, output_dir, fetch, formats, on_progress=None, manifest=None, cancel_event=None,
+                      workers=4):
+    """
+    Zapisz każdy film naraz we wszystkich formatach z formatters.FORMATS (txt, timestamped, srt, vtt, jsonl).
+    Segmenty filmu są pobierane i przechodzone raz, niezależnie od liczby formatów.
+    fetch(video_id) zwraca (język, segmenty) albo None. Zwraca słownik {video_id: wynik}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    entries = {}
+    basenames = export_basenames(videos)
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        futures = {
+            executor.submit(_export_formats_file, output_dir, fetch, formats, video_id, basenames[video_id]): title
+            for video_id, _, title in videos
+        }
+        for future in as_completed(futures):
+            entry = future.result()
+            entries[entry["video_id"]] = entry
+            if entry["status"] == "ok":
+                if manifest:
+                    manifest.set_status(entry["video_id"], "downloaded")
+                if on_progress:
+                    on_progress(f"Transkrypcja zapisana: {futures[future]} ({', '.join(formats)})")
+            elif on_progress:
+                on_progress(f"Błąd eksportu wideo {futures[future]}: {entry['error']}")
+            if cancel_event and cancel_event.is_set():
+                executor.shutdown(cancel_futures=True)
+                break
+    if manifest:
+        manifest.save()
+    return entries
+
+
+def _read_jsonl_checkpoint(jsonl_path, checkpoint_path):
+    """
+    Zwraca (offset, zbiór zapisanych ID) dla wznowienia eksportu JSONL. Rekordy do offsetu z punktu
+    kontrolnego są pełne; za nim mogą być rekordy zapisane tuż przed awarią, zanim punkt kontrolny
+    został zaktualizowany (albo punkt kontrolny nie powstał). Te są zachowywane, jeśli są pełnymi,
+    poprawnymi wierszami - wznowienie obcina plik dopiero od pierwszego urwanego lub uszkodzonego.
+    """
+    if not os.path.exists(jsonl_path):
+        return 0, set()
+    checkpoint_offset = 0
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as file:
+            checkpoint_offset = json.load(file).get("offset", 0)
+    offset = 0
+    written = set()
+    with open(jsonl_path, "rb") as file:
+        for line in file:
+            if offset + len(line) > checkpoint_offset and not line.endswith(b"\n"):
+                break
+            try:
+                written.add(json.loads(line)["video_id"])
+            except (ValueError, KeyError, TypeError):
+                break
+            offset += len(line)
+    return offset, written
+
+
+def _write_jsonl_checkpoint(checkpoint_path, offset, count):
+    atomic_write(checkpoint_path, json.dumps({"offset": offset, "count": count}))
+
+
+def export_to_jsonl(videos, output_dir, fetch, on_progress=None, manifest=None, cancel_event=None):
+    """
+    Strumieniowy eksport do transcripts.jsonl: każdy rekord jest zapisywany zaraz po pobraniu,
+    a punkt kontrolny (transcripts.jsonl.checkpoint) pozwala wznowić przerwany eksport
+    od pierwszego niezapisanego filmu. Niepełny ostatni rekord jest odrzucany przy wznowieniu.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jsonl_path = os.path.join(output_dir, "transcripts.jsonl")
+    checkpoint_path = jsonl_path + ".checkpoint"
+    offset, written = _read_jsonl_checkpoint(jsonl_path, checkpoint_path)
+    if written and on_progress:
+        on_progress(f"Wznawianie eksportu: zapisano już {len(written)} transkrypcji.")
+
+    with open(jsonl_path, "ab") as jsonl_file:
+        jsonl_file.truncate(offset)
+        for video_id, publish_date, title in videos:
+            if cancel_event and cancel_event.is_set():
+                break
+            if video_id in written:
+                continue
+            if on_progress:
+                on_progress(f"Pobieranie transkrypcji dla wideo: {title}")
+            transcript = fetch(video_id)
+            if transcript is None:
+                continue
+            record = {
+                "video_id": video_id,
+                "publish_date": publish_date,
+                "title": title,
+                "transcript": transcript
+            }
+            data = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+            with metrics.timer("file_write"):
+                jsonl_file.write(data)
+                jsonl_file.flush()
+                os.fsync(jsonl_file.fileno())
+            metrics.count("bytes_written", len(data))
+            written.add(video_id)
+            _write_jsonl_checkpoint(checkpoint_path, jsonl_file.tell(), len(written))
+            if manifest:
+                manifest.set_status(video_id, "downloaded")
+            if on_progress:
+                on_progress(f"Transkrypcja dla wideo {title} zapisana do JSONL.")
+    if manifest:
+        manifest.save()
+    return jsonl_path
@@ -0,0 +1,141 @@
+"""
+Formaty zapisu transkrypcji. Jedno przejście po segmentach zapisuje dowolny zestaw formatów
+(TXT, TXT ze znacznikami czasu, SRT, WebVTT, JSONL) bezpośrednio do otwartych plików, bez składania
+całego tekstu w pamięci. Parser SRT/WebVTT czyta napisy wiersz po wierszu i zwraca segmenty
+w formacie youtube_transcript_api ({"text", "start", "duration"}).
+"""
+import io
+import json
+import os
+import re
+from contextlib import ExitStack
+
+FORMATS = ("txt", "timestamped", "srt", "vtt", "jsonl")
+# Rozszerzenia plików; TXT ze znacznikami czasu nie może nadpisać zwykłego TXT
+EXTENSIONS = {"txt": "txt", "timestamped": "timestamps.txt", "srt": "srt", "vtt": "vtt", "jsonl": "jsonl"}
+HEADERS = {"vtt": "WEBVTT\n\n"}
+
+TIMING = re.compile(
+    r"(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})")
+TAG = re.compile(r"<[^>]*>")
+
+
+def _timestamp(seconds, separator):
+    milliseconds = max(0, round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02}{separator}{milliseconds:03}"
+
+
+def srt_timestamp(seconds):
+    return _timestamp(seconds, ",")
+
+
+def vtt_timestamp(seconds):
+    return _timestamp(seconds, ".")
+
+
+def _render_txt(number, start, duration, text):
+    return text.strip() + "\n"
+
+
+def _render_timestamped(number, start, duration, text):
+    return f"[{start:.2f}] {text}\n"
+
+
+def _cue_text(text):
+    # Pusty wiersz kończy blok napisu, więc tekst nie może go zawierać
+    text = text.strip()
+    if "\n" in text:
+        text = "\n".join(line for line in text.splitlines() if line.strip())
+    return text
+
+
+def _render_srt(number, start, duration, text):
+    return f"{number}\n{srt_timestamp(start)} --> {srt_timestamp(start + duration)}\n{_cue_text(text)}\n\n"
+
+
+def _render_vtt(number, start, duration, text):
+    return f"{vtt_timestamp(start)} --> {vtt_timestamp(start + duration)}\n{_cue_text(text)}\n\n"
+
+
+def _render_jsonl(number, start, duration, text):
+    return json.dumps({"start": start, "duration": duration, "text": text}, ensure_ascii=False) + "\n"
+
+
+RENDERERS = {
+    "txt": _render_txt,
+    "timestamped": _render_timestamped,
+    "srt": _render_srt,
+    "vtt": _render_vtt,
+    "jsonl": _render_jsonl,
+}
+
+
+def write_segments(segments, outputs):
+    """
+    Zapisz segmenty do wszystkich plików naraz: outputs to słownik {format: otwarty plik tekstowy}.
+    Każdy segment jest formatowany i zapisywany od razu, więc pamięć nie rośnie z długością transkrypcji.
+    Zwraca liczbę segmentów.
+    """
+    writers = []
+    for file_format, file in outputs.items():
+        if file_format in HEADERS:
+            file.write(HEADERS[file_format])
+        writers.append((RENDERERS[file_format], file.write))
+    count = 0
+    for count, segment in enumerate(segments, 1):
+        start, duration, text = segment["start"], segment.get("duration", 0.0), segment["text"]
+        for render, write in writers:
+            write(render(count, start, duration, text))
+    return count
+
+
+def write_files(segments, base_path, formats):
+    # Pliki base_path.<rozszerzenie> dla każdego formatu; zwraca {format: (ścieżka, liczba bajtów)}
+    paths = {file_format: f"{base_path}.{EXTENSIONS[file_format]}" for file_format in formats}
+    with ExitStack() as stack:
+        files = {file_format: stack.enter_context(open(path, "w", encoding="utf-8", newline="\n"))
+                 for file_format, path in paths.items()}
+        write_segments(segments, files)
+    return {file_format: (path, os.path.getsize(path)) for file_format, path in paths.items()}
+
+
+def parse_captions(captions):
+    """
+    Segmenty z napisów SRT lub WebVTT. `captions` to tekst albo iterowalne wiersze (np. otwarty plik),
+    czytane po kolei bez dzielenia całości na listę. Numery bloków, nagłówek WEBVTT, komentarze NOTE
+    i identyfikatory wskazówek są pomijane; znaczniki formatowania (<i>, <c>, ...) są usuwane.
+    """
+    if isinstance(captions, str):
+        captions = io.StringIO(captions)
+    start = end = None
+    text_lines = []
+    for line in captions:
+        line = line.strip().lstrip("\ufeff")
+        if not line:
+            if start is not None and text_lines:
+                yield _segment(start, end, text_lines)
+            start, text_lines = None, []
+            continue
+        if "-->" in line:
+            match = TIMING.search(line)
+            if match:
+                if start is not None and text_lines:
+                    yield _segment(start, end, text_lines)
+                start, end, text_lines = _seconds(match.groups()[:4]), _seconds(match.groups()[4:]), []
+                continue
+        if start is not None:
+            text_lines.append(TAG.sub("", line) if "<" in line else line)
+    if start is not None and text_lines:
+        yield _segment(start, end, text_lines)
+
+
+def _seconds(groups):
+    hours, minutes, seconds, fraction = groups
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(fraction.ljust(3, "0")) / 1000
+
+
+def _segment(start, end, text_lines):
+    return {"text": " ".join(text_lines), "start": start, "duration": round(max(0.0, end - start), 3)}
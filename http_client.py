@@ -0,0 +1,122 @@
+"""
+Wspólna warstwa HTTP: jedna sesja requests z pulą połączeń keep-alive dla wszystkich zapytań
+(YouTube Data API, listy i treść transkrypcji, tytuły, miniatury). Skanowanie kanału korzysta
+z kilku "ciepłych" połączeń zamiast otwierać nowe połączenie TLS dla każdego zapytania.
+"""
+import functools
+import threading
+from urllib.parse import urlsplit
+
+import metrics
+from quota import api_resource
+
+# Maksymalna liczba otwartych połączeń do jednego hosta
+DEFAULT_POOL_SIZE = 16
+# Limit czasu (połączenie, odczyt) w sekundach dla zapytań bez własnego limitu
+DEFAULT_TIMEOUT = (5, 20)
+DEFAULT_RETRIES = 2
+
+_session = None
+_settings = {}
+_lock = threading.Lock()
+
+
+@functools.cache
+def _session_class():
+    # requests jest importowany dopiero przy pierwszym zapytaniu, a nie przy starcie aplikacji
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class PooledSession(requests.Session):
+        # Sesja z ograniczoną pulą połączeń na host i domyślnym limitem czasu dla każdego zapytania
+        def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+            super().__init__()
+            self.timeout = timeout
+            # pool_block: przy wyczerpanej puli czekaj na wolne połączenie zamiast otwierać kolejne
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size, max_retries=retries, pool_block=True)
+            self.mount("https://", adapter)
+            self.mount("http://", adapter)
+
+        def request(self, method, url, **kwargs):
+            if kwargs.get("timeout") is None:
+                kwargs["timeout"] = self.timeout
+            host = urlsplit(url).hostname
+            with metrics.timer("http_request", host=host):
+                response = super().request(method, url, **kwargs)
+            # Przy odczycie strumieniowym treść nie jest jeszcze pobrana - liczy ją wywołujący
+            if not kwargs.get("stream"):
+                metrics.count("http_bytes", len(response.content), host=host)
+            return response
+
+    return PooledSession
+
+
+def _create_session(settings):
+    timeout = settings.get("http_timeout")
+    return _session_class()(
+        pool_size=settings.get("http_pool_size", DEFAULT_POOL_SIZE),
+        timeout=(DEFAULT_TIMEOUT[0], timeout) if timeout else DEFAULT_TIMEOUT,
+        retries=settings.get("http_retries", DEFAULT_RETRIES)
+    )
+
+
+def configure(settings):
+    # Ustawienia wspólnej sesji: http_pool_size, http_timeout, http_retries. Sesja powstaje przy pierwszym użyciu
+    global _session, _settings
+    with _lock:
+        previous, _session, _settings = _session, None, dict(settings)
+    if previous is not None:
+        previous.close()
+
+
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _create_session(_settings)
+        return _session
+
+
+def get(url, **kwargs):
+    return get_session().get(url, **kwargs)
+
+
+def list_transcripts(video_id):
+    # Odpowiednik YouTubeTranscriptApi.list_transcripts, ale na wspólnej sesji zamiast nowej przy każdym wywołaniu
+    from youtube_transcript_api._transcripts import TranscriptListFetcher
+    with metrics.timer("list_transcripts"):
+        return TranscriptListFetcher(get_session()).fetch(video_id)
+
+
+class GoogleHttp:
+    """
+    Obiekt zgodny z httplib2.Http dla googleapiclient, wysyłający zapytania przez wspólną sesję.
+    W przeciwieństwie do httplib2.Http może być używany jednocześnie z wielu wątków.
+    Z harmonogramem (quota.QuotaScheduler) zapytania są liczone w dziennym limicie i ponawiane przy dławieniu.
+    """
+
+    def __init__(self, session=None, scheduler=None):
+        self.session = session
+        self.scheduler = scheduler
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        import httplib2
+
+        def send():
+            session = self.session or get_session()
+            response = session.request(method, uri, data=body, headers=headers,
+                                       allow_redirects=redirections > 0)
+            info = {key.lower(): value for key, value in response.headers.items()}
+            # requests już rozpakował treść - tak jak httplib2 nie przekazuj dalej kodowania
+            info.pop("content-encoding", None)
+            info["status"] = str(response.status_code)
+            return response.status_code, response.content, (httplib2.Response(info), response.content)
+
+        with metrics.timer("api_call", resource=api_resource(uri)):
+            if self.scheduler is None:
+                return send()[2]
+            return self.scheduler.request(send, uri)
+
+    def close(self):
+        # Wspólna sesja żyje przez cały czas działania aplikacji
+        pass
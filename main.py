@@ -1,32 +1,90 @@
-import json
 import os
-import re
 import sys
-from datetime import datetime
 
-import requests
 from PyQt5 import QtWidgets, QtGui, QtCore
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
-from pytube import YouTube  # Dodano import pytube
+
+import core
+import http_client
+import metrics
+import transcript_probe
+from background import TaskPool
+
+# Co ile milisekund wyniki skanowania trafiają na listę i do etykiet postępu
+SCAN_REFRESH_MS = 250
+
+
+class VideoListModel(QtCore.QAbstractListModel):
+    """
+    Filmy kanału dla QListView. Tekst wiersza jest składany dopiero przy rysowaniu widocznych
+    wierszy, a nowe filmy są wstawiane partiami, więc lista z dziesiątkami tysięcy filmów nie
+    tworzy osobnego obiektu dla każdego wiersza.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.videos = []
+
+    def set_videos(self, videos):
+        self.beginResetModel()
+        self.videos = list(videos)
+        self.endResetModel()
+
+    def insert_videos(self, row, videos):
+        if not videos:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(videos) - 1)
+        self.videos[row:row] = videos
+        self.endInsertRows()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.videos)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        video = self.videos[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            transcript_available = "📄" if video.transcript_available else "📒"
+            return f"{video.publish_date} - {video.title} ({video.duration}) {transcript_available}"
+        if role == QtCore.Qt.UserRole:
+            return video.video_id, video.publish_date, video.title
+        return None
+
 
 class YouTubeTranscriptApp(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
         self.youtube_client = None
         self.channel_id = None
+        self.channel = None
         self.channel_title = ""
         self.subscribers = "0"
         self.video_count = "0"
         self.channel_thumbnail_url = ""
-        self.video_data = []
-        self.transcriptions = {}  # Przechowuj transkrypcje w pamięci
+        self.uploads_playlist_id = None
+        self.manifest = None
 
         # Wczytaj ustawienia
         self.settings = self.load_settings()
+
+        # Transkrypcje przechowywane na dysku między uruchomieniami
+        http_client.configure(self.settings)
+        transcript_probe.configure(self.settings)
+        if self.settings.get("trace_path"):
+            metrics.enable_trace()
+        # Wspólny dla całej sesji licznik jednostek limitu YouTube Data API
+        self.quota = core.create_scheduler(self.settings)
+        self.transcript_cache = core.create_cache(self.settings)
+        self.search_index = core.create_index(self.settings)
+
+        # Cała komunikacja sieciowa odbywa się w ograniczonej puli zadań w tle
+        self.tasks = TaskPool(self.settings.get("max_background_jobs", 4))
+        self.current_task = None
         self.init_ui()
+        # Klient Data API z zapisanego klucza powstaje w tle, już po pokazaniu okna
+        if self.settings.get("api_key"):
+            self.tasks.start(lambda worker: core.build_client(self.settings["api_key"], self.quota),
+                             on_result=self.on_client_ready)
 
     def init_ui(self):
         # Inicjalizacja interfejsu użytkownika
@@ -88,17 +146,38 @@ class YouTubeTranscriptApp(QtWidgets.QWidget):
         self.status_label = QtWidgets.QLabel("", self)
         self.status_label.setStyleSheet('font-size: 18px;')
 
-        # Widok listy wideo
-        self.video_list_widget = QtWidgets.QListWidget(self)
-        self.video_list_widget.setFixedHeight(400)
-        self.video_list_widget.setStyleSheet('font-size: 20px;')
-        self.video_list_widget.itemClicked.connect(self.on_video_item_clicked)
+        # Widok listy wideo; wiersze mają jednakową wysokość, więc widok nie mierzy każdego z osobna
+        self.video_model = VideoListModel(self)
+        self.video_list_view = QtWidgets.QListView(self)
+        self.video_list_view.setModel(self.video_model)
+        self.video_list_view.setUniformItemSizes(True)
+        self.video_list_view.setFixedHeight(400)
+        self.video_list_view.setStyleSheet('font-size: 20px;')
+        self.video_list_view.clicked.connect(self.on_video_item_clicked)
+
+        # Wyniki skanowania są zbierane i dodawane do listy kilka razy na sekundę, a nie po każdym filmie
+        self.scan_refresh_timer = QtCore.QTimer(self)
+        self.scan_refresh_timer.setInterval(SCAN_REFRESH_MS)
+        self.scan_refresh_timer.timeout.connect(self.flush_scanned_videos)
 
         # Przyciski do pobierania filmów
         self.fetch_videos_button = QtWidgets.QPushButton("Pobierz listę filmów", self)
         self.fetch_videos_button.setFixedWidth(200)
         self.fetch_videos_button.setFixedHeight(50)
-        self.fetch_videos_button.clicked.connect(self.fetch_videos)
+        self.fetch_videos_button.clicked.connect(lambda: self.fetch_videos())
+
+        # Synchronizacja pobiera tylko filmy opublikowane od ostatniego uruchomienia
+        self.sync_videos_button = QtWidgets.QPushButton("Synchronizuj", self)
+        self.sync_videos_button.setFixedWidth(160)
+        self.sync_videos_button.setFixedHeight(50)
+        self.sync_videos_button.clicked.connect(lambda: self.fetch_videos(incremental=True))
+
+        # Przerwanie trwającego skanowania lub eksportu
+        self.cancel_button = QtWidgets.QPushButton("Anuluj", self)
+        self.cancel_button.setFixedWidth(120)
+        self.cancel_button.setFixedHeight(50)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_current_task)
 
         # Pole do wyświetlania procentu pobierania filmów
         self.download_progress_label = QtWidgets.QLabel("0%", self)
@@ -117,6 +196,10 @@ class YouTubeTranscriptApp(QtWidgets.QWidget):
         self.export_json_button.setEnabled(True)
         self.export_json_button.clicked.connect(self.export_to_json)
 
+        # Eksport strumieniowy zapisuje każdy rekord od razu i można go wznowić po przerwaniu
+        self.json_stream_checkbox = QtWidgets.QCheckBox("Zapis strumieniowy (.jsonl) z możliwością wznowienia", self)
+        self.json_stream_checkbox.setChecked(self.settings.get("json_stream", False))
+
         # Layout
         form_layout = QtWidgets.QGridLayout()
 
@@ -133,12 +216,17 @@ class YouTubeTranscriptApp(QtWidgets.QWidget):
         form_layout.addWidget(self.output_dir_input, 3, 1)
         form_layout.addWidget(self.output_dir_button, 3, 2)
 
-        form_layout.addWidget(self.fetch_videos_button, 4, 0)
+        fetch_buttons_layout = QtWidgets.QHBoxLayout()
+        fetch_buttons_layout.addWidget(self.fetch_videos_button)
+        fetch_buttons_layout.addWidget(self.sync_videos_button)
+        fetch_buttons_layout.addWidget(self.cancel_button)
+        form_layout.addLayout(fetch_buttons_layout, 4, 0)
         form_layout.addWidget(self.download_progress_label, 4, 1, 1, 2)
-        form_layout.addWidget(self.video_list_widget, 5, 0, 1, 3)
+        form_layout.addWidget(self.video_list_view, 5, 0, 1, 3)
         form_layout.addWidget(self.export_txt_button, 6, 0, 1, 3)
         form_layout.addWidget(self.export_json_button, 7, 0, 1, 3)
-        form_layout.addWidget(self.status_label, 8, 0, 1, 3)
+        form_layout.addWidget(self.json_stream_checkbox, 8, 0, 1, 3)
+        form_layout.addWidget(self.status_label, 9, 0, 1, 3)
 
         self.setLayout(form_layout)
 
@@ -171,7 +259,7 @@ class YouTubeTranscriptApp(QtWidgets.QWidget):
                 font-size: 20px;
                 border-radius: 5px;
             }
-            QListWidget {
+            QListView {
                 background-color: #ffffff;
                 border: 1px solid #d0d0d0;
                 padding: 5px;
@@ -184,24 +272,69 @@ class YouTubeTranscriptApp(QtWidgets.QWidget):
             }
         """
 
+    def show_error(self, message):
+        self.status_label.setText(message)
+        self.status_label.setStyleSheet('color: #dc3545; font-weight: bold;')
+
+    def start_long_task(self, fn, *args, **kwargs):
+        # Skanowanie i eksport: tylko jedno naraz, z możliwością anulowania
+        self.current_task = self.tasks.start(fn, *args, on_finished=self.on_long_task_finished, **kwargs)
+        self.set_busy(True)
+        return self.current_task
+
+    def on_long_task_finished(self):
+        self.current_task = None
+        self.set_busy(False)
+
+    def set_busy(self, busy):
+        for button in (self.fetch_videos_button, self.sync_videos_button, self.export_txt_button,
+                       self.export_json_button, self.fetch_channel_button):
+            button.setEnabled(not busy)
+        self.cancel_button.setEnabled(busy)
+
+    def cancel_current_task(self):
+        if self.current_task:
+            self.current_task.cancel()
+            self.status_label.setText("Anulowanie...")
+
+    def closeEvent(self, event):
+        self.tasks.cancel_all()
+        # Pomiary sesji zapisywane przy zamknięciu, jeżeli wskazano pliki w settings.json
+        if self.settings.get("metrics_path"):
+            metrics.write(self.settings["metrics_path"])
+        if self.settings.get("trace_path"):
+            metrics.write_trace(self.settings["trace_path"])
+        super().closeEvent(event)
+
     def save_api_key(self):
-        # Zapisz klucz API
+        # Zapisz klucz API; klient powstaje z lokalnego dokumentu discovery,
+        # ale import googleapiclient trwa, więc w tle
         api_key = self.api_key_input.text()
         if api_key:
-            try:
-                self.youtube_client = build("youtube", "v3", developerKey=api_key)
-                self.status_label.setText("🔑 Klucz API zapisano pomyślnie.")
-                self.api_key_input.setStyleSheet(
-                    "background-color: #ccffcc; border: 1px solid #28a745;")  # Zielony po zapisaniu klucza API
-
-                # Zapisz ustawienia do pliku
-                self.settings['api_key'] = api_key
-                self.save_settings()
-            except Exception as e:
-                self.status_label.setText(f"🔐 Błąd zapisu klucza API: {e}")
-                self.api_key_input.setStyleSheet(
-                    "background-color: #ffcccc; border: 1px solid #dc3545;")  # Czerwony, jeśli wystąpił błąd
-                self.status_label.setStyleSheet('color: #dc3545; font-weight: bold;')
+            self.save_api_key_button.setEnabled(False)
+            self.tasks.start(lambda worker: core.build_client(api_key, self.quota),
+                             on_result=lambda client: self.on_api_key_saved(api_key, client),
+                             on_error=self.on_api_key_error,
+                             on_finished=lambda: self.save_api_key_button.setEnabled(True))
+
+    def on_client_ready(self, client):
+        if self.youtube_client is None:
+            self.youtube_client = client
+
+    def on_api_key_saved(self, api_key, client):
+        self.youtube_client = client
+        self.status_label.setText("🔑 Klucz API zapisano pomyślnie.")
+        self.api_key_input.setStyleSheet(
+            "background-color: #ccffcc; border: 1px solid #28a745;")  # Zielony po zapisaniu klucza API
+
+        # Zapisz ustawienia do pliku
+        self.settings['api_key'] = api_key
+        self.save_settings()
+
+    def on_api_key_error(self, e):
+        self.show_error(f"🔐 Błąd zapisu klucza API: {e}")
+        self.api_key_input.setStyleSheet(
+            "background-color: #ffcccc; border: 1px solid #dc3545;")  # Czerwony, jeśli wystąpił błąd
 
     def fetch_channel_info(self):
         # Pobierz ID kanału YouTube na podstawie URL
@@ -212,83 +345,64 @@ class YouTubeTranscriptApp(QtWidgets.QWidget):
             self.save_settings()
 
         if not self.youtube_client:
-            self.status_label.setText("🔐 Klucz API nie został zapisany.")
-            self.status_label.setStyleSheet('color: #dc3545; font-weight: bold;')
+            self.show_error("🔐 Klucz API nie został zapisany.")
             return
 
+        self.status_label.setText("Wczytywanie kanału...")
+        self.fetch_channel_button.setEnabled(False)
+        self.tasks.start(self.load_channel, channel_url,
+                         on_result=self.on_channel_loaded,
+                         on_error=self.on_channel_error,
+                         on_finished=lambda: self.fetch_channel_button.setEnabled(self.current_task is None))
+
+    def load_channel(self, worker, channel_url):
+        # Wątek w tle: ID kanału, statystyki i miniaturka
+        channel_id = self.get_channel_id_from_url(channel_url)
         try:
-            self.channel_id = self.get_channel_id_from_url(channel_url)
-            self.fetch_channel_statistics()
-            self.update_channel_info()
-        except ValueError as e:
-            self.status_label.setText(str(e))
-            self.status_label.setStyleSheet('color: #dc3545; font-weight: bold;')
+            channel = core.fetch_channel_statistics(self.youtube_client, channel_id)
         except Exception as e:
-            self.status_label.setText(f"Błąd: {e}")
-            self.status_label.setStyleSheet('color: #dc3545; font-weight: bold;')
+            return core.ChannelInfo(channel_id), b"", e
+        thumbnail = self.fetch_image_data(channel.thumbnail_url) if channel.thumbnail_url else b""
+        return channel, thumbnail, None
+
+    def on_channel_loaded(self, result):
+        channel, thumbnail, statistics_error = result
+        self.channel = channel
+        self.channel_id = channel.channel_id
+        self.channel_title = channel.title
+        self.subscribers = channel.subscribers
+        self.video_count = channel.video_count
+        self.channel_thumbnail_url = channel.thumbnail_url
+        self.uploads_playlist_id = channel.uploads_playlist_id
+        self.update_channel_info(thumbnail)
+        if statistics_error:
+            self.show_error(f"Błąd pobierania statystyk kanału: {statistics_error}")
+        else:
+            self.status_label.setText("")
+
+    def on_channel_error(self, e):
+        if isinstance(e, ValueError):
+            self.show_error(str(e))
+        else:
+            self.show_error(f"Błąd: {e}")
 
     def load_settings(self):
         # Wczytaj ustawienia z pliku settings.json
-        if os.path.exists("settings.json"):
-            with open("settings.json", "r", encoding="utf-8") as file:
-                return json.load(file)
-        return {}
+        return core.load_settings()
 
     def save_settings(self):
         # Zapisz ustawienia do pliku settings.json
-        with open("settings.json", "w", encoding="utf-8") as file:
-            json.dump(self.settings, file, indent=4, ensure_ascii=False)
+        core.save_settings(self.settings)
 
     def get_channel_id_from_url(self, channel_url):
         # Metoda do wyodrębnienia ID kanału z URL
-        if "channel/" in channel_url:
-            return channel_url.split("channel/")[1]
-        elif "@" in channel_url:
-            username = channel_url.split("@")[1]
-            request = self.youtube_client.search().list(
-                part="snippet",
-                q=username,
-                type="channel",
-                maxResults=1
-            )
-            response = request.execute()
-            if "items" in response and len(response["items"]) > 0:
-                return response["items"][0]["snippet"]["channelId"]
-        else:
-            request = self.youtube_client.channels().list(
-                part="id",
-                forUsername=channel_url.split("/")[-1]
-            )
-            response = request.execute()
-            if "items" in response and len(response["items"]) > 0:
-                return response["items"][0]["id"]
-        raise ValueError("Nie udało się znaleźć ID kanału dla podanego URL.")
-
-    def fetch_channel_statistics(self):
-        # Pobierz statystyki kanału, w tym liczbę subskrybentów
-        if not self.youtube_client or not self.channel_id:
-            return
-        try:
-            request = self.youtube_client.channels().list(
-                part="snippet,statistics",
-                id=self.channel_id
-            )
-            response = request.execute()
-            if "items" in response and len(response["items"]) > 0:
-                channel_info = response["items"][0]
-                self.channel_title = channel_info["snippet"]["title"]
-                self.subscribers = channel_info["statistics"].get("subscriberCount", "N/A")
-                self.video_count = channel_info["statistics"].get("videoCount", "0")
-                self.channel_thumbnail_url = channel_info["snippet"]["thumbnails"]["default"]["url"]
-        except Exception as e:
-            self.status_label.setText(f"Błąd pobierania statystyk kanału: {e}")
-            self.status_label.setStyleSheet('color: #dc3545; font-weight: bold;')
+        return core.get_channel_id_from_url(self.youtube_client, channel_url)
 
-    def update_channel_info(self):
+    def update_channel_info(self, thumbnail=b""):
         # Aktualizuj informacje o kanale w interfejsie użytkownika
-        if self.channel_thumbnail_url:
+        if thumbnail:
             image = QtGui.QImage()
-            image.loadFromData(self.fetch_image_data(self.channel_thumbnail_url))
+            image.loadFromData(thumbnail)
             pixmap = QtGui.QPixmap(image)
 
             # Stwórz zaokrąglony obraz miniaturki
@@ -311,7 +425,7 @@ class YouTubeTranscriptApp(QtWidgets.QWidget):
 
     def fetch_image_data(self, url):
         # Pobierz dane obrazu z URL
-        response = requests.get(url)
+        response = http_client.get(url, timeout=10)
         if response.status_code == 200:
             return response.content
         return b""
@@ -325,264 +439,197 @@ class YouTubeTranscriptApp(QtWidgets.QWidget):
             self.output_dir_input.setText(directory)
             self.status_label.setText(f"Wybrano katalog: {directory}")
 
-    def fetch_videos(self):
+    def fetch_videos(self, incremental=False):
         """
         Zaktualizowana metoda pobierania listy wideo, w tym informacje o dostępności napisów.
+        W trybie przyrostowym pobierane są tylko filmy nieobecne w manifeście kanału.
+        Skanowanie działa w tle, a wyniki trafiają na listę przez sygnały postępu.
         """
         if not self.youtube_client or not self.channel_id:
-            self.status_label.setText("🔐 Klucz API lub ID kanału nie zostało zapisane.")
-            self.status_label.setStyleSheet('color: #dc3545; font-weight: bold;')
+            self.show_error("🔐 Klucz API lub ID kanału nie zostało zapisane.")
             return
 
         self.status_label.setText("Pobieranie listy wideo...")
-        self.video_data = []
-        self.video_list_widget.clear()  # Wyczyść listę przed dodaniem nowych elementów
-
-        # Ustawienia początkowe do stronicowania
-        page_token = None
-        total_videos = int(self.video_count) if self.video_count.isdigit() else 0
-        videos_processed = 0
-
-        while True:
-            try:
-                request = self.youtube_client.search().list(
-                    part="id,snippet",
-                    channelId=self.channel_id,
-                    maxResults=50,
-                    type="video",
-                    pageToken=page_token,
-                    order="date"
-                )
-                response = request.execute()
-
-                items = response.get("items", [])
-                for item in items:
-                    video_id = item["id"].get("videoId")
-                    if video_id:
-                        title = item["snippet"]["title"]
-                        publish_date = item["snippet"]["publishedAt"]
-                        publish_date_formatted = datetime.strptime(publish_date, "%Y-%m-%dT%H:%M:%SZ").strftime("%d.%m.%Y")
-
-                        # Sprawdzenie, czy transkrypcja jest dostępna
-                        transcript_available = "📄" if self.is_transcript_available(video_id) else "📒"
-
-                        # Dodaj element bezpośrednio do widoku listy
-                        duration = self.get_video_duration(video_id)
-                        list_item = QtWidgets.QListWidgetItem(
-                            f"{publish_date_formatted} - {title} ({duration}) {transcript_available}"
-                        )
-                        list_item.setData(QtCore.Qt.UserRole, (video_id, publish_date_formatted, title))
-                        self.video_list_widget.addItem(list_item)
-
-                        # Automatyczne przewijanie listy
-                        self.video_list_widget.scrollToItem(list_item)
-
-                        # Aktualizuj liczbę przetworzonych filmów
-                        videos_processed += 1
-                        percentage_completed = int((videos_processed / total_videos) * 100) if total_videos > 0 else 100
-                        self.download_progress_label.setText(f"{percentage_completed}%")
-                        self.status_label.setText(f"Pobrano {videos_processed} z {total_videos} filmów")
-
-                        # Przetwarzanie wydarzeń Qt, aby interfejs był responsywny
-                        QtCore.QCoreApplication.processEvents()
-
-                # Sprawdź, czy jest następna strona wyników
-                page_token = response.get("nextPageToken")
-                if not page_token:
-                    break
-
-            except HttpError as e:
-                self.status_label.setText(f"Błąd pobierania filmów: {e}")
-                self.status_label.setStyleSheet('color: #dc3545; font-weight: bold;')
-                break
-
-        self.status_label.setText("Pobieranie zakończone.")
+        self.video_model.set_videos([])  # Wyczyść listę przed dodaniem nowych elementów
+        from channel_manifest import ChannelManifest
+        self.manifest = ChannelManifest(self.channel_id)
+
+        self.scan_state = {
+            "incremental": incremental,
+            "total": int(self.video_count) if self.video_count.isdigit() else 0,
+            "processed": 0,
+            "new_videos": [],
+            # Filmy zeskanowane od ostatniego odświeżenia listy
+            "pending": [],
+            # Filmy już widoczne na liście (wznowione skanowanie zwraca je ponownie)
+            "shown": set(),
+            "inserted": 0,
+        }
+        if incremental:
+            # Pokaż filmy znane z poprzednich uruchomień i dociągnij tylko nowe
+            self.video_model.set_videos(self.manifest.video_infos())
+            self.scan_state["shown"] = set(self.manifest.known_ids)
+            self.scan_state["processed"] = self.video_model.rowCount()
+        self.scan_refresh_timer.start()
+
+        channel = self.channel or core.ChannelInfo(self.channel_id, uploads_playlist_id=self.uploads_playlist_id)
+        self.start_long_task(self.run_scan, channel, incremental,
+                             on_progress=self.on_video_scanned, on_result=self.on_scan_finished,
+                             on_error=self.on_scan_error)
+
+    def run_scan(self, worker, channel, incremental):
+        # Wątek w tle: listowanie stron, sprawdzanie napisów i metadane działają współbieżnie w skanerze
+        scanner = core.create_scanner(self.youtube_client, channel, self.settings,
+                                      manifest=self.manifest if incremental else None,
+                                      cancel_event=worker.cancel_event)
+        for video in scanner.scan():
+            worker.report(video)
+        return scanner
+
+    def on_video_scanned(self, video):
+        self.scan_state["pending"].append(video)
+
+    def flush_scanned_videos(self):
+        state = self.scan_state
+        pending = state["pending"]
+        if not pending:
+            return
+        state["pending"] = []
+        fresh = [video for video in pending if video.video_id not in state["shown"]]
+        state["shown"].update(video.video_id for video in fresh)
+        # Nowe filmy trafiają na początek listy przy synchronizacji
+        row = state["inserted"] if state["incremental"] else self.video_model.rowCount()
+        if fresh:
+            self.video_model.insert_videos(row, fresh)
+            state["inserted"] += len(fresh)
+            # Automatyczne przewijanie do ostatniego dodanego filmu
+            self.video_list_view.scrollTo(self.video_model.index(row + len(fresh) - 1))
+        state["new_videos"].extend(pending)
+
+        # Aktualizuj liczbę przetworzonych filmów
+        state["processed"] += len(pending)
+        total_videos = state["total"]
+        percentage_completed = int((state["processed"] / total_videos) * 100) if total_videos > 0 else 100
+        self.download_progress_label.setText(f"{percentage_completed}%")
+        self.status_label.setText(f"Pobrano {state['processed']} z {total_videos} filmów")
+
+    def on_scan_finished(self, scanner):
+        self.scan_refresh_timer.stop()
+        self.flush_scanned_videos()
+        new_videos = self.scan_state["new_videos"]
+        self.manifest.merge(new_videos)
+        self.manifest.scan_finished(scanner)
+        self.manifest.save()
+        scanner.clear_checkpoint()
+        self.search_index.set_titles({video.video_id: video.title for video in new_videos})
+
+        if scanner.error:
+            # Jeden komunikat: błąd, liczba pobranych filmów i pozostały limit
+            self.show_error(f"Błąd pobierania filmów: {scanner.error}\n"
+                            f"Pobrano {len(new_videos)} filmów. {self.quota_status()}")
+            return
+        if scanner.cancelled:
+            self.status_label.setText(f"Pobieranie anulowane. Pobrano {len(new_videos)} filmów. {self.quota_status()}")
+            return
+
+        if scanner.resumed:
+            self.status_label.setText(f"Wznowiono przerwane skanowanie ({len(scanner.resumed)} filmów z punktu "
+                                      f"kontrolnego). Pobrano {len(new_videos)} filmów. {self.quota_status()}")
+        elif self.scan_state["incremental"]:
+            self.status_label.setText(f"Synchronizacja zakończona. Nowe filmy: {len(new_videos)}. "
+                                      f"{self.quota_status()}")
+        else:
+            self.status_label.setText(f"Pobieranie zakończone. {self.quota_status()}")
         self.download_progress_label.setText("100%")
 
-    def is_transcript_available(self, video_id):
-        try:
-            # Spróbuj użyć YouTubeTranscriptApi
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            return True
-        except Exception as e:
-            print(f"YouTubeTranscriptApi nie może pobrać transkrypcji: {e}")
-            # Spróbuj użyć pytube jako alternatywy
-            try:
-                yt = YouTube(f'https://www.youtube.com/watch?v={video_id}')
-                captions = yt.captions
-                if captions:
-                    return True
-                else:
-                    return False
-            except Exception as e:
-                print(f"pytube nie może pobrać transkrypcji: {e}")
-                return False
-
-    def get_video_duration(self, video_id):
-        # Pobierz długość filmu na podstawie jego ID
-        try:
-            request = self.youtube_client.videos().list(
-                part="contentDetails",
-                id=video_id
-            )
-            response = request.execute()
-            if "items" in response and len(response["items"]) > 0:
-                duration = response["items"][0]["contentDetails"]["duration"]
-                return self.parse_duration(duration)
-        except Exception as e:
-            return "00:00"
-
-    def parse_duration(self, duration):
-        # Parsuj czas trwania w formacie ISO 8601 do formatu czytelnego dla człowieka (HH:MM:SS)
-        hours = minutes = seconds = 0
-        duration = duration.replace("PT", "")
-        if "H" in duration:
-            hours = int(duration.split("H")[0])
-            duration = duration.split("H")[1]
-        if "M" in duration:
-            minutes = int(duration.split("M")[0])
-            duration = duration.split("M")[1]
-        if "S" in duration:
-            seconds = int(duration.split("S")[0])
-        return f"{hours:02}:{minutes:02}:{seconds:02}"
-
-    def on_video_item_clicked(self, item):
+    def on_scan_error(self, e):
+        self.scan_refresh_timer.stop()
+        self.flush_scanned_videos()
+        self.show_error(f"Błąd pobierania filmów: {e}")
+
+    def quota_status(self):
+        return f"Pozostały limit API: {self.quota.remaining}/{self.quota.daily_budget}\n{metrics.summary()}"
+
+    def on_video_item_clicked(self, index):
         # Obsługuje kliknięcie elementu wideo, aby zapisać transkrypcję do pliku txt
-        video_id, publish_date, title = item.data(QtCore.Qt.UserRole)
-        if "📄" in item.text():  # Tylko jeśli transkrypcja jest dostępna
+        video_id, publish_date, title = index.data(QtCore.Qt.UserRole)
+        if self.video_model.videos[index.row()].transcript_available:  # Tylko jeśli transkrypcja jest dostępna
             output_dir = self.output_dir_input.text()
-            suggested_filename = f"{publish_date} - {re.sub(r'[/*?\"<>|:]', '', title)}.txt"
+            suggested_filename = core.transcript_filename(publish_date, title)
             default_path = os.path.join(output_dir, suggested_filename)
 
             options = QtWidgets.QFileDialog.Options()
             file_path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Zapisz transkrypcję", default_path,
                                                                  "Pliki tekstowe (*.txt)", options=options)
             if file_path:
-                transcript = self.transcriptions.get(video_id, None)
-                if transcript is None:
-                    self.status_label.setText(f"Pobieranie transkrypcji dla wideo...")
-                    QtCore.QCoreApplication.processEvents()
-                    transcript = self.download_transcription_synchronously(video_id)
-                if transcript is not None:
-                    with open(file_path, "w", encoding="utf-8") as file:
-                        file.write(transcript)
-                    self.status_label.setText(f"Transkrypcja zapisana do pliku: {file_path}")
-                else:
-                    self.status_label.setText(f"Błąd pobierania transkrypcji dla wideo: {item.text()}")
-                    self.status_label.setStyleSheet('color: #dc3545; font-weight: bold;')
+                self.status_label.setText(f"Pobieranie transkrypcji dla wideo...")
+                item_text = index.data()
+                self.tasks.start(self.save_single_transcript, video_id, file_path,
+                                 on_result=lambda saved: self.on_single_transcript_saved(saved, file_path, item_text),
+                                 on_error=lambda e: self.show_error(f"Błąd: {e}"))
+
+    def save_single_transcript(self, worker, video_id, file_path):
+        transcript = self.download_transcription_synchronously(video_id)
+        if transcript is None:
+            return False
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(transcript)
+        return True
+
+    def on_single_transcript_saved(self, saved, file_path, item_text):
+        if saved:
+            self.status_label.setText(f"Transkrypcja zapisana do pliku: {file_path}")
+        else:
+            self.show_error(f"Błąd pobierania transkrypcji dla wideo: {item_text}")
 
     def download_transcription_synchronously(self, video_id):
-        # Pobierz transkrypcję za pomocą YouTubeTranscriptApi lub pytube
-        transcript_text = None
-        try:
-            # Spróbuj użyć YouTubeTranscriptApi
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            # Spróbuj znaleźć transkrypcję ręcznie dodaną
-            try:
-                transcript = transcript_list.find_manually_created_transcript(['pl', 'en'])
-            except NoTranscriptFound:
-                # Jeśli nie znaleziono, spróbuj znaleźć transkrypcję automatycznie wygenerowaną
-                transcript = transcript_list.find_generated_transcript(['pl', 'en'])
-            # Pobierz dane transkrypcji
-            transcript_data = transcript.fetch()
-            # Konwertuj dane transkrypcji do tekstu
-            transcript_text = '\n'.join([entry['text'] for entry in transcript_data])
-        except Exception as e:
-            print(f"YouTubeTranscriptApi nie może pobrać transkrypcji: {e}")
-            # Spróbuj użyć pytube jako alternatywy
-            try:
-                yt = YouTube(f'https://www.youtube.com/watch?v={video_id}')
-                captions = yt.captions
-                if captions:
-                    # Wybierz napisy w preferowanym języku
-                    caption = captions.get_by_language_code('pl') or captions.get_by_language_code('en')
-                    if caption:
-                        # Generuj napisy w formacie SRT
-                        srt_captions = caption.generate_srt_captions()
-                        # Konwertuj SRT do czystego tekstu
-                        transcript_text = self.srt_to_text(srt_captions)
-                    else:
-                        print("Napisy w wybranym języku nie są dostępne.")
-                else:
-                    print("Brak dostępnych napisów.")
-            except Exception as e:
-                print(f"pytube nie może pobrać transkrypcji: {e}")
-
-        if transcript_text:
-            # Zapisz transkrypcję w pamięci
-            self.transcriptions[video_id] = transcript_text
-            return transcript_text
-        else:
-            return None
+        # Pobierz transkrypcję (najpierw z pamięci podręcznej) za pomocą YouTubeTranscriptApi lub pytube
+        return core.download_transcript(video_id, self.transcript_cache, index=self.search_index)
 
-    def srt_to_text(self, srt_captions):
-        # Konwertuj napisy SRT do czystego tekstu
-        import re
-        lines = srt_captions.strip().split('\n')
-        text_lines = []
-        for line in lines:
-            # Pomijaj numery sekwencji i znaczniki czasu
-            if re.match(r'^\d+$', line) or re.match(r'^\d{2}:\d{2}:\d{2},\d{3}', line):
-                continue
-            else:
-                text_lines.append(line.strip())
-        # Połącz linie w jeden tekst
-        transcript_text = ' '.join(text_lines)
-        return transcript_text
+    def available_videos(self):
+        # Filmy z listy, dla których transkrypcja jest dostępna
+        for video in self.video_model.videos:
+            if video.transcript_available:
+                yield video.video_id, video.publish_date, video.title
 
     def export_to_txt(self):
-        # Implementacja eksportu transkrypcji do plików TXT
-        output_dir = self.output_dir_input.text()
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-
-        total_items = self.video_list_widget.count()
-        for index in range(total_items):
-            item = self.video_list_widget.item(index)
-            video_id, publish_date, title = item.data(QtCore.Qt.UserRole)
-            if "📄" in item.text():  # Tylko jeśli transkrypcja jest dostępna
-                transcript = self.transcriptions.get(video_id, None)
-                if transcript is None:
-                    self.status_label.setText(f"Pobieranie transkrypcji dla wideo: {title}")
-                    QtCore.QCoreApplication.processEvents()
-                    transcript = self.download_transcription_synchronously(video_id)
-                if transcript is not None:
-                    filename = f"{publish_date} - {re.sub(r'[/*?\"<>|:]', '', title)}.txt"
-                    file_path = os.path.join(output_dir, filename)
-                    with open(file_path, "w", encoding="utf-8") as file:
-                        file.write(transcript)
-                    self.status_label.setText(f"Transkrypcja zapisana do pliku: {file_path}")
-                    QtCore.QCoreApplication.processEvents()
-        self.status_label.setText("Eksport transkrypcji do plików TXT zakończony.")
+        # Implementacja eksportu transkrypcji do plików TXT (w tle, z możliwością anulowania)
+        self.start_long_task(self.run_txt_export, list(self.available_videos()), self.output_dir_input.text(),
+                             on_progress=self.status_label.setText, on_result=self.on_txt_export_finished,
+                             on_error=lambda e: self.show_error(f"Błąd eksportu: {e}"))
+
+    def run_txt_export(self, worker, videos, output_dir):
+        core.export_to_txt(videos, output_dir, self.download_transcription_synchronously,
+                           on_progress=worker.report, manifest=self.manifest, cancel_event=worker.cancel_event,
+                           workers=self.settings.get("export_workers", 4))
+        return worker.cancelled
+
+    def on_txt_export_finished(self, cancelled):
+        if cancelled:
+            self.status_label.setText("Eksport transkrypcji anulowany.")
+        else:
+            self.status_label.setText(f"Eksport transkrypcji do plików TXT zakończony.\n{metrics.summary()}")
 
     def export_to_json(self):
-        # Implementacja eksportu transkrypcji do pliku JSON
-        output_dir = self.output_dir_input.text()
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        json_data = {}
-        total_items = self.video_list_widget.count()
-        for index in range(total_items):
-            item = self.video_list_widget.item(index)
-            video_id, publish_date, title = item.data(QtCore.Qt.UserRole)
-            if "📄" in item.text():  # Tylko jeśli transkrypcja jest dostępna
-                transcript = self.transcriptions.get(video_id, None)
-                if transcript is None:
-                    self.status_label.setText(f"Pobieranie transkrypcji dla wideo: {title}")
-                    QtCore.QCoreApplication.processEvents()
-                    transcript = self.download_transcription_synchronously(video_id)
-                if transcript is not None:
-                    json_data[title] = {
-                        "video_id": video_id,
-                        "publish_date": publish_date,
-                        "transcript": transcript
-                    }
-                    self.status_label.setText(f"Transkrypcja dla wideo {title} dodana do JSON.")
-                    QtCore.QCoreApplication.processEvents()
-        json_file_path = os.path.join(output_dir, "transcripts.json")
-        with open(json_file_path, "w", encoding="utf-8") as json_file:
-            json.dump(json_data, json_file, indent=4, ensure_ascii=False)
-        self.status_label.setText(f"Transkrypcje zapisane do pliku JSON: {json_file_path}")
+        # Implementacja eksportu transkrypcji do pliku JSON (w tle, z możliwością anulowania)
+        self.start_long_task(self.run_json_export, list(self.available_videos()), self.output_dir_input.text(),
+                             self.json_stream_checkbox.isChecked(), on_progress=self.status_label.setText,
+                             on_result=self.on_json_export_finished,
+                             on_error=lambda e: self.show_error(f"Błąd eksportu: {e}"))
+
+    def run_json_export(self, worker, videos, output_dir, stream):
+        export = core.export_to_jsonl if stream else core.export_to_json
+        json_file_path = export(videos, output_dir, self.download_transcription_synchronously,
+                                on_progress=worker.report, manifest=self.manifest,
+                                cancel_event=worker.cancel_event)
+        return json_file_path, worker.cancelled
+
+    def on_json_export_finished(self, result):
+        json_file_path, cancelled = result
+        if cancelled:
+            self.status_label.setText(f"Eksport anulowany, zapisano część transkrypcji: {json_file_path}")
+        else:
+            self.status_label.setText(f"Transkrypcje zapisane do pliku JSON: {json_file_path}\n{metrics.summary()}")
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
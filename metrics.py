@@ -0,0 +1,177 @@
+"""
+Pomiary gorących ścieżek: czasy operacji, liczniki (zapytania, ponowienia, ścieżki zapasowe,
+trafienia w pamięć podręczną) i przesłane bajty. Dane są zbierane w pamięci procesu; można je
+zapisać w formacie Prometheus (.prom) lub JSON oraz jako oś czasu Chrome trace (chrome://tracing).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "youtubetext"
+# Limit zdarzeń osi czasu, aby długie skanowanie nie zajęło całej pamięci
+MAX_TRACE_EVENTS = 500_000
+
+_lock = threading.Lock()
+_counters = {}
+_timers = {}
+_trace = None
+_started = time.perf_counter()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def count(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, started=None, **labels):
+    key = _key(name, labels)
+    with _lock:
+        timer = _timers.get(key)
+        if timer is None:
+            timer = _timers[key] = [0, 0.0, 0.0]
+        timer[0] += 1
+        timer[1] += seconds
+        timer[2] = max(timer[2], seconds)
+        if _trace is not None and started is not None and len(_trace) < MAX_TRACE_EVENTS:
+            _trace.append({
+                "name": name, "cat": labels.get("resource") or labels.get("host") or name, "ph": "X",
+                "ts": (started - _started) * 1e6, "dur": seconds * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident(), "args": labels
+            })
+
+
+@contextmanager
+def timer(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, started, **labels)
+
+
+def enable_trace():
+    global _trace
+    with _lock:
+        if _trace is None:
+            _trace = []
+
+
+def reset():
+    global _trace
+    with _lock:
+        _counters.clear()
+        _timers.clear()
+        _trace = [] if _trace is not None else None
+
+
+def counter_total(name):
+    with _lock:
+        return sum(value for (counter, _), value in _counters.items() if counter == name)
+
+
+def timer_totals(name):
+    # (liczba, suma sekund) po wszystkich etykietach
+    with _lock:
+        timers = [value for (timer_name, _), value in _timers.items() if timer_name == name]
+    return sum(timer[0] for timer in timers), sum(timer[1] for timer in timers)
+
+
+def snapshot():
+    with _lock:
+        return {
+            "uptime_seconds": time.perf_counter() - _started,
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(_counters.items())],
+            "timers": [{"name": name, "labels": dict(labels), "count": timer[0], "sum_seconds": timer[1],
+                        "max_seconds": timer[2]}
+                       for (name, labels), timer in sorted(_timers.items())],
+        }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def prometheus_text():
+    data = snapshot()
+    lines = []
+    declared = set()
+    for counter in data["counters"]:
+        name = f"{PREFIX}_{counter['name']}_total"
+        if name not in declared:
+            lines.append(f"# TYPE {name} counter")
+            declared.add(name)
+        lines.append(f"{name}{_labels_text(counter['labels'])} {counter['value']}")
+    for timer in data["timers"]:
+        name = f"{PREFIX}_{timer['name']}_seconds"
+        if name not in declared:
+            lines.append(f"# TYPE {name} summary")
+            declared.add(name)
+        labels = _labels_text(timer["labels"])
+        lines.append(f"{name}_count{labels} {timer['count']}")
+        lines.append(f"{name}_sum{labels} {timer['sum_seconds']:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    # Format według rozszerzenia: .prom/.txt - Prometheus, pozostałe - JSON
+    if path.endswith((".prom", ".txt")):
+        content = prometheus_text()
+    else:
+        content = json.dumps(snapshot(), indent=4, ensure_ascii=False)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+    return path
+
+
+def write_trace(path):
+    with _lock:
+        events = list(_trace or ())
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+    return path
+
+
+def _megabytes(value):
+    return f"{value / (1024 * 1024):.1f} MB"
+
+
+def summary():
+    # Krótkie podsumowanie do paska stanu lub na koniec uruchomienia CLI
+    http_count, http_seconds = timer_totals("http_request")
+    parts = [f"HTTP: {http_count} zapytań ({_megabytes(counter_total('http_bytes'))}, {http_seconds:.1f} s)"]
+    api_count, api_seconds = timer_totals("api_call")
+    if api_count:
+        parts.append(f"API: {api_count} ({counter_total('quota_units')} jedn., ponowienia: "
+                     f"{counter_total('api_retries')})")
+    hits, misses = counter_total("cache_hits"), counter_total("cache_misses")
+    if hits or misses:
+        parts.append(f"pamięć podręczna: {hits}/{hits + misses}")
+    fallbacks = counter_total("pytube_fallbacks")
+    if fallbacks:
+        parts.append(f"pytube: {fallbacks}")
+    written = counter_total("bytes_written")
+    if written:
+        parts.append(f"zapisano {_megabytes(written)}")
+    with _lock:
+        totals = {}
+        for (name, _), timer in _timers.items():
+            if name not in ("http_request", "api_call"):
+                totals[name] = totals.get(name, 0.0) + timer[1]
+    slowest = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:3]
+    if slowest:
+        parts.append("najdłużej: " + ", ".join(f"{name} {seconds:.1f} s" for name, seconds in slowest))
+    return "; ".join(parts)
@@ -0,0 +1,142 @@
+"""
+Harmonogram zapytań YouTube Data API: zliczanie jednostek limitu dla każdej metody, dzienny budżet
+zapisywany w quota.json, limit zapytań na sekundę i ponawianie odpowiedzi dławiących (429, 5xx,
+rateLimitExceeded) z wykładniczym opóźnieniem z losowym rozrzutem.
+"""
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import metrics
+from atomic_file import atomic_write
+
+QUOTA_PATH = "quota.json"
+# Domyślny dzienny limit projektu w Google Cloud
+DEFAULT_DAILY_BUDGET = 10000
+DEFAULT_MAX_RPS = 10
+DEFAULT_MAX_RETRIES = 5
+MAX_BACKOFF = 32
+# Koszt w jednostkach limitu według zasobu API; pozostałe metody list kosztują 1 jednostkę
+METHOD_COSTS = {"search": 100}
+# Powody 403, które oznaczają chwilowe dławienie, a nie wyczerpany limit
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def quota_day():
+    # Limit API odnawia się o północy czasu pacyficznego
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.now(ZoneInfo("America/Los_Angeles")).date().isoformat()
+    except Exception:
+        return datetime.now(timezone.utc).date().isoformat()
+
+
+def api_resource(uri):
+    # Zasób Data API z adresu zapytania, np. "search" albo "playlistItems"
+    return urlparse(uri).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def request_cost(uri):
+    return METHOD_COSTS.get(api_resource(uri), 1)
+
+
+def error_reason(content):
+    try:
+        errors = json.loads(content).get("error", {}).get("errors", [])
+        return errors[0].get("reason") if errors else None
+    except (ValueError, AttributeError):
+        return None
+
+
+class QuotaScheduler:
+    """
+    Wspólny dla wszystkich wątków strażnik zapytań Data API. Przed wysłaniem zapytania rezerwuje
+    jego koszt w dziennym budżecie, a następnie czeka na swoją kolej zgodnie z limitem zapytań na sekundę.
+    """
+
+    def __init__(self, daily_budget=DEFAULT_DAILY_BUDGET, max_rps=DEFAULT_MAX_RPS,
+                 max_retries=DEFAULT_MAX_RETRIES, path=QUOTA_PATH):
+        self.daily_budget = daily_budget
+        self.interval = 1 / max_rps if max_rps else 0
+        self.max_retries = max_retries
+        self.path = path
+        self.day = quota_day()
+        self.used = 0
+        self._next_slot = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("day") == self.day:
+            self.used = data.get("used", 0)
+
+    def save(self):
+        atomic_write(self.path, json.dumps({"day": self.day, "used": self.used}))
+
+    @property
+    def remaining(self):
+        with self._lock:
+            self._roll_day()
+            return max(0, self.daily_budget - self.used)
+
+    def _roll_day(self):
+        day = quota_day()
+        if day != self.day:
+            self.day = day
+            self.used = 0
+
+    def _reserve(self, cost):
+        # Zarezerwuj jednostki limitu i wyznacz moment wysłania zapytania
+        with self._lock:
+            self._roll_day()
+            if self.used + cost > self.daily_budget:
+                raise QuotaExceeded(
+                    f"Wyczerpano dzienny limit API ({self.used}/{self.daily_budget} jednostek).")
+            self.used += cost
+            self.save()
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        metrics.count("quota_units", cost)
+        return slot - now
+
+    def _exhaust(self):
+        # API zgłosiło wyczerpany limit - nie wysyłaj kolejnych zapytań do końca dnia
+        with self._lock:
+            self.used = max(self.used, self.daily_budget)
+            self.save()
+
+    def request(self, send, uri):
+        # send() wysyła zapytanie i zwraca (status, treść, wynik); wynik ostatniej próby jest zwracany
+        cost = request_cost(uri)
+        attempt = 0
+        while True:
+            delay = self._reserve(cost)
+            if delay > 0:
+                time.sleep(delay)
+            status, content, result = send()
+            reason = error_reason(content) if status >= 400 else None
+            if reason in QUOTA_REASONS:
+                metrics.count("quota_exceeded")
+                self._exhaust()
+                raise QuotaExceeded(f"Wyczerpano dzienny limit API ({reason}).")
+            retryable = status == 429 or status >= 500 or reason in RATE_LIMIT_REASONS
+            if not retryable or attempt >= self.max_retries:
+                return result
+            metrics.count("api_retries", status=status)
+            # Opóźnienie wykładnicze z pełnym losowym rozrzutem, aby wątki nie ponawiały jednocześnie
+            time.sleep(random.uniform(0, min(MAX_BACKOFF, 2 ** attempt)))
+            attempt += 1
@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+from dataclasses import asdict
+
+CHECKPOINT_DIR = "checkpoints"
+
+
+class ScanCheckpoint:
+    """
+    Punkt kontrolny skanowania kanału w checkpoints/<channel_id>.jsonl: parametry skanowania,
+    przetworzone filmy z wynikiem sprawdzenia napisów i token pierwszej nieukończonej strony.
+    Plik jest tylko dopisywany, a każdy zapis strony kończy się fsync, więc przerwane skanowanie
+    (awaria, anulowanie, wyczerpany limit API) można wznowić od miejsca, w którym się zatrzymało.
+    Niepełny ostatni wiersz po awarii jest pomijany przy wczytywaniu.
+    """
+
+    def __init__(self, channel_id, directory=CHECKPOINT_DIR):
+        self.channel_id = channel_id
+        self.path = os.path.join(directory, f"{channel_id}.jsonl")
+        self.params = None
+        self.page_token = None
+        self.finished = False
+        self.videos = {}
+        self._pending = []
+        self._file = None
+        # Długość poprawnej części pliku - od niej dopisywane są kolejne wiersze
+        self._valid_size = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self._valid_size += len(line)
+                if "params" in record:
+                    self.params = record["params"]
+                elif "video" in record:
+                    self.videos[record["video"]["video_id"]] = record["video"]
+                elif "page_token" in record:
+                    self.page_token = record["page_token"]
+                    self.finished = record.get("finished", False)
+
+    def can_resume(self, params):
+        # Wznowić można tylko skanowanie tym samym sposobem (playlista "uploads" albo search.list)
+        return (self.params is not None and (self.videos or self.page_token)
+                and self.params.get("uploads_playlist_id") == params.get("uploads_playlist_id"))
+
+    def start(self, params):
+        # Nowe skanowanie: poprzedni punkt kontrolny jest zastępowany
+        with self._lock:
+            self._close()
+            self.params = params
+            self.page_token = None
+            self.finished = False
+            self.videos = {}
+            self._valid_size = 0
+            self._pending = [{"params": params}]
+        self._write()
+
+    def add_video(self, video):
+        entry = asdict(video)
+        with self._lock:
+            self.videos[video.video_id] = entry
+            self._pending.append({"video": entry})
+
+    def page_done(self, next_page_token, finished=False):
+        # Wszystkie filmy ze stron przed next_page_token są przetworzone
+        with self._lock:
+            self.page_token = next_page_token
+            self.finished = finished
+            self._pending.append({"page_token": next_page_token, "finished": finished})
+        self._write()
+
+    def _write(self):
+        with self._lock:
+            records, self._pending = self._pending, []
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                if records and "params" in records[0]:
+                    self._file = open(self.path, "w", encoding="utf-8")
+                else:
+                    # Wznowienie: odetnij niepełny wiersz zapisany przed awarią
+                    if os.path.exists(self.path):
+                        os.truncate(self.path, self._valid_size)
+                    self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def remove(self):
+        # Skanowanie zakończone i zapisane w manifeście - punkt kontrolny nie jest już potrzebny
+        with self._lock:
+            self._close()
+            self.params = None
+            self.page_token = None
+            self.finished = False
+            self.videos = {}
+            self._valid_size = 0
+            self._pending = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,322 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass
+class VideoInfo:
+    video_id: str
+    title: str
+    publish_date: str
+    duration: str = "00:00"
+    transcript_available: bool = False
+    has_captions: bool = False
+    view_count: int = 0
+    published_at: str = ""
+
+
+_DONE = object()
+
+# Maksymalna liczba ID przyjmowana przez videos().list w jednym żądaniu
+METADATA_BATCH_SIZE = 50
+
+
+def parse_duration(duration):
+    # Parsuj czas trwania w formacie ISO 8601 do formatu czytelnego dla człowieka (HH:MM:SS)
+    hours = minutes = seconds = 0
+    duration = duration.replace("PT", "")
+    if "H" in duration:
+        hours = int(duration.split("H")[0])
+        duration = duration.split("H")[1]
+    if "M" in duration:
+        minutes = int(duration.split("M")[0])
+        duration = duration.split("M")[1]
+    if "S" in duration:
+        seconds = int(duration.split("S")[0])
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
+
+
+class ChannelScanner:
+    """
+    Potokowe skanowanie kanału: listowanie stron, sprawdzanie napisów i pobieranie metadanych
+    działają jako osobne, współbieżne etapy. Wyniki są zwracane w kolejności ukończenia.
+    """
+
+    def __init__(self, youtube_client, channel_id, probe, workers=8, uploads_playlist_id=None,
+                 known_ids=None, published_after=None, cancel_event=None, checkpoint=None, stop_at_known=True):
+        self.youtube_client = youtube_client
+        self.channel_id = channel_id
+        # Jeśli znana jest playlista "uploads", listuj ją przez playlistItems.list (1 jednostka
+        # zamiast 100 za stronę search.list, bez gubienia wyników na dużych kanałach)
+        self.uploads_playlist_id = uploads_playlist_id
+        # Synchronizacja przyrostowa: listowanie kończy się na pierwszym znanym filmie
+        # (wyniki są uporządkowane od najnowszych), a search.list dostaje publishedAfter
+        self.known_ids = set(known_ids or ())
+        # stop_at_known=False: znane filmy są tylko pomijane, a listowanie trwa do końca kanału
+        self.stop_at_known = stop_at_known
+        self.published_after = published_after
+        self.probe = probe
+        self.workers = max(1, int(workers))
+        self.error = None
+        # Ustawienie zdarzenia przerywa listowanie; zadania w locie kończą się bez zapytań sieciowych
+        self.cancel_event = cancel_event or threading.Event()
+        self._results = queue.Queue()
+        # Ogranicz liczbę paczek w locie, aby listowanie nie wyprzedzało zbytnio pracowników
+        self._in_flight = threading.BoundedSemaphore(max(2, self.workers // 4))
+        # Filmy przekazane pracownikom, dla których nie zakończyło się jeszcze stage_done; wait() nie czeka
+        # na wywołania zwrotne zadań, więc _DONE trafia do kolejki dopiero, gdy licznik spadnie do zera
+        self._outstanding = 0
+        self._outstanding_done = threading.Condition()
+
+        # Punkt kontrolny (scan_checkpoint.ScanCheckpoint) zapisywany po każdej przetworzonej stronie
+        self.checkpoint = checkpoint
+        self.completed = False
+        self.resumed = []
+        self._start_token = None
+        # Strony w kolejności listowania: [token następnej strony, nieprzetworzone filmy, ostatnia strona]
+        self._pages = deque()
+        self._page_of = {}
+        self._page_lock = threading.Lock()
+        if checkpoint is not None:
+            params = {"uploads_playlist_id": uploads_playlist_id, "published_after": published_after}
+            if checkpoint.can_resume(params):
+                # Wznowienie z tymi samymi parametrami co przerwane skanowanie; filmy z punktu
+                # kontrolnego nie zatrzymują synchronizacji, nawet jeśli trafiły już do manifestu
+                fields = VideoInfo.__dataclass_fields__
+                self.resumed = [VideoInfo(**{key: value for key, value in entry.items() if key in fields})
+                                for entry in checkpoint.videos.values()]
+                self.published_after = checkpoint.params.get("published_after")
+                self.known_ids -= set(checkpoint.videos)
+                self._start_token = checkpoint.page_token
+                self.completed = checkpoint.finished
+            else:
+                checkpoint.start(params)
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def clear_checkpoint(self):
+        # Wywoływane po zapisaniu wyników w manifeście; przerwane skanowanie zachowuje punkt kontrolny
+        if self.checkpoint is not None:
+            if self.completed and not self.error:
+                self.checkpoint.remove()
+            else:
+                self.checkpoint.close()
+
+    def _execute(self, request):
+        # Klient z core.build_client korzysta ze wspólnej, bezpiecznej wątkowo puli połączeń
+        return request.execute()
+
+    def scan(self, on_idle=None):
+        # Generator zwracający VideoInfo, gdy tylko film zostanie w pełni przetworzony
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            lister = threading.Thread(target=self._list_pages, args=(executor,), daemon=True)
+            lister.start()
+            while True:
+                try:
+                    result = self._results.get(timeout=0.1)
+                except queue.Empty:
+                    if on_idle:
+                        on_idle()
+                    continue
+                if result is _DONE:
+                    break
+                yield result
+            lister.join()
+
+    def _list_pages(self, executor):
+        from googleapiclient.errors import HttpError
+
+        futures = []
+        seen = {video.video_id for video in self.resumed}
+        page_token = self._start_token
+        # Filmy przetworzone przed przerwaniem są zwracane od razu, bez zapytań sieciowych
+        for video in self.resumed:
+            self._results.put(video)
+        try:
+            while not self.cancelled and not self.completed:
+                try:
+                    response = self._execute(self._page_request(page_token))
+                except HttpError as e:
+                    # Token strony z punktu kontrolnego mógł wygasnąć - listuj od początku, pomijając gotowe filmy
+                    if page_token is None or page_token != self._start_token or e.resp.status != 400:
+                        raise
+                    page_token = self._start_token = None
+                    continue
+
+                videos = []
+                reached_known = False
+                for item in response.get("items", []):
+                    video = self._parse_item(item)
+                    if not video or video.video_id in seen:
+                        continue
+                    if video.video_id in self.known_ids:
+                        reached_known = self.stop_at_known
+                        continue
+                    seen.add(video.video_id)
+                    videos.append(video)
+                next_page_token = response.get("nextPageToken")
+                self._add_page(videos, next_page_token, not next_page_token or reached_known)
+                for start in range(0, len(videos), METADATA_BATCH_SIZE):
+                    batch = videos[start:start + METADATA_BATCH_SIZE]
+                    self._in_flight.acquire()
+                    futures.extend(self._submit(executor, batch))
+
+                # Sprawdź, czy jest następna strona wyników
+                page_token = next_page_token
+                if not page_token or reached_known:
+                    break
+        except Exception as e:
+            # Po wyczerpaniu limitu, błędzie sieci albo nieoczekiwanej odpowiedzi skanowanie kończy się
+            # z filmami pobranymi do tej pory i jest zgłaszane jako niepełne
+            self.error = e
+        finally:
+            wait(futures)
+            with self._outstanding_done:
+                self._outstanding_done.wait_for(lambda: self._outstanding == 0)
+            self._results.put(_DONE)
+
+    def _add_page(self, videos, next_page_token, last):
+        page = [next_page_token, len(videos), last]
+        with self._page_lock:
+            self._pages.append(page)
+            for video in videos:
+                self._page_of[video.video_id] = page
+        self._advance_checkpoint()
+
+    def _video_finished(self, video):
+        if self.checkpoint is not None:
+            self.checkpoint.add_video(video)
+        with self._page_lock:
+            self._page_of.pop(video.video_id)[1] -= 1
+        self._advance_checkpoint()
+
+    def _advance_checkpoint(self):
+        # Token w punkcie kontrolnym przesuwa się dopiero, gdy wszystkie wcześniejsze strony są przetworzone
+        with self._page_lock:
+            while self._pages and self._pages[0][1] == 0:
+                next_page_token, _, last = self._pages.popleft()
+                if last:
+                    self.completed = True
+                if self.checkpoint is not None:
+                    self.checkpoint.page_done(next_page_token, finished=last)
+
+    def _page_request(self, page_token):
+        if self.uploads_playlist_id:
+            return self.youtube_client.playlistItems().list(
+                part="snippet,contentDetails",
+                playlistId=self.uploads_playlist_id,
+                maxResults=50,
+                pageToken=page_token
+            )
+        return self.youtube_client.search().list(
+            part="id,snippet",
+            channelId=self.channel_id,
+            maxResults=50,
+            type="video",
+            pageToken=page_token,
+            order="date",
+            publishedAfter=self.published_after
+        )
+
+    def _parse_item(self, item):
+        if self.uploads_playlist_id:
+            details = item.get("contentDetails", {})
+            video_id = details.get("videoId")
+            # Filmy prywatne i usunięte nie mają daty publikacji
+            publish_date = details.get("videoPublishedAt")
+        else:
+            video_id = item["id"].get("videoId")
+            publish_date = item["snippet"].get("publishedAt")
+        if not video_id or not publish_date:
+            return None
+        return VideoInfo(
+            video_id=video_id,
+            title=item["snippet"]["title"],
+            publish_date=datetime.strptime(publish_date, "%Y-%m-%dT%H:%M:%SZ").strftime("%d.%m.%Y"),
+            published_at=publish_date,
+        )
+
+    def _submit(self, executor, videos):
+        # Jedno zapytanie o metadane na całą paczkę i osobne sprawdzanie napisów dla każdego filmu;
+        # film jest gotowy, gdy oba etapy się zakończą
+        remaining = {video.video_id: 2 for video in videos}
+        lock = threading.Lock()
+        with self._outstanding_done:
+            self._outstanding += len(videos)
+
+        def stage_done(video):
+            with lock:
+                remaining[video.video_id] -= 1
+                finished = remaining[video.video_id] == 0
+                if finished:
+                    del remaining[video.video_id]
+                batch_finished = not remaining
+            # Po anulowaniu niekompletne wyniki nie są zwracane
+            try:
+                if finished and not self.cancelled:
+                    self._video_finished(video)
+                    self._results.put(video)
+            finally:
+                if finished:
+                    with self._outstanding_done:
+                        self._outstanding -= 1
+                        self._outstanding_done.notify_all()
+                if batch_finished:
+                    self._in_flight.release()
+
+        def lookup_done(_future):
+            for video in videos:
+                stage_done(video)
+
+        futures = []
+        metadata_future = executor.submit(self._lookup_metadata, videos)
+        metadata_future.add_done_callback(lookup_done)
+        futures.append(metadata_future)
+        for video in videos:
+            probe_future = executor.submit(self._probe, video)
+            probe_future.add_done_callback(lambda _future, video=video: stage_done(video))
+            futures.append(probe_future)
+        return futures
+
+    def _probe(self, video):
+        if self.cancelled:
+            return
+        try:
+            video.transcript_available = bool(self.probe(video.video_id))
+        except Exception:
+            video.transcript_available = False
+
+    def _lookup_metadata(self, videos):
+        # Pobierz długość, flagę napisów i liczbę wyświetleń dla maksymalnie 50 filmów naraz
+        if self.cancelled:
+            return
+        try:
+            request = self.youtube_client.videos().list(
+                part="contentDetails,statistics",
+                id=",".join(video.video_id for video in videos)
+            )
+            response = self._execute(request)
+        except Exception as e:
+            # Wyczerpany limit, błąd sieci albo nieoczekiwana odpowiedź: skanowanie kończy się jako niepełne,
+            # a filmy bez metadanych nie trafiają do punktu kontrolnego - wznowienie sprawdzi je ponownie
+            self.error = e
+            self.cancel()
+            return
+        by_id = {video.video_id: video for video in videos}
+        for item in response.get("items", []):
+            video = by_id.get(item.get("id"))
+            if not video:
+                continue
+            details = item.get("contentDetails", {})
+            if "duration" in details:
+                video.duration = parse_duration(details["duration"])
+            video.has_captions = details.get("caption") == "true"
+            video.view_count = int(item.get("statistics", {}).get("viewCount", 0))
@@ -0,0 +1,136 @@
+"""
+Pełnotekstowy indeks pobranych transkrypcji (SQLite FTS5) z czasem startu każdego segmentu.
+Indeks jest uzupełniany przy pobieraniu transkrypcji - nowe filmy są dopisywane bez przebudowy.
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from titles import WATCH_URL
+
+DEFAULT_INDEX_PATH = "search_index.sqlite"
+# Segment filmu ma rowid = id filmu << VIDEO_SHIFT | numer segmentu, dzięki czemu segmenty
+# jednego filmu zajmują ciągły zakres rowid i można je usunąć bez przeszukiwania tabeli FTS
+VIDEO_SHIFT = 20
+# remove_diacritics w FTS5 nie rozkłada "ł" (to osobna litera, nie "l" ze znakiem), więc jest zamieniane ręcznie
+FOLD = str.maketrans("łŁ", "lL")
+
+
+def deep_link(video_id, start):
+    return f"{WATCH_URL.format(video_id=video_id)}&t={int(start)}s"
+
+
+def fold(text):
+    return text.translate(FOLD)
+
+
+def phrase_query(text):
+    # Zapytanie o dokładną frazę - znaki specjalne FTS5 w tekście użytkownika nie są interpretowane
+    return '"' + text.replace('"', '""') + '"'
+
+
+@dataclass
+class SearchHit:
+    video_id: str
+    title: str
+    start: float
+    text: str
+
+    @property
+    def url(self):
+        return deep_link(self.video_id, self.start)
+
+
+class SearchIndex:
+    """
+    Indeks segmentów transkrypcji: wynik wyszukiwania to film, tytuł, czas startu segmentu
+    i link otwierający film w tym miejscu. Ponowne dodanie filmu zastępuje jego segmenty.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            " id INTEGER PRIMARY KEY,"
+            " video_id TEXT NOT NULL UNIQUE,"
+            " title TEXT NOT NULL DEFAULT '',"
+            " language TEXT,"
+            " segment_count INTEGER NOT NULL DEFAULT 0,"
+            " indexed REAL)"
+        )
+        # Wyszukiwanie bez względu na polskie znaki diakrytyczne ("zolw" znajduje "żółw"): indeksowana jest
+        # kolumna `folded` (tekst po fold), a oryginalny tekst segmentu jest tylko przechowywany
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(segments)")]
+        if columns and "folded" not in columns:
+            # Indeks z wcześniejszej wersji - segmenty zostaną dopisane ponownie przy następnym pobraniu
+            self._connection.execute("DROP TABLE segments")
+            self._connection.execute("UPDATE videos SET indexed = NULL, segment_count = 0")
+        self._connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5("
+            " folded, text UNINDEXED, start UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        self._connection.commit()
+
+    def _video_row(self, video_id):
+        self._connection.execute("INSERT OR IGNORE INTO videos (video_id) VALUES (?)", (video_id,))
+        return self._connection.execute("SELECT id FROM videos WHERE video_id = ?", (video_id,)).fetchone()[0]
+
+    def contains(self, video_id):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT indexed FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return row is not None and row[0] is not None
+
+    def add(self, video_id, language, segments, title=None):
+        # Zastąp segmenty filmu w indeksie; segmenty w formacie youtube_transcript_api
+        with self._lock, self._connection:
+            row_id = self._video_row(video_id)
+            first = row_id << VIDEO_SHIFT
+            self._connection.execute(
+                "DELETE FROM segments WHERE rowid BETWEEN ? AND ?", (first, first + (1 << VIDEO_SHIFT) - 1))
+            self._connection.executemany(
+                "INSERT INTO segments (rowid, folded, text, start) VALUES (?, ?, ?, ?)",
+                ((first + number, fold(segment["text"]), segment["text"], segment["start"])
+                 for number, segment in enumerate(segments[:1 << VIDEO_SHIFT]))
+            )
+            self._connection.execute(
+                "UPDATE videos SET language = ?, segment_count = ?, indexed = ?, title = COALESCE(?, title)"
+                " WHERE id = ?",
+                (language, len(segments), time.time(), title, row_id)
+            )
+
+    def set_titles(self, titles):
+        # Tytuły filmów (np. z manifestu kanału) - także dla filmów jeszcze nieobecnych w indeksie
+        with self._lock, self._connection:
+            for video_id, title in titles.items():
+                self._video_row(video_id)
+                self._connection.execute("UPDATE videos SET title = ? WHERE video_id = ?", (title, video_id))
+
+    def search(self, query, limit=50, video_id=None, raw=False):
+        """
+        Segmenty pasujące do zapytania, od najlepiej dopasowanych. Domyślnie zapytanie jest
+        traktowane jako dokładna fraza; raw=True przekazuje składnię FTS5 (AND, OR, NEAR, prefiks*).
+        """
+        match = fold(query) if raw else phrase_query(fold(query))
+        sql = (
+            "SELECT videos.video_id, videos.title, segments.start, segments.text"
+            " FROM segments JOIN videos ON videos.id = (segments.rowid >> ?)"
+            " WHERE segments MATCH ?"
+        )
+        parameters = [VIDEO_SHIFT, match]
+        if video_id:
+            sql += " AND videos.video_id = ?"
+            parameters.append(video_id)
+        sql += " ORDER BY rank LIMIT ?"
+        parameters.append(limit)
+        with self._lock:
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,216 @@
+"""
+Zwarta reprezentacja segmentów transkrypcji i binarne archiwum mapowane w pamięci.
+
+Zamiast listy słowników na każdy segment SegmentStore trzyma równoległe tablice czasów startu
+i długości (float64) oraz jeden bufor tekstu UTF-8 z tablicą przesunięć. Archiwum (.ytsa) zapisuje
+te same tablice jedna za drugą, więc odczyt przez mmap nie kopiuje danych - SegmentStore z archiwum
+to tylko widoki (memoryview) na zmapowany plik.
+
+Układ pliku:
+    nagłówek   MAGIC, wersja, kolejność bajtów, przesunięcie i długość indeksu
+    bloki      starts[n] f64, durations[n] f64, offsets[n + 1] u64, tekst UTF-8 (wyrównane do 8 bajtów)
+    indeks     JSON: {video_id: {język: [przesunięcie bloku, n, długość tekstu]}}
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+from atomic_file import atomic_open
+
+MAGIC = b"YTSA"
+VERSION = 1
+HEADER = struct.Struct("<4sHcxQQ")
+_BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+
+@dataclass
+class TranscriptSegment:
+    start: float = 0.0
+    duration: float = 0.0
+    text: str = ""
+
+
+class SegmentStore:
+    """
+    Segmenty jednej transkrypcji w tablicach: starts, durations (sekundy), offsets (bajty w text).
+    Tablice mogą być obiektami array (segmenty zbudowane w pamięci) lub memoryview (archiwum).
+    """
+    __slots__ = ("starts", "durations", "offsets", "text")
+
+    def __init__(self, starts, durations, offsets, text):
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self.text = text
+
+    @classmethod
+    def from_segments(cls, segments):
+        # Segmenty w formacie youtube_transcript_api: [{"text", "start", "duration"}, ...]
+        starts = array("d")
+        durations = array("d")
+        offsets = array("Q", [0])
+        text = bytearray()
+        for segment in segments:
+            starts.append(segment["start"])
+            durations.append(segment.get("duration", 0.0))
+            text += segment["text"].encode("utf-8")
+            offsets.append(len(text))
+        return cls(starts, durations, offsets, bytes(text))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return TranscriptSegment(self.starts[index], self.durations[index], self.text_at(index))
+
+    def text_at(self, index):
+        base = self.offsets[0]
+        return bytes(self.text[self.offsets[index] - base:self.offsets[index + 1] - base]).decode("utf-8")
+
+    def index_at(self, time):
+        # Indeks segmentu trwającego w danej chwili (albo pierwszego po niej)
+        index = bisect_right(self.starts, time) - 1
+        if index >= 0 and time < self.starts[index] + self.durations[index]:
+            return index
+        return index + 1
+
+    def slice(self, start_time=0.0, end_time=None):
+        # Segmenty nachodzące na przedział [start_time, end_time) - bez kopiowania danych
+        first = self.index_at(start_time)
+        last = len(self) if end_time is None else bisect_left(self.starts, end_time)
+        last = max(first, last)
+        base = self.offsets[0]
+        return SegmentStore(
+            self.starts[first:last],
+            self.durations[first:last],
+            self.offsets[first:last + 1],
+            memoryview(self.text)[self.offsets[first] - base:self.offsets[last] - base]
+        )
+
+    def to_segments(self):
+        return [
+            {"text": segment.text, "start": segment.start, "duration": segment.duration}
+            for segment in self
+        ]
+
+    def plain_text(self):
+        return "\n".join(self.text_at(index) for index in range(len(self)))
+
+    @property
+    def nbytes(self):
+        return len(self) * 16 + (len(self) + 1) * 8 + len(self.text)
+
+
+def _pad(file):
+    padding = -file.tell() % 8
+    if padding:
+        file.write(b"\0" * padding)
+
+
+def write_archive(path, transcripts):
+    """
+    Zapisz archiwum z iterowalnej kolekcji (video_id, język, segmenty lub SegmentStore).
+    Zapis jest atomowy - plik docelowy jest podmieniany dopiero po zapisaniu indeksu.
+    """
+    index = {}
+    with atomic_open(path, "wb") as file:
+        file.write(b"\0" * HEADER.size)
+        _pad(file)
+        for video_id, language, segments in transcripts:
+            store = segments if isinstance(segments, SegmentStore) else SegmentStore.from_segments(segments)
+            base = store.offsets[0] if len(store.offsets) else 0
+            offset = file.tell()
+            file.write(array("d", store.starts).tobytes())
+            file.write(array("d", store.durations).tobytes())
+            file.write(array("Q", (value - base for value in store.offsets)).tobytes())
+            file.write(store.text)
+            _pad(file)
+            index.setdefault(video_id, {})[language] = [offset, len(store), len(store.text)]
+        index_data = json.dumps(index, ensure_ascii=False).encode("utf-8")
+        index_offset = file.tell()
+        file.write(index_data)
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, _BYTE_ORDER, index_offset, len(index_data)))
+    return path
+
+
+class SegmentArchive:
+    """
+    Archiwum transkrypcji otwarte przez mmap. Dostęp swobodny po ID filmu (i języku) oraz po przedziale
+    czasu; zwracane SegmentStore są widokami na plik, więc mapowanie jest zwalniane dopiero
+    razem z ostatnim z nich.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} nie jest archiwum transkrypcji w wersji {VERSION}.")
+        if byte_order != _BYTE_ORDER:
+            raise ValueError(f"{path} zapisano na platformie o innej kolejności bajtów.")
+        self.index = json.loads(self._map[index_offset:index_offset + index_length])
+        self._view = memoryview(self._map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __contains__(self, video_id):
+        return video_id in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def video_ids(self):
+        return list(self.index)
+
+    def languages(self, video_id):
+        return list(self.index.get(video_id, {}))
+
+    def get(self, video_id, languages=None):
+        # SegmentStore pierwszego dostępnego języka z listy (albo dowolnego), inaczej None
+        entries = self.index.get(video_id)
+        if not entries:
+            return None
+        language = next((code for code in languages or () if code in entries), None)
+        if language is None:
+            if languages:
+                return None
+            language = next(iter(entries))
+        offset, count, text_length = entries[language]
+        starts_end = offset + count * 8
+        durations_end = starts_end + count * 8
+        offsets_end = durations_end + (count + 1) * 8
+        return SegmentStore(
+            self._view[offset:starts_end].cast("d"),
+            self._view[starts_end:durations_end].cast("d"),
+            self._view[durations_end:offsets_end].cast("Q"),
+            self._view[offsets_end:offsets_end + text_length]
+        )
+
+    def slice(self, video_id, start_time=0.0, end_time=None, languages=None):
+        store = self.get(video_id, languages)
+        return store.slice(start_time, end_time) if store is not None else None
+
+    def close(self):
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Widoki nadal są używane - mapowanie zostanie zwolnione razem z nimi
+            pass
+        self._file.close()
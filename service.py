@@ -0,0 +1,237 @@
+"""
+Tryb usługi: lokalny serwer HTTP (asyncio) udostępniający transkrypcje innym narzędziom ze wspólnej
+pamięci podręcznej transkrypcji.
+
+    GET /transcript/{video_id}?lang=pl,en&format=txt
+        format: txt, timestamped, srt, vtt, jsonl (formatters.FORMATS) albo json (język i segmenty)
+    GET /health     stan usługi w JSON
+    GET /metrics    pomiary w formacie Prometheus (metrics.prometheus_text)
+
+Równoczesne zapytania o ten sam film i języki są łączone w jedno pobranie z YouTube, a liczba
+jednoczesnych pobrań jest ograniczona (service_concurrency). Pobieranie korzysta z tej samej ścieżki
+co eksport (core.download_segments), więc trafia do pamięci podręcznej i indeksu wyszukiwania.
+
+Uruchomienie: python cli.py serve --port 8765
+"""
+import asyncio
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import core
+import formatters
+import metrics
+from transcript_cache import preferred_keys
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CONCURRENCY = 8
+# Maksymalny rozmiar wiersza żądania i nagłówków
+MAX_HEADER_BYTES = 16 * 1024
+# Czas bezczynności połączenia keep-alive w sekundach
+IDLE_TIMEOUT = 30
+
+CONTENT_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "timestamped": "text/plain; charset=utf-8",
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def render(video_id, language, segments, file_format):
+    # Treść odpowiedzi w wybranym formacie, jednym przejściem po segmentach
+    if file_format == "json":
+        return json.dumps({"video_id": video_id, "language": language, "segments": segments}, ensure_ascii=False)
+    output = io.StringIO()
+    formatters.write_segments(segments, {file_format: output})
+    return output.getvalue()
+
+
+class TranscriptService:
+    """
+    Pobieranie transkrypcji dla serwera: najpierw pamięć podręczna, potem jedno wspólne pobranie
+    na (film, języki) niezależnie od liczby czekających zapytań. Pobrania działają w osobnej puli wątków
+    o rozmiarze `concurrency`, więc pętla asyncio obsługuje w tym czasie kolejne połączenia.
+    """
+
+    def __init__(self, cache, index=None, concurrency=DEFAULT_CONCURRENCY, languages=core.DEFAULT_LANGUAGES):
+        self.cache = cache
+        self.index = index
+        self.concurrency = max(1, int(concurrency))
+        self.languages = list(languages)
+        self.started = time.time()
+        self._flights = {}
+        self._upstream = asyncio.Semaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="upstream")
+        # Odczyty z pamięci podręcznej nie czekają w kolejce za pobraniami
+        self._cache_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache")
+        self.upstream_active = 0
+
+    async def segments(self, video_id, languages=None):
+        # (język, segmenty) albo None, jeśli film nie ma transkrypcji w żadnym z języków
+        languages = tuple(languages or self.languages)
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(self._cache_executor, self.cache.find, video_id, preferred_keys(languages))
+        if cached is not None:
+            return cached[0], cached[1]
+
+        key = (video_id, languages)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._fetch(video_id, languages))
+            self._flights[key] = flight
+            flight.add_done_callback(lambda _flight: self._flights.pop(key, None))
+        else:
+            metrics.count("service_coalesced")
+        # Rozłączenie jednego klienta nie przerywa pobrania, na które czekają inni
+        return await asyncio.shield(flight)
+
+    async def _fetch(self, video_id, languages):
+        async with self._upstream:
+            self.upstream_active += 1
+            try:
+                with metrics.timer("service_upstream"):
+                    return await asyncio.get_running_loop().run_in_executor(
+                        self._executor, core.download_segments, video_id, self.cache, list(languages), self.index)
+            finally:
+                self.upstream_active -= 1
+
+    def health(self):
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started, 1),
+            "in_flight": len(self._flights),
+            "upstream_active": self.upstream_active,
+            "concurrency": self.concurrency,
+            "cache": self.cache.path,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._cache_executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TranscriptServer:
+    """
+    Minimalny serwer HTTP/1.1 na asyncio.start_server: tylko GET, połączenia keep-alive,
+    odpowiedzi z Content-Length.
+    """
+
+    def __init__(self, service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.service = service
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=MAX_HEADER_BYTES)
+        # Port 0 oznacza dowolny wolny port - zapamiętaj przydzielony
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.service.close()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split()
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                if len(parts) != 3:
+                    await self._respond(writer, 400, "text/plain; charset=utf-8", "Niepoprawne żądanie\n", False)
+                    break
+                method, target, version = parts
+                if headers.get("content-length"):
+                    await reader.readexactly(int(headers["content-length"]))
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version != "HTTP/1.0")
+
+                started = time.perf_counter()
+                status, content_type, body = await self._dispatch(method, target)
+                route = urlsplit(target).path.split("/")[1] if target.startswith("/") else ""
+                metrics.count("service_requests", route=route, status=status)
+                metrics.observe("service_request", time.perf_counter() - started, started, route=route)
+                await self._respond(writer, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, target):
+        url = urlsplit(target)
+        path = url.path
+        if method != "GET":
+            return 405, "text/plain; charset=utf-8", "Obsługiwane jest tylko GET\n"
+        if path == "/health":
+            return 200, CONTENT_TYPES["json"], json.dumps(self.service.health())
+        if path == "/metrics":
+            return 200, "text/plain; version=0.0.4; charset=utf-8", metrics.prometheus_text()
+        if path.startswith("/transcript/"):
+            return await self._transcript(unquote(path[len("/transcript/"):]), parse_qs(url.query))
+        return 404, "text/plain; charset=utf-8", "Nieznana ścieżka\n"
+
+    async def _transcript(self, video_id, query):
+        file_format = query.get("format", ["txt"])[0]
+        if file_format not in CONTENT_TYPES:
+            return 400, "text/plain; charset=utf-8", f"Nieznany format: {file_format}\n"
+        if not video_id or "/" in video_id:
+            return 400, "text/plain; charset=utf-8", "Brak ID filmu\n"
+        languages = [code for value in query.get("lang", []) for code in value.split(",") if code]
+        try:
+            result = await self.service.segments(video_id, languages)
+        except Exception as e:
+            return 500, "text/plain; charset=utf-8", f"Błąd pobierania transkrypcji: {e}\n"
+        if result is None:
+            return 404, "text/plain; charset=utf-8", f"Brak transkrypcji dla wideo {video_id}\n"
+        language, segments = result
+        return 200, CONTENT_TYPES[file_format], render(video_id, language, segments, file_format)
+
+    async def _respond(self, writer, status, content_type, body, keep_alive):
+        payload = body.encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+
+async def serve(settings, host=None, port=None, concurrency=None, on_ready=None):
+    # Uruchom serwer i działaj do przerwania; on_ready(server) jest wywoływane po otwarciu portu
+    service = TranscriptService(core.create_cache(settings), index=core.create_index(settings),
+                                concurrency=concurrency or settings.get("service_concurrency", DEFAULT_CONCURRENCY))
+    server = TranscriptServer(service, host or settings.get("service_host", DEFAULT_HOST),
+                              port if port is not None else settings.get("service_port", DEFAULT_PORT))
+    await server.start()
+    if on_ready:
+        on_ready(server)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
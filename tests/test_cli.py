@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cli  # noqa: E402
+import core  # noqa: E402
+from quota import QuotaExceeded  # noqa: E402
+from test_scanner import FakeYouTube, Request  # noqa: E402
+
+
+class FailingYouTube(FakeYouTube):
+    # Druga strona playlisty kończy się błędem `error`
+    def __init__(self, videos, error):
+        super().__init__(videos)
+        self.error = error
+
+    def list(self, part, playlistId, maxResults, pageToken):
+        if pageToken:
+            return FailingRequest(self.error)
+        return super().list(part, playlistId, maxResults, pageToken)
+
+
+class FailingRequest(Request):
+    def __init__(self, error):
+        super().__init__(None)
+        self.error = error
+
+    def execute(self):
+        raise self.error
+
+
+def run_scan(monkeypatch, tmp_path, youtube):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(core, "is_transcript_available", lambda video_id: True)
+    monkeypatch.setattr(cli, "load_channel", lambda args, settings: (
+        youtube, core.ChannelInfo("UCtest", title="Kanał", uploads_playlist_id="UUtest")))
+    return cli.main(["--settings", str(tmp_path / "settings.json"), "scan", "https://www.youtube.com/@kanal"])
+
+
+def test_complete_scan_exits_with_zero(monkeypatch, tmp_path):
+    assert not run_scan(monkeypatch, tmp_path, FakeYouTube(120))
+
+
+def test_quota_stopped_scan_exits_with_two(monkeypatch, tmp_path):
+    assert run_scan(monkeypatch, tmp_path, FailingYouTube(120, QuotaExceeded("limit"))) == 2
+
+
+def test_partial_scan_exits_with_one(monkeypatch, tmp_path):
+    assert run_scan(monkeypatch, tmp_path, FailingYouTube(120, ConnectionError("sieć"))) == 1
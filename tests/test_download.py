@@ -0,0 +1,88 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core  # noqa: E402
+import metrics  # noqa: E402
+import transcript_probe  # noqa: E402
+from transcript_cache import TranscriptCache  # noqa: E402
+from transcript_probe import ProbeResult  # noqa: E402
+
+SEGMENTS = [{"text": "Dzień dobry", "start": 0.0, "duration": 1.5}, {"text": "Żółw", "start": 1.5, "duration": 2.0}]
+
+
+class Transcript:
+    def __init__(self, video_id, language_code, is_generated):
+        self.video_id = video_id
+        self.language_code = language_code
+        self.is_generated = is_generated
+
+    def fetch(self):
+        return list(SEGMENTS)
+
+
+class TranscriptList:
+    # Odpowiednik TranscriptList z youtube_transcript_api dla ścieżek (kod języka, automatyczna)
+    def __init__(self, video_id, tracks):
+        self.video_id = video_id
+        self.transcripts = [Transcript(video_id, code, generated) for code, generated in tracks]
+
+    def __iter__(self):
+        return iter(self.transcripts)
+
+
+def probe_with(monkeypatch, tracks):
+    probes = transcript_probe.ProbeCache()
+    monkeypatch.setattr(transcript_probe, "_cache", probes)
+    monkeypatch.setattr(transcript_probe, "probe_video", lambda video_id: ProbeResult(
+        video_id, transcript_list=TranscriptList(video_id, tracks),
+        languages=[code + ("-asr" if generated else "") for code, generated in tracks]))
+    return probes
+
+
+def test_download_segments_returns_fetched_segments_without_rereading_cache(monkeypatch, tmp_path):
+    probe_with(monkeypatch, [("pl", False)])
+    # Transkrypcja większa niż limit pamięci podręcznej jest usuwana zaraz po zapisie
+    cache = TranscriptCache(str(tmp_path / "cache.sqlite"), max_bytes=1)
+    metrics.reset()
+    assert core.download_segments("aaaaaaaaaaa", cache) == ("pl", SEGMENTS)
+    assert metrics.counter_total("cache_misses") == 1
+    assert metrics.counter_total("cache_hits") == 0
+
+
+def test_missing_language_keeps_memoized_probe(monkeypatch, tmp_path):
+    probes = probe_with(monkeypatch, [("de", False)])
+    cache = TranscriptCache(str(tmp_path / "cache.sqlite"))
+    assert core.download_transcript("aaaaaaaaaaa", cache) is None
+    assert probes.get("aaaaaaaaaaa") is not None
+
+
+def test_failed_fetch_forgets_probe(monkeypatch, tmp_path):
+    # Adresy napisów mogły wygasnąć - zapamiętane sprawdzenie jest odrzucane
+    def fetch(transcript):
+        raise ConnectionError("sieć")
+
+    probes = probe_with(monkeypatch, [("pl", False)])
+    monkeypatch.setattr(Transcript, "fetch", fetch)
+    monkeypatch.setattr(transcript_probe, "pytube_captions", lambda video_id, path: None)
+    cache = TranscriptCache(str(tmp_path / "cache.sqlite"))
+    assert core.download_transcript("aaaaaaaaaaa", cache) is None
+    assert probes.get("aaaaaaaaaaa") is None
+
+
+def test_preview_and_export_pick_the_same_track(monkeypatch, tmp_path):
+    # Ręczna ścieżka angielska ma pierwszeństwo przed automatyczną polską we wszystkich ścieżkach pobierania
+    import async_fetch
+
+    tracks = [("pl", True), ("en", False)]
+    probe_with(monkeypatch, tracks)
+    cache = TranscriptCache(str(tmp_path / "cache.sqlite"))
+    assert core.download_segments("aaaaaaaaaaa", cache)[0] == "en"
+
+    transcript = core.preferred_transcript(TranscriptList("aaaaaaaaaaa", tracks))
+    assert (transcript.language_code, transcript.is_generated) == ("en", False)
+
+    captions = {"captionTracks": [{"languageCode": "pl", "kind": "asr", "baseUrl": "pl-asr"},
+                                  {"languageCode": "en", "baseUrl": "en"}]}
+    assert async_fetch.select_track(captions, core.DEFAULT_LANGUAGES) == ("en", "en")
@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core  # noqa: E402
+
+VIDEOS = [(f"v{number:04d}", "2024-01-01", f"Film {number}") for number in range(10)]
+
+
+def transcript(video_id):
+    return f"Transkrypcja filmu {video_id}\n" * 20
+
+
+class Fetch:
+    # Zapamiętuje, o które filmy pytano; `missing` nie mają transkrypcji
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+        self._lock = threading.Lock()
+
+    def __call__(self, video_id):
+        with self._lock:
+            self.calls.append(video_id)
+        return None if video_id in self.missing else transcript(video_id)
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def test_rerun_skips_exported_files(tmp_path):
+    output_dir = str(tmp_path)
+    entries = core.export_to_txt(VIDEOS, output_dir, Fetch())
+    assert all(entry["status"] == "ok" for entry in entries.values())
+
+    fetch = Fetch()
+    core.export_to_txt(VIDEOS, output_dir, fetch)
+    assert fetch.calls == []
+
+
+def test_resume_rewrites_truncated_file_without_manifest_entry(tmp_path):
+    # Awaria w trakcie zapisu przed zapisem manifestu: ucięty plik nie może zostać uznany za gotowy
+    output_dir = str(tmp_path)
+    video_id, publish_date, title = VIDEOS[0]
+    path = os.path.join(output_dir, core.transcript_filename(publish_date, title))
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(transcript(video_id)[:15])
+
+    entries = core.export_to_txt(VIDEOS[:1], output_dir, Fetch())
+    assert read(path) == transcript(video_id)
+    assert entries[video_id]["status"] == "ok"
+    assert entries[video_id]["bytes"] == os.path.getsize(path)
+    assert core.load_export_manifest(output_dir)[video_id]["bytes"] == os.path.getsize(path)
+
+
+def test_changed_file_is_exported_again(tmp_path):
+    output_dir = str(tmp_path)
+    core.export_to_txt(VIDEOS, output_dir, Fetch())
+    video_id, publish_date, title = VIDEOS[3]
+    path = os.path.join(output_dir, core.transcript_filename(publish_date, title))
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("ucięty")
+
+    fetch = Fetch()
+    core.export_to_txt(VIDEOS, output_dir, fetch)
+    assert fetch.calls == [video_id]
+    assert read(path) == transcript(video_id)
+
+
+def test_retry_failed_only_repeats_errors(tmp_path):
+    output_dir = str(tmp_path)
+    entries = core.export_to_txt(VIDEOS, output_dir, Fetch(missing={"v0002", "v0005"}))
+    assert sorted(video_id for video_id, entry in entries.items() if entry["status"] == "error") == ["v0002", "v0005"]
+
+    fetch = Fetch()
+    entries = core.export_to_txt(VIDEOS, output_dir, fetch, retry_failed=True)
+    assert sorted(fetch.calls) == ["v0002", "v0005"]
+    assert all(entry["status"] == "ok" for entry in entries.values())
+
+
+def test_cancel_records_every_written_file(tmp_path):
+    output_dir = str(tmp_path)
+    videos = [(f"v{number:04d}", "2024-01-01", f"Film {number}") for number in range(200)]
+    cancel_event = threading.Event()
+
+    def fetch(video_id):
+        if video_id == "v0020":
+            cancel_event.set()
+        # Pobieranie trwa, więc po anulowaniu w kolejce zostają niezaczęte filmy
+        time.sleep(0.005)
+        return transcript(video_id)
+
+    core.export_to_txt(videos, output_dir, fetch, cancel_event=cancel_event, workers=4)
+    entries = core.load_export_manifest(output_dir)
+    files = {name for name in os.listdir(output_dir) if name.endswith(f".{core.FileType.TXT}")}
+    assert len(entries) < len(videos)
+    assert {entry["file"] for entry in entries.values() if entry["status"] == "ok"} == files
+
+
+def test_same_date_and_title_get_separate_files(tmp_path):
+    output_dir = str(tmp_path)
+    videos = [("aaaaaaaaaaa", "2024-01-01", "Odcinek"), ("bbbbbbbbbbb", "2024-01-01", "Odcinek")]
+    entries = core.export_to_txt(videos, output_dir, Fetch())
+    assert entries["aaaaaaaaaaa"]["file"] != entries["bbbbbbbbbbb"]["file"]
+    for video_id, entry in entries.items():
+        assert read(os.path.join(output_dir, entry["file"])) == transcript(video_id)
+
+
+def export_jsonl(output_dir, videos, fetch=None):
+    core.export_to_jsonl(videos, output_dir, fetch or Fetch())
+    with open(os.path.join(output_dir, "transcripts.jsonl"), "r", encoding="utf-8") as file:
+        return [json.loads(line)["video_id"] for line in file]
+
+
+def test_jsonl_resume_drops_torn_last_line(tmp_path):
+    output_dir = str(tmp_path)
+    export_jsonl(output_dir, VIDEOS[:3])
+    path = os.path.join(output_dir, "transcripts.jsonl")
+    with open(path, "ab") as file:
+        file.write(b'{"video_id": "v0003", "transcr')
+
+    fetch = Fetch()
+    assert export_jsonl(output_dir, VIDEOS[:5], fetch) == [video_id for video_id, _, _ in VIDEOS[:5]]
+    assert fetch.calls == ["v0003", "v0004"]
+
+
+def test_jsonl_resume_keeps_records_written_after_checkpoint(tmp_path):
+    # Awaria po zapisaniu rekordu, a przed zapisem punktu kontrolnego: offset jest starszy niż plik
+    output_dir = str(tmp_path)
+    export_jsonl(output_dir, VIDEOS[:2])
+    checkpoint_path = os.path.join(output_dir, "transcripts.jsonl.checkpoint")
+    with open(checkpoint_path, "r", encoding="utf-8") as file:
+        checkpoint = file.read()
+    export_jsonl(output_dir, VIDEOS[:4])
+    with open(checkpoint_path, "w", encoding="utf-8") as file:
+        file.write(checkpoint)
+
+    fetch = Fetch()
+    assert export_jsonl(output_dir, VIDEOS[:5], fetch) == [video_id for video_id, _, _ in VIDEOS[:5]]
+    assert fetch.calls == ["v0004"]
+
+
+def test_jsonl_resume_without_checkpoint(tmp_path):
+    output_dir = str(tmp_path)
+    export_jsonl(output_dir, VIDEOS[:3])
+    os.remove(os.path.join(output_dir, "transcripts.jsonl.checkpoint"))
+
+    fetch = Fetch()
+    assert export_jsonl(output_dir, VIDEOS[:4], fetch) == [video_id for video_id, _, _ in VIDEOS[:4]]
+    assert fetch.calls == ["v0003"]
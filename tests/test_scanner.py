@@ -0,0 +1,101 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scan_checkpoint import ScanCheckpoint  # noqa: E402
+from scanner import ChannelScanner  # noqa: E402
+
+PAGE_SIZE = 50
+
+
+class Request:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeYouTube:
+    # Kanał z `videos` filmami na playliście "uploads"; wszystkie filmy mają metadane
+    def __init__(self, videos):
+        self.ids = [f"v{number:04d}" for number in range(videos)]
+
+    def playlistItems(self):
+        return self
+
+    def videos(self):
+        return VideoList()
+
+    def list(self, part, playlistId, maxResults, pageToken):
+        start = int(pageToken or 0)
+        end = min(len(self.ids), start + maxResults)
+        response = {"items": [{
+            "snippet": {"title": f"Film {video_id}"},
+            "contentDetails": {"videoId": video_id, "videoPublishedAt": "2024-01-01T00:00:00Z"},
+        } for video_id in self.ids[start:end]]}
+        if end < len(self.ids):
+            response["nextPageToken"] = str(end)
+        return Request(response)
+
+
+class VideoList:
+    def list(self, part, id):
+        return Request({"items": [{"id": video_id, "contentDetails": {"duration": "PT1M", "caption": "true"},
+                                   "statistics": {"viewCount": "1"}} for video_id in id.split(",")]})
+
+
+def scan(tmp_path, videos, workers=8):
+    checkpoint = ScanCheckpoint("UCtest", directory=str(tmp_path))
+    scanner = ChannelScanner(FakeYouTube(videos), "UCtest", lambda video_id: True, workers=workers,
+                             uploads_playlist_id="UUtest", checkpoint=checkpoint)
+    return scanner, [video.video_id for video in scanner.scan()]
+
+
+def test_scan_with_checkpoint_returns_every_video(tmp_path):
+    # Ostatnie filmy nie mogą zostać pominięte przez _DONE wstawione przed wywołaniami zwrotnymi zadań
+    for _ in range(20):
+        scanner, video_ids = scan(tmp_path, 100)
+        assert sorted(video_ids) == [f"v{number:04d}" for number in range(100)]
+        assert scanner.completed and scanner.error is None
+        scanner.clear_checkpoint()
+
+
+def test_completed_checkpoint_is_removed(tmp_path):
+    scanner, video_ids = scan(tmp_path, 120)
+    assert len(video_ids) == 120
+    scanner.clear_checkpoint()
+    assert not os.path.exists(scanner.checkpoint.path)
+
+
+def test_sync_backfills_past_known_videos_until_a_scan_completes():
+    # Poprzednie skanowanie zostało przerwane po pierwszej stronie - starsze filmy trzeba dociągnąć
+    known = {f"v{number:04d}" for number in range(50)}
+    scanner = ChannelScanner(FakeYouTube(120), "UCtest", lambda video_id: True, uploads_playlist_id="UUtest",
+                             known_ids=known, stop_at_known=False)
+    assert sorted(video.video_id for video in scanner.scan()) == [f"v{number:04d}" for number in range(50, 120)]
+    assert scanner.completed
+
+    scanner = ChannelScanner(FakeYouTube(120), "UCtest", lambda video_id: True, uploads_playlist_id="UUtest",
+                             known_ids=known)
+    assert list(scanner.scan()) == []
+
+
+class FailingVideoList(VideoList):
+    def list(self, part, id):
+        raise ConnectionError("sieć")
+
+
+def test_failed_metadata_lookup_keeps_videos_out_of_checkpoint(tmp_path):
+    # Filmy z domyślnymi metadanymi nie mogą trafić do punktu kontrolnego, bo wznowienie by ich nie odświeżyło
+    youtube = FakeYouTube(120)
+    youtube.videos = FailingVideoList
+    checkpoint = ScanCheckpoint("UCtest", directory=str(tmp_path))
+    scanner = ChannelScanner(youtube, "UCtest", lambda video_id: True, uploads_playlist_id="UUtest",
+                             checkpoint=checkpoint)
+    assert list(scanner.scan()) == []
+    assert isinstance(scanner.error, ConnectionError)
+    assert not scanner.completed
+    scanner.clear_checkpoint()
+    assert ScanCheckpoint("UCtest", directory=str(tmp_path)).videos == {}
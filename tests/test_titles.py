@@ -0,0 +1,22 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import titles  # noqa: E402
+from titles import TitleResolver  # noqa: E402
+
+
+def test_bulk_remember_saves_once_until_flush(monkeypatch, tmp_path):
+    saves = []
+    monkeypatch.setattr(titles, "atomic_write", lambda path, data: saves.append(data))
+    resolver = TitleResolver(str(tmp_path / "titles.json"))
+    for number in range(500):
+        resolver.remember(f"v{number:04d}", f"Film {number}")
+    assert len(saves) <= 1
+
+    resolver.flush()
+    assert len(json.loads(saves[-1])) == 500
+    resolver.flush()
+    assert len(saves) <= 2
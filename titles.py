@@ -0,0 +1,101 @@
+import html
+import json
+import os
+import re
+import threading
+import time
+
+from atomic_file import atomic_write
+
+TITLES_PATH = "titles.json"
+OEMBED_URL = "https://www.youtube.com/oembed"
+WATCH_URL = "https://www.youtube.com/watch?v={video_id}"
+# Ile bajtów strony filmu czytać w poszukiwaniu <title>, zanim się poddamy
+MAX_PAGE_BYTES = 512 * 1024
+# titles.json jest zapisywany najwyżej raz na tyle sekund (i przy flush), a nie po każdym tytule
+SAVE_INTERVAL = 5
+
+
+def fetch_oembed_title(video_id, timeout=10):
+    # Mała odpowiedź JSON (kilkaset bajtów) zamiast całej strony filmu
+    import http_client
+    response = http_client.get(OEMBED_URL, params={"url": WATCH_URL.format(video_id=video_id), "format": "json"},
+                            timeout=timeout)
+    if response.status_code == 200:
+        return response.json().get("title")
+    return None
+
+
+def fetch_page_title(url, timeout=10):
+    # Czytaj stronę strumieniowo i przerwij zaraz po znaczniku </title>
+    import http_client
+    with http_client.get(url, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            return None
+        data = b""
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            data += chunk
+            end = data.find(b"</title>")
+            if end != -1:
+                title_match = re.search(rb'<title>(.*?)</title>', data[:end + 8], re.IGNORECASE | re.DOTALL)
+                if not title_match:
+                    return None
+                title = html.unescape(title_match.group(1).decode("utf-8", errors="replace"))
+                return title.replace(" - YouTube", "").strip() or None
+            if len(data) > MAX_PAGE_BYTES:
+                return None
+    return None
+
+
+class TitleResolver:
+    """
+    Rozwiązywanie tytułów filmów z trwałą pamięcią podręczną id→tytuł (titles.json).
+    Najpierw pamięć podręczna, potem oEmbed, a na końcu strumieniowo czytana strona filmu.
+    """
+
+    def __init__(self, path=TITLES_PATH, save_interval=SAVE_INTERVAL):
+        self.path = path
+        self.save_interval = save_interval
+        self.titles = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                self.titles = json.load(file)
+
+    def resolve(self, video_id, url=None):
+        title = self.titles.get(video_id)
+        if title:
+            return title
+        try:
+            title = fetch_oembed_title(video_id)
+        except Exception:
+            title = None
+        if not title:
+            try:
+                title = fetch_page_title(url or WATCH_URL.format(video_id=video_id))
+            except Exception:
+                title = None
+        if title:
+            self.remember(video_id, title)
+        return title
+
+    def remember(self, video_id, title):
+        # Dodawanie setek filmów naraz nie przepisuje całego pliku po każdym tytule
+        with self._lock:
+            self.titles[video_id] = title
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self._save()
+
+    def flush(self):
+        # Zapisz tytuły dodane od ostatniego zapisu, np. przy zamykaniu aplikacji
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _save(self):
+        atomic_write(self.path, json.dumps(self.titles, indent=4, ensure_ascii=False))
+        self._dirty = False
+        self._saved_at = time.monotonic()
@@ -0,0 +1,134 @@
+import json
+import sqlite3
+import threading
+import time
+
+import metrics
+
+DEFAULT_CACHE_PATH = "transcript_cache.sqlite"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL = 30 * 24 * 3600
+
+
+def language_key(language_code, is_generated=False):
+    # Napisy ręczne i automatyczne mogą mieć ten sam kod języka, więc rozróżniamy je w kluczu
+    return f"{language_code}-asr" if is_generated else language_code
+
+
+def preferred_keys(language_codes):
+    # Kolejność zgodna z wyszukiwaniem: najpierw ręczne, potem automatyczne
+    return list(language_codes) + [language_key(code, True) for code in language_codes]
+
+
+def select_language(available, language_codes):
+    # Wybór ścieżki napisów wspólny dla wszystkich ścieżek pobierania: pierwszy klucz z preferred_keys
+    # spośród dostępnych kluczy language_key albo None
+    return next((key for key in preferred_keys(language_codes) if key in available), None)
+
+
+class TranscriptCache:
+    """
+    Trwała pamięć podręczna transkrypcji w SQLite, kluczowana ID filmu i językiem.
+    Przechowuje surowe segmenty i wyliczony tekst; usuwa wpisy najdawniej używane (LRU)
+    po przekroczeniu limitu rozmiaru oraz wpisy starsze niż TTL.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            " video_id TEXT NOT NULL,"
+            " language TEXT NOT NULL,"
+            " segments TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " PRIMARY KEY (video_id, language))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS transcripts_accessed ON transcripts (accessed)")
+        self._connection.commit()
+
+    def get(self, video_id, language):
+        # Zwraca (segmenty, tekst) lub None, jeśli brak wpisu albo wpis wygasł
+        cached = self._lookup(video_id, language)
+        metrics.count("cache_hits" if cached is not None else "cache_misses")
+        return cached
+
+    def _lookup(self, video_id, language):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT segments, text, created FROM transcripts WHERE video_id = ? AND language = ?",
+                (video_id, language)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if self.ttl and now - row[2] > self.ttl:
+                self._connection.execute(
+                    "DELETE FROM transcripts WHERE video_id = ? AND language = ?", (video_id, language))
+                self._connection.commit()
+                return None
+            self._connection.execute(
+                "UPDATE transcripts SET accessed = ? WHERE video_id = ? AND language = ?",
+                (now, video_id, language)
+            )
+            self._connection.commit()
+        return json.loads(row[0]), row[1]
+
+    def find(self, video_id, languages):
+        # Zwraca (język, segmenty, tekst) dla pierwszego języka z listy, który jest w pamięci podręcznej
+        for language in languages:
+            cached = self._lookup(video_id, language)
+            if cached is not None:
+                metrics.count("cache_hits")
+                return (language,) + cached
+        metrics.count("cache_misses")
+        return None
+
+    def put(self, video_id, language, segments, text):
+        self.put_many([(video_id, language, segments, text)])
+
+    def put_many(self, entries):
+        # Wiele wpisów (video_id, język, segmenty, tekst) w jednej transakcji - jeden zapis na dysk zamiast wielu
+        now = time.time()
+        rows = []
+        for video_id, language, segments, text in entries:
+            payload = json.dumps(segments, ensure_ascii=False)
+            size = len(payload.encode("utf-8")) + len(text.encode("utf-8"))
+            rows.append((video_id, language, payload, text, size, now, now))
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO transcripts (video_id, language, segments, text, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict(now)
+            self._connection.commit()
+
+    def _evict(self, now):
+        if self.ttl:
+            self._connection.execute("DELETE FROM transcripts WHERE created < ?", (now - self.ttl,))
+        if not self.max_bytes:
+            return
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Usuwaj najdawniej używane wpisy, aż rozmiar spadnie poniżej limitu
+        rows = self._connection.execute("SELECT video_id, language, size FROM transcripts ORDER BY accessed")
+        to_delete = []
+        for video_id, language, size in rows:
+            if total <= self.max_bytes:
+                break
+            to_delete.append((video_id, language))
+            total -= size
+        self._connection.executemany("DELETE FROM transcripts WHERE video_id = ? AND language = ?", to_delete)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
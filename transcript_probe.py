@@ -0,0 +1,146 @@
+"""
+Pamięć wyników sprawdzania, czy film ma transkrypcje: lista transkrypcji z youtube_transcript_api
+(albo napisy z pytube, gdy lista jest niedostępna) wraz z dostępnymi językami. Skanowanie kanału
+zapisuje tu wynik, a pobieranie transkrypcji korzysta z niego zamiast ponownie pytać o ten sam film.
+Wpisy wygasają po TTL, ponieważ adresy napisów ze strony filmu są ważne tylko przez pewien czas.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import metrics
+from transcript_cache import language_key
+
+DEFAULT_TTL = 30 * 60
+# Nieudane sprawdzenie (np. chwilowy błąd sieci) jest pamiętane krócej
+DEFAULT_NEGATIVE_TTL = 60
+DEFAULT_MAX_ENTRIES = 20000
+
+
+@dataclass
+class ProbeResult:
+    video_id: str
+    # TranscriptList z youtube_transcript_api
+    transcript_list: object = None
+    # CaptionQuery z pytube - tylko gdy lista transkrypcji była niedostępna
+    captions: object = None
+    # Klucze language_key dostępnych transkrypcji, np. ["pl", "en-asr"]
+    languages: list = field(default_factory=list)
+    error: Exception | None = None
+    checked: float = field(default_factory=time.monotonic)
+
+    @property
+    def available(self):
+        return self.transcript_list is not None or bool(self.captions)
+
+
+def pytube_captions(video_id, path):
+    # Napisy filmu przez pytube; `path` to etykieta pomiaru (sprawdzanie albo pobieranie)
+    from pytube import YouTube
+    metrics.count("pytube_fallbacks", path=path)
+    with metrics.timer("pytube_fallback", path=path):
+        return YouTube(f'https://www.youtube.com/watch?v={video_id}').captions
+
+
+def caption_language(caption):
+    # pytube oznacza napisy automatyczne prefiksem "a."
+    code = caption.code
+    return language_key(code[2:], True) if code.startswith("a.") else code
+
+
+def probe_video(video_id):
+    import http_client
+    try:
+        transcript_list = http_client.list_transcripts(video_id)
+        languages = [language_key(transcript.language_code, transcript.is_generated)
+                     for transcript in transcript_list]
+        return ProbeResult(video_id, transcript_list=transcript_list, languages=languages)
+    except Exception as e:
+        print(f"YouTubeTranscriptApi nie może pobrać transkrypcji: {e}", file=sys.stderr)
+        error = e
+    try:
+        captions = pytube_captions(video_id, "probe")
+        return ProbeResult(video_id, captions=captions, languages=[caption_language(caption) for caption in captions],
+                           error=error)
+    except Exception as e:
+        print(f"pytube nie może pobrać transkrypcji: {e}", file=sys.stderr)
+        return ProbeResult(video_id, error=error)
+
+
+class ProbeCache:
+    """
+    Wyniki sprawdzania filmów w pamięci procesu, z limitem liczby wpisów (najdawniej używane są usuwane)
+    i czasem ważności.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, video_id):
+        with self._lock:
+            result = self._entries.get(video_id)
+            if result is None:
+                return None
+            ttl = self.ttl if result.available else self.negative_ttl
+            if time.monotonic() - result.checked > ttl:
+                del self._entries[video_id]
+                return None
+            self._entries.move_to_end(video_id)
+            return result
+
+    def put(self, result):
+        with self._lock:
+            self._entries[result.video_id] = result
+            self._entries.move_to_end(result.video_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def probe(self, video_id):
+        result = self.get(video_id)
+        if result is not None:
+            metrics.count("probe_hits")
+            return result
+        metrics.count("probe_misses")
+        result = probe_video(video_id)
+        self.put(result)
+        return result
+
+    def forget(self, video_id):
+        with self._lock:
+            self._entries.pop(video_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = ProbeCache()
+
+
+def configure(settings):
+    # Ustawienia z settings.json: probe_ttl_minutes
+    global _cache
+    _cache = ProbeCache(ttl=settings.get("probe_ttl_minutes", DEFAULT_TTL / 60) * 60)
+    return _cache
+
+
+def probe(video_id):
+    return _cache.probe(video_id)
+
+
+def forget(video_id):
+    _cache.forget(video_id)
+
+
+def list_transcripts(video_id):
+    # Jak http_client.list_transcripts, ale z zapamiętanego sprawdzenia; błąd listy jest zgłaszany ponownie
+    result = probe(video_id)
+    if result.transcript_list is None:
+        raise result.error or LookupError(f"Brak listy transkrypcji dla wideo {video_id}")
+    return result.transcript_list